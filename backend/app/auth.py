@@ -7,6 +7,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from .database import get_db
 from . import models
+from .services.user_cache import user_cache
 import os
 from dotenv import load_dotenv
 
@@ -50,9 +51,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
         
+    user = user_cache.get(db, email)
+    if user is not None:
+        return user
+
     user = db.query(models.User).filter(models.User.email == email).first()
     if user is None:
         raise credentials_exception
+    user_cache.put(user)
     return user
 
 async def get_current_active_user(current_user: models.User = Depends(get_current_user)):
@@ -0,0 +1,111 @@
+"""
+Versioned schema migrations.
+
+Each module `vNNNN_<name>.py` in this package defines `upgrade(conn)` and is applied
+once, in order. Applied versions are recorded in the `schema_version` table, so a
+booting worker only runs one SELECT when the schema is already current.
+
+Migrations run after `create_all`, so on a fresh database the tables already have
+their latest columns: migrations must be idempotent (see add_column_if_missing).
+They never import app.models: a table a migration creates is declared inline, on a local
+MetaData, as it was at that version, so changing a model later does not change what an
+old migration builds.
+"""
+import importlib
+import pkgutil
+import re
+from contextlib import contextmanager
+from sqlalchemy import inspect, text
+
+# Arbitrary constant identifying the migration advisory lock on PostgreSQL
+MIGRATION_LOCK_KEY = 7_340_001
+
+_MODULE_RE = re.compile(r"^v(\d{4})_(\w+)$")
+
+
+def discover_migrations():
+    """Returns [(version, name, module)] sorted by version."""
+    migrations = []
+    for info in pkgutil.iter_modules(__path__):
+        match = _MODULE_RE.match(info.name)
+        if match:
+            module = importlib.import_module(f"{__name__}.{info.name}")
+            migrations.append((int(match.group(1)), match.group(2), module))
+    migrations.sort(key=lambda m: m[0])
+    return migrations
+
+
+def latest_version() -> int:
+    migrations = discover_migrations()
+    return migrations[-1][0] if migrations else 0
+
+
+def current_version(conn) -> int:
+    return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+
+def add_column_if_missing(conn, table: str, column: str, ddl_type: str):
+    columns = [col["name"] for col in inspect(conn).get_columns(table)]
+    if column not in columns:
+        print(f"⚠️ Column '{table}.{column}' missing. Adding it...")
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+@contextmanager
+def _migration_lock(engine):
+    """One transaction holding a database-wide lock, so only one worker migrates at a time."""
+    if engine.dialect.name == "sqlite":
+        # pysqlite manages transactions itself unless autocommit is on; BEGIN IMMEDIATE takes the write lock
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.exec_driver_sql("COMMIT")
+            except Exception:
+                conn.exec_driver_sql("ROLLBACK")
+                raise
+    else:
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                # Released automatically at commit/rollback
+                conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            yield conn
+
+
+def run_migrations(engine, metadata=None) -> int:
+    """Brings the schema up to date. Returns the number of migrations applied."""
+    migrations = discover_migrations()
+    target = migrations[-1][0] if migrations else 0
+
+    # Fast path: a single query when nothing is pending
+    try:
+        with engine.connect() as conn:
+            if current_version(conn) >= target:
+                print(f"✅ Database schema is current (version {target}).")
+                return 0
+    except Exception:
+        pass  # schema_version does not exist yet
+
+    with _migration_lock(engine) as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        # Another worker may have migrated while we waited for the lock
+        version = current_version(conn)
+        pending = [m for m in migrations if m[0] > version]
+        if not pending:
+            return 0
+
+        if metadata is not None:
+            metadata.create_all(bind=conn)
+        for number, name, module in pending:
+            print(f"📦 Applying migration {number:04d}_{name}...")
+            module.upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, name) VALUES (:version, :name)"),
+                {"version": number, "name": name},
+            )
+    print(f"✅ Database schema migrated to version {target} ({len(pending)} applied).")
+    return len(pending)
@@ -0,0 +1,21 @@
+"""Columns added to `users` after the first deployments, and upper-case enum values cleanup."""
+from sqlalchemy import inspect, text
+from . import add_column_if_missing
+
+
+def upgrade(conn):
+    if "users" not in inspect(conn).get_table_names():
+        return
+    add_column_if_missing(conn, "users", "is_active", "BOOLEAN DEFAULT true")
+    add_column_if_missing(conn, "users", "last_login", "TIMESTAMP")
+    add_column_if_missing(conn, "users", "status", "VARCHAR DEFAULT 'pending'")
+    add_column_if_missing(conn, "users", "plan_selection", "VARCHAR DEFAULT 'trial'")
+    add_column_if_missing(conn, "users", "stripe_customer_id", "VARCHAR")
+    add_column_if_missing(conn, "users", "generation_count", "INTEGER DEFAULT 0")
+    add_column_if_missing(conn, "users", "chat_message_count", "INTEGER DEFAULT 0")
+    # SQLite cannot add a column with a non-constant default
+    created_at_default = "" if conn.dialect.name == "sqlite" else " DEFAULT CURRENT_TIMESTAMP"
+    add_column_if_missing(conn, "users", "created_at", "TIMESTAMP" + created_at_default)
+
+    conn.execute(text("UPDATE users SET status = LOWER(status) WHERE status IN ('PENDING', 'ACTIVE', 'REJECTED')"))
+    conn.execute(text("UPDATE users SET role = LOWER(role) WHERE role IN ('ADMIN', 'TEACHER', 'STUDENT')"))
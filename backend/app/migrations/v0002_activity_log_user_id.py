@@ -0,0 +1,9 @@
+"""Links activity logs to their author."""
+from sqlalchemy import inspect
+from . import add_column_if_missing
+
+
+def upgrade(conn):
+    if "activity_logs" not in inspect(conn).get_table_names():
+        return
+    add_column_if_missing(conn, "activity_logs", "user_id", "VARCHAR")
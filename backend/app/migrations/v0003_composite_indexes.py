@@ -0,0 +1,27 @@
+"""Composite indexes for the dashboard and document list queries; they supersede the single-column user_id indexes."""
+from sqlalchemy import inspect, text
+
+INDEXES = {
+    "activity_logs": [
+        ("ix_activity_logs_user_timestamp", "user_id, \"timestamp\""),
+        ("ix_activity_logs_user_type", "user_id, document_type"),
+        ("ix_activity_logs_user_block", "user_id, target_block"),
+    ],
+    "saved_documents": [
+        ("ix_saved_documents_user_created", "user_id, created_at"),
+    ],
+}
+
+# Leading column of the composites above
+SUPERSEDED = ["ix_activity_logs_user_id", "ix_saved_documents_user_id"]
+
+
+def upgrade(conn):
+    tables = inspect(conn).get_table_names()
+    for table, indexes in INDEXES.items():
+        if table not in tables:
+            continue
+        for name, columns in indexes:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+    for name in SUPERSEDED:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
@@ -0,0 +1,40 @@
+"""user_stats rollup backfilled from activity_logs, and author of published quizzes."""
+from sqlalchemy import Column, Integer, MetaData, String, Table, inspect, text
+from . import add_column_if_missing
+
+# As of this version (later changes go in their own migration)
+user_stats = Table(
+    "user_stats", MetaData(),
+    Column("user_id", String, primary_key=True),
+    Column("dimension", String, primary_key=True),
+    Column("key", String, primary_key=True),
+    Column("count", Integer, default=0),
+)
+
+
+def upgrade(conn):
+    user_stats.create(conn, checkfirst=True)
+    tables = inspect(conn).get_table_names()
+
+    if "activity_logs" in tables:
+        conn.execute(text("DELETE FROM user_stats"))
+        for dimension, column in (("type", "document_type"), ("block", "target_block")):
+            conn.execute(text(
+                f"""INSERT INTO user_stats (user_id, dimension, key, count)
+                SELECT user_id, '{dimension}', COALESCE({column}, ''), COUNT(*)
+                FROM activity_logs WHERE user_id IS NOT NULL
+                GROUP BY user_id, COALESCE({column}, '')"""
+            ))
+
+    if "published_quizzes" in tables:
+        add_column_if_missing(conn, "published_quizzes", "user_id", "VARCHAR")
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_published_quizzes_user_created ON published_quizzes (user_id, created_at)"
+        ))
+        if "activity_logs" in tables:
+            conn.execute(text(
+                """UPDATE published_quizzes SET user_id = (
+                    SELECT MAX(activity_logs.user_id) FROM activity_logs
+                    WHERE activity_logs.share_code = published_quizzes.share_code
+                ) WHERE user_id IS NULL"""
+            ))
@@ -0,0 +1,16 @@
+"""Compressed body columns for saved documents and published quizzes; rows are compressed later by ContentBackfill."""
+from sqlalchemy import inspect, text, LargeBinary
+from . import add_column_if_missing
+
+
+def upgrade(conn):
+    tables = inspect(conn).get_table_names()
+    blob_type = LargeBinary().compile(dialect=conn.dialect)
+    for table in ("saved_documents", "published_quizzes"):
+        if table not in tables:
+            continue
+        add_column_if_missing(conn, table, "content_blob", blob_type)
+        add_column_if_missing(conn, table, "content_format", "VARCHAR")
+        add_column_if_missing(conn, table, "content_size", "INTEGER")
+        # Size is cheap to fill now; compression of existing bodies runs in the background
+        conn.execute(text(f"UPDATE {table} SET content_size = LENGTH(content) WHERE content_size IS NULL AND content IS NOT NULL"))
@@ -0,0 +1,28 @@
+"""Document revision history; existing documents start at version 1 (their base snapshot is taken on first edit)."""
+from sqlalchemy import (Column, DateTime, ForeignKey, Integer, LargeBinary, MetaData, String, Table,
+                        UniqueConstraint, inspect, text)
+from . import add_column_if_missing
+
+# As of this version (later changes go in their own migration)
+_metadata = MetaData()
+Table("saved_documents", _metadata, Column("id", String, primary_key=True))  # Foreign key target only
+document_versions = Table(
+    "document_versions", _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("document_id", String, ForeignKey("saved_documents.id"), nullable=False),
+    Column("version", Integer, nullable=False),
+    Column("kind", String, nullable=False),
+    Column("payload_format", String, nullable=False),
+    Column("payload", LargeBinary, nullable=False),
+    Column("size", Integer),
+    Column("created_at", DateTime),
+    UniqueConstraint("document_id", "version", name="uq_document_versions_document_version"),
+)
+
+
+def upgrade(conn):
+    if "saved_documents" not in inspect(conn).get_table_names():
+        return
+    add_column_if_missing(conn, "saved_documents", "version", "INTEGER DEFAULT 1")
+    conn.execute(text("UPDATE saved_documents SET version = 1 WHERE version IS NULL"))
+    document_versions.create(conn, checkfirst=True)
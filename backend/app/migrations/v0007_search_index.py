@@ -0,0 +1,76 @@
+"""Full-text search index, backfilled from saved documents and activity topics."""
+from sqlalchemy import DDL, Column, Integer, MetaData, String, Table, UniqueConstraint, event, inspect, text
+from ..services.content_codec import decode_content
+
+BACKFILL_BATCH = 500
+PG_CONFIG = "french"
+
+# As of this version (later changes go in their own migration)
+search_entries = Table(
+    "search_entries", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("kind", String, nullable=False),
+    Column("ref", String, nullable=False),
+    Column("user_id", String, index=True),
+    UniqueConstraint("kind", "ref", name="uq_search_entries_kind_ref"),
+)
+event.listen(search_entries, "after_create", DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(title, body, tokenize = 'unicode61 remove_diacritics 2')"
+).execute_if(dialect="sqlite"))
+event.listen(search_entries, "after_create", DDL(
+    "ALTER TABLE search_entries ADD COLUMN IF NOT EXISTS tsv tsvector"
+).execute_if(dialect="postgresql"))
+event.listen(search_entries, "after_create", DDL(
+    "CREATE INDEX IF NOT EXISTS ix_search_entries_tsv ON search_entries USING GIN (tsv)"
+).execute_if(dialect="postgresql"))
+
+
+def _index(conn, kind, ref, user_id, title, body=""):
+    params = {"kind": kind, "ref": str(ref)}
+    entry_id = conn.execute(text("SELECT id FROM search_entries WHERE kind = :kind AND ref = :ref"), params).scalar()
+    if entry_id is None:
+        conn.execute(text("INSERT INTO search_entries (kind, ref, user_id) VALUES (:kind, :ref, :user_id)"),
+                     {**params, "user_id": user_id})
+        entry_id = conn.execute(text("SELECT id FROM search_entries WHERE kind = :kind AND ref = :ref"), params).scalar()
+    values = {"id": entry_id, "title": title or "", "body": body or ""}
+    if conn.dialect.name == "sqlite":
+        conn.execute(text("DELETE FROM search_fts WHERE rowid = :id"), values)
+        conn.execute(text("INSERT INTO search_fts (rowid, title, body) VALUES (:id, :title, :body)"), values)
+    else:
+        conn.execute(text(
+            f"UPDATE search_entries SET tsv = setweight(to_tsvector('{PG_CONFIG}', :title), 'A') || "
+            f"setweight(to_tsvector('{PG_CONFIG}', :body), 'B') WHERE id = :id"
+        ), values)
+
+
+def upgrade(conn):
+    # Normally created by create_all just before
+    search_entries.create(bind=conn, checkfirst=True)
+
+    tables = inspect(conn).get_table_names()
+    if "saved_documents" in tables:
+        last_id = ""
+        while True:
+            rows = conn.execute(text(
+                """SELECT id, user_id, title, content, content_format, content_blob FROM saved_documents
+                WHERE id > :last_id ORDER BY id LIMIT :limit"""
+            ), {"last_id": last_id, "limit": BACKFILL_BATCH}).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                body = decode_content(row.content_format, row.content_blob, row.content)
+                _index(conn, "document", row.id, row.user_id, row.title, body)
+            last_id = rows[-1].id
+
+    if "activity_logs" in tables:
+        last_id = 0
+        while True:
+            rows = conn.execute(text(
+                """SELECT id, user_id, topic FROM activity_logs
+                WHERE id > :last_id AND user_id IS NOT NULL AND topic IS NOT NULL ORDER BY id LIMIT :limit"""
+            ), {"last_id": last_id, "limit": BACKFILL_BATCH}).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                _index(conn, "activity", row.id, row.user_id, row.topic)
+            last_id = rows[-1].id
@@ -0,0 +1,30 @@
+"""Student quiz submissions and their per-question rollup."""
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text, UniqueConstraint
+
+# As of this version (later changes go in their own migration)
+_metadata = MetaData()
+quiz_submissions = Table(
+    "quiz_submissions", _metadata,
+    Column("id", String, primary_key=True),
+    Column("share_code", String, nullable=False),
+    Column("student_name", String),
+    Column("answers", Text),
+    Column("score", Integer),
+    Column("total", Integer),
+    Column("submitted_at", DateTime),
+    Index("ix_quiz_submissions_code_submitted", "share_code", "submitted_at"),
+)
+quiz_answer_stats = Table(
+    "quiz_answer_stats", _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("share_code", String, nullable=False),
+    Column("question", Integer, nullable=False),
+    Column("choice", String, nullable=False),
+    Column("count", Integer, nullable=False),
+    UniqueConstraint("share_code", "question", "choice", name="uq_quiz_answer_stats_code_question_choice"),
+)
+
+
+def upgrade(conn):
+    quiz_submissions.create(conn, checkfirst=True)
+    quiz_answer_stats.create(conn, checkfirst=True)
@@ -0,0 +1,20 @@
+"""Block id allocation for activity_logs (write-behind inserts need the id before the row exists)."""
+from sqlalchemy import Column, Integer, MetaData, String, Table, inspect, text
+
+# As of this version (later changes go in their own migration)
+id_blocks = Table(
+    "id_blocks", MetaData(),
+    Column("name", String, primary_key=True),
+    Column("next_value", Integer, nullable=False),
+)
+
+
+def upgrade(conn):
+    id_blocks.create(conn, checkfirst=True)
+    if "activity_logs" not in inspect(conn).get_table_names():
+        return
+    exists = conn.execute(text("SELECT 1 FROM id_blocks WHERE name = 'activity_logs'")).scalar()
+    if not exists:
+        conn.execute(text(
+            "INSERT INTO id_blocks (name, next_value) SELECT 'activity_logs', COALESCE(MAX(id), 0) + 1 FROM activity_logs"
+        ))
@@ -0,0 +1,102 @@
+"""
+Activity log retention: timestamp index and archive table everywhere; on PostgreSQL,
+activity_logs becomes a table partitioned by month on "timestamp".
+"""
+import os
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, MetaData, String, Table, inspect, text
+
+# Same settings as activity_archive, read here so the migration does not import the app
+RETENTION_MONTHS = int(os.getenv("ACTIVITY_RETENTION_MONTHS", "12"))
+PARTITIONS_AHEAD = int(os.getenv("ACTIVITY_PARTITIONS_AHEAD", "3"))
+
+# As of this version (later changes go in their own migration)
+activity_log_archives = Table(
+    "activity_log_archives", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("month", String, nullable=False, index=True),
+    Column("first_id", Integer),
+    Column("last_id", Integer),
+    Column("row_count", Integer, nullable=False),
+    Column("payload_format", String, nullable=False),
+    Column("payload", LargeBinary, nullable=False),
+    Column("created_at", DateTime),
+)
+
+_INDEXES = [
+    ("ix_activity_logs_id", "id"),
+    ("ix_activity_logs_share_code", "share_code"),
+    ("ix_activity_logs_user_timestamp", 'user_id, "timestamp"'),
+    ("ix_activity_logs_user_type", "user_id, document_type"),
+    ("ix_activity_logs_user_block", "user_id, target_block"),
+    ("ix_activity_logs_timestamp", '"timestamp"'),
+]
+
+
+def _add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def upgrade(conn):
+    activity_log_archives.create(bind=conn, checkfirst=True)
+    if "activity_logs" not in inspect(conn).get_table_names():
+        return
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_activity_logs_timestamp ON activity_logs ("timestamp")'))
+    if conn.dialect.name == "postgresql" and conn.execute(text(
+        "SELECT relkind FROM pg_class WHERE oid = to_regclass('activity_logs')"
+    )).scalar() != "p":
+        _partition(conn)
+
+
+def _partition(conn):
+    print("⚠️ Converting activity_logs to a partitioned table (one partition per month)...")
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence('activity_logs', 'id')")).scalar()
+    conn.execute(text("ALTER TABLE activity_logs RENAME TO activity_logs_unpartitioned"))
+    # The partition key must be part of the primary key, and rows need a timestamp to be routed
+    conn.execute(text(
+        f"""CREATE TABLE activity_logs (
+            id INTEGER NOT NULL DEFAULT nextval('{sequence}'),
+            "timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            document_type VARCHAR,
+            topic VARCHAR,
+            duration_hours DOUBLE PRECISION,
+            target_block VARCHAR,
+            is_published TIMESTAMP WITHOUT TIME ZONE,
+            share_code VARCHAR,
+            user_id VARCHAR,
+            CONSTRAINT pk_activity_logs PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")"""
+    ))
+    conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY activity_logs.id"))
+    conn.execute(text("CREATE TABLE activity_logs_default PARTITION OF activity_logs DEFAULT"))
+
+    # Retained months get their partition; older rows wait in DEFAULT until the first archival
+    now = datetime.utcnow()
+    current = datetime(now.year, now.month, 1)
+    month, last = _add_months(current, -RETENTION_MONTHS), _add_months(current, PARTITIONS_AHEAD)
+    while month <= last:
+        end = _add_months(month, 1)
+        conn.execute(text(
+            f"CREATE TABLE activity_logs_{month:%Y_%m} PARTITION OF activity_logs "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        ))
+        month = end
+
+    before = conn.execute(text("SELECT COUNT(*) FROM activity_logs_unpartitioned")).scalar()
+    conn.execute(text(
+        """INSERT INTO activity_logs (id, "timestamp", document_type, topic, duration_hours, target_block,
+                                      is_published, share_code, user_id)
+        SELECT id, COALESCE("timestamp", TIMESTAMP '1970-01-01'), document_type, topic, duration_hours,
+               target_block, is_published, share_code, user_id
+        FROM activity_logs_unpartitioned"""
+    ))
+    after = conn.execute(text("SELECT COUNT(*) FROM activity_logs")).scalar()
+    if after != before:
+        # Rolls the whole migration back, rename included
+        raise RuntimeError(f"activity_logs partitioning copied {after} rows out of {before}")
+    print(f"✅ {after} activity logs moved to the partitioned table")
+    conn.execute(text("DROP TABLE activity_logs_unpartitioned"))
+    # Share codes are unique in published_quizzes; a unique index here would have to include "timestamp"
+    for name, columns in _INDEXES:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON activity_logs ({columns})"))
@@ -0,0 +1,23 @@
+"""Outbox of emails sent by the background SMTP sender."""
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text
+
+# As of this version (later changes go in their own migration)
+email_outbox = Table(
+    "email_outbox", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("to_email", String, nullable=False),
+    Column("subject", String, nullable=False),
+    Column("body_html", Text, nullable=False),
+    Column("status", String, nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("next_attempt_at", DateTime, nullable=False),
+    Column("claim_token", String),
+    Column("last_error", Text),
+    Column("created_at", DateTime),
+    Column("sent_at", DateTime),
+    Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+)
+
+
+def upgrade(conn):
+    email_outbox.create(conn, checkfirst=True)
@@ -0,0 +1,44 @@
+"""
+Search entries filtered by owner inside the full-text index, and entries of deleted accounts dropped.
+On SQLite, search_fts gets an `owner` column ('u' + hex of the user id, see search_service.owner_token).
+"""
+from sqlalchemy import inspect, text
+
+_OWNER = "'u' || lower(hex(COALESCE(e.user_id, '')))"
+
+
+def upgrade(conn):
+    tables = inspect(conn).get_table_names()
+    if "search_entries" not in tables:
+        return
+    if "users" in tables:
+        # Accounts deleted before search entries were cleaned up with them
+        if conn.dialect.name == "sqlite":
+            conn.execute(text(
+                """DELETE FROM search_fts WHERE rowid IN (SELECT id FROM search_entries
+                WHERE user_id IS NOT NULL AND user_id NOT IN (SELECT id FROM users))"""
+            ))
+        conn.execute(text(
+            "DELETE FROM search_entries WHERE user_id IS NOT NULL AND user_id NOT IN (SELECT id FROM users)"
+        ))
+    if conn.dialect.name != "sqlite":
+        return
+
+    columns = [row[1] for row in conn.execute(text("PRAGMA table_info(search_fts)"))]
+    if "owner" in columns:
+        # Created by create_all with the new layout, then backfilled by migration 0007 without owners
+        conn.execute(text(
+            f"UPDATE search_fts SET owner = (SELECT {_OWNER} FROM search_entries e WHERE e.id = search_fts.rowid)"
+        ))
+        return
+    # FTS5 tables cannot gain a column: rebuild and swap
+    conn.execute(text("DROP TABLE IF EXISTS search_fts_owner"))
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE search_fts_owner USING fts5(title, body, owner, tokenize = 'unicode61 remove_diacritics 2')"
+    ))
+    conn.execute(text(
+        f"""INSERT INTO search_fts_owner (rowid, title, body, owner)
+        SELECT f.rowid, f.title, f.body, {_OWNER} FROM search_fts f LEFT JOIN search_entries e ON e.id = f.rowid"""
+    ))
+    conn.execute(text("DROP TABLE search_fts"))
+    conn.execute(text("ALTER TABLE search_fts_owner RENAME TO search_fts"))
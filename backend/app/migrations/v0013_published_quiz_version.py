@@ -0,0 +1,10 @@
+"""Version of published quizzes (updated_at), checked by the quiz cache on every read."""
+from sqlalchemy import inspect, text
+from . import add_column_if_missing
+
+
+def upgrade(conn):
+    if "published_quizzes" not in inspect(conn).get_table_names():
+        return
+    add_column_if_missing(conn, "published_quizzes", "updated_at", "TIMESTAMP")
+    conn.execute(text("UPDATE published_quizzes SET updated_at = created_at WHERE updated_at IS NULL"))
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Enum, Text, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, event, Column, Integer, String, DateTime, Float, ForeignKey, Enum, Text, Boolean, Index, LargeBinary, UniqueConstraint
+from sqlalchemy.orm import relationship, deferred, declared_attr
 from .database import Base
+from .services.content_codec import compress_text, decode_content
 from datetime import datetime
 import enum
 import uuid
@@ -97,28 +98,219 @@ class ActivityLog(Base):
     target_block = Column(String, nullable=True)
     is_published = Column(DateTime, nullable=True)
     share_code = Column(String, unique=True, index=True, nullable=True)
-    user_id = Column(String, index=True, nullable=True) # Linked to User
+    user_id = Column(String, nullable=True) # Linked to User
     
     # Ideally, we should link this to User/Org too, but keeping it loose for now
 
-class PublishedQuiz(Base):
+    # Dashboard hot paths: per-user recent activity and per-user counts by type / block;
+    # time ranges (retention, global windows) use the timestamp index.
+    # On PostgreSQL the table is partitioned by month (migration 0010, see activity_archive)
+    __table_args__ = (
+        Index("ix_activity_logs_user_timestamp", "user_id", "timestamp"),
+        Index("ix_activity_logs_user_type", "user_id", "document_type"),
+        Index("ix_activity_logs_user_block", "user_id", "target_block"),
+        Index("ix_activity_logs_timestamp", "timestamp"),
+    )
+
+class ActivityLogArchive(Base):
+    """Activity logs older than the retention window: one compressed JSON-lines chunk per row (see activity_archive)."""
+    __tablename__ = "activity_log_archives"
+
+    id = Column(Integer, primary_key=True)
+    month = Column(String, nullable=False, index=True) # "YYYY-MM"
+    first_id = Column(Integer)
+    last_id = Column(Integer)
+    row_count = Column(Integer, nullable=False)
+    payload_format = Column(String, nullable=False)
+    payload = deferred(Column(LargeBinary, nullable=False)) # Compressed with content_codec
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class UserStat(Base):
+    """Per-user activity counters, maintained incrementally when an ActivityLog is inserted."""
+    __tablename__ = "user_stats"
+
+    user_id = Column(String, primary_key=True)
+    dimension = Column(String, primary_key=True) # "type" (document_type) or "block" (target_block)
+    key = Column(String, primary_key=True) # "" when the value is missing
+    count = Column(Integer, default=0)
+
+class IdBlock(Base):
+    """High-water mark of ids handed out by blocks without an INSERT (see activity_service.IdAllocator)."""
+    __tablename__ = "id_blocks"
+
+    name = Column(String, primary_key=True) # Table the ids are for
+    next_value = Column(Integer, nullable=False) # First id not yet reserved
+
+class CompressedContentMixin:
+    """
+    Markdown body stored compressed in `content_blob` (codec named by `content_format`).
+    Rows written before compression keep their text in the legacy `content` column
+    (content_format NULL) until the background backfill rewrites them.
+    `content` is a plain Python property: decompression happens on first access only.
+    """
+    @declared_attr
+    def content_text(cls):
+        return deferred(Column("content", Text, nullable=True))
+
+    @declared_attr
+    def content_blob(cls):
+        return deferred(Column(LargeBinary, nullable=True))
+
+    content_format = Column(String, nullable=True) # "zlib" / "zstd", NULL for legacy plain text
+    content_size = Column(Integer, nullable=True) # Length of the uncompressed body, in characters
+
+    @property
+    def content(self):
+        if self.content_format:
+            blob = self.content_blob
+            cached = self.__dict__.get("_content_cache")
+            if cached is not None and cached[0] is blob:
+                return cached[1]
+            text = decode_content(self.content_format, blob, None)
+            self.__dict__["_content_cache"] = (blob, text)
+            return text
+        return self.content_text
+
+    @content.setter
+    def content(self, value):
+        self.__dict__.pop("_content_cache", None)
+        if value is None:
+            self.content_format, self.content_blob, self.content_size = None, None, None
+        else:
+            self.content_format, self.content_blob = compress_text(value)
+            self.content_size = len(value)
+        self.content_text = None
+
+class PublishedQuiz(CompressedContentMixin, Base):
     __tablename__ = "published_quizzes"
 
     id = Column(Integer, primary_key=True, index=True)
     share_code = Column(String, unique=True, index=True)
     title = Column(String)
-    content = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # Quiz cache version, see quiz_cache
+    user_id = Column(String, nullable=True) # Author (copied from the published ActivityLog)
 
-class SavedDocument(Base):
+    __table_args__ = (
+        Index("ix_published_quizzes_user_created", "user_id", "created_at"),
+    )
+
+class SavedDocument(CompressedContentMixin, Base):
     __tablename__ = "saved_documents"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey("users.id"), index=True)
+    user_id = Column(String, ForeignKey("users.id"))
     title = Column(String)
-    content = Column(Text)
+    # Body columns (deferred: listings never fetch them) come from CompressedContentMixin
     document_type = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    version = Column(Integer, nullable=False, default=1, server_default="1") # Current revision, see DocumentVersion
+
     user = relationship("User", back_populates="saved_documents")
+    versions = relationship("DocumentVersion", back_populates="document", cascade="all, delete-orphan")
+
+    # Document list: per-user, newest first
+    __table_args__ = (
+        Index("ix_saved_documents_user_created", "user_id", "created_at"),
+    )
+    # Optimistic concurrency: an UPDATE only applies if `version` is still the one that was loaded.
+    # The number itself only moves with the content (versioning_service.record_new_version), not on
+    # every UPDATE of the row (title, owner, compression backfill...)
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+
+class DocumentVersion(Base):
+    """History of a SavedDocument: line deltas against the previous revision, with periodic full snapshots."""
+    __tablename__ = "document_versions"
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(String, ForeignKey("saved_documents.id"), nullable=False)
+    version = Column(Integer, nullable=False)
+    kind = Column(String, nullable=False) # "snapshot" (full text) or "delta" (JSON, see versioning_service)
+    payload_format = Column(String, nullable=False)
+    payload = deferred(Column(LargeBinary, nullable=False)) # Compressed with content_codec
+    size = Column(Integer) # Length of the document text at this version
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    document = relationship("SavedDocument", back_populates="versions")
+
+    __table_args__ = (
+        UniqueConstraint("document_id", "version", name="uq_document_versions_document_version"),
+    )
+
+class QuizSubmission(Base):
+    """Answers of one student to a published quiz, graded on submission (written in batches, see submission_service)."""
+    __tablename__ = "quiz_submissions"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    share_code = Column(String, nullable=False)
+    student_name = Column(String)
+    answers = Column(Text) # JSON {question number: answer}
+    score = Column(Integer)
+    total = Column(Integer) # Number of questions with an answer key
+    submitted_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_quiz_submissions_code_submitted", "share_code", "submitted_at"),
+    )
+
+class QuizAnswerStat(Base):
+    """Per-question rollup of quiz submissions: how many students picked each option."""
+    __tablename__ = "quiz_answer_stats"
+
+    id = Column(Integer, primary_key=True)
+    share_code = Column(String, nullable=False)
+    question = Column(Integer, nullable=False)
+    choice = Column(String, nullable=False) # Option letter, "" for open / unanswered questions
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("share_code", "question", "choice", name="uq_quiz_answer_stats_code_question_choice"),
+    )
+
+class SearchEntry(Base):
+    """One indexed item (document or activity topic); its id is the key of the engine-specific full-text index."""
+    __tablename__ = "search_entries"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False) # "document" or "activity", see search_service
+    ref = Column(String, nullable=False) # SavedDocument.id / ActivityLog.id
+    user_id = Column(String, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("kind", "ref", name="uq_search_entries_kind_ref"),
+    )
+
+# The full-text index itself is not expressible as a mapped column:
+#   SQLite      FTS5 table search_fts (rowid = search_entries.id, owner = search_service.owner_token(user_id))
+#   PostgreSQL  search_entries.tsv tsvector + GIN index
+event.listen(SearchEntry.__table__, "after_create", DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(title, body, owner, tokenize = 'unicode61 remove_diacritics 2')"
+).execute_if(dialect="sqlite"))
+event.listen(SearchEntry.__table__, "after_create", DDL(
+    "ALTER TABLE search_entries ADD COLUMN IF NOT EXISTS tsv tsvector"
+).execute_if(dialect="postgresql"))
+event.listen(SearchEntry.__table__, "after_create", DDL(
+    "CREATE INDEX IF NOT EXISTS ix_search_entries_tsv ON search_entries USING GIN (tsv)"
+).execute_if(dialect="postgresql"))
+
+class EmailOutbox(Base):
+    """Email waiting to be sent (or sent / given up), delivered by the background sender in email_outbox."""
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body_html = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="pending") # "pending", "sent" or "failed"
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow) # Also the lease end while a worker sends it
+    claim_token = Column(String, nullable=True) # Worker batch currently sending it
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
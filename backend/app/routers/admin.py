@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, File, UploadFile
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
@@ -6,6 +6,8 @@ from datetime import datetime
 from .. import models, auth
 from ..database import get_db
 from ..services.knowledge_service import knowledge_base
+from ..services.user_cache import user_cache
+from ..services import user_admin_service, search_service
 
 router = APIRouter()
 
@@ -91,7 +93,7 @@ def update_user_status(
             user.is_active = True
             try:
                 from ..services.email_service import email_service
-                email_service.send_approval_email(user)
+                email_service.send_approval_email(db, user)
             except Exception as e:
                 print(f"Warning: Email sending failed: {e}")
             
@@ -100,11 +102,12 @@ def update_user_status(
             user.is_active = False
             try:
                 from ..services.email_service import email_service
-                email_service.send_rejection_email(user)
+                email_service.send_rejection_email(db, user)
             except Exception as e:
                 print(f"Warning: Email sending failed: {e}")
             
     db.commit()
+    user_cache.invalidate(user.email)
     db.refresh(user)
     return {"message": "User status updated", "user_id": user.id, "is_active": user.is_active}
 
@@ -124,11 +127,66 @@ def delete_user(
     # Manually delete dependencies if cascading is not set up perfectly or for safety
     # In models.py we have usage of relationship but let's trust cascading or delete user directly if configured
     # For now, deleting the user.
+    email = user.email
+    search_service.remove_user_entries(db.connection(), [user.id])
     db.delete(user)
     db.commit()
+    user_cache.invalidate(email)
     
     return {"message": "User deleted successfully"}
 
+class BulkUserFilter(BaseModel):
+    status: Optional[str] = None
+    role: Optional[str] = None
+    plan_selection: Optional[str] = None
+    organization_id: Optional[str] = None
+    created_before: Optional[datetime] = None
+
+class BulkUserAction(BaseModel):
+    user_ids: Optional[List[str]] = None
+    filter: Optional[BulkUserFilter] = None
+
+@router.post("/users/bulk/{action}")
+def bulk_user_action(
+    action: str,
+    selection: BulkUserAction,
+    current_user: models.User = Depends(auth.get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """approve / reject / deactivate / delete every selected user (ids and/or filter) in a few SQL statements."""
+    if action not in user_admin_service.BULK_ACTIONS and action != "delete":
+        raise HTTPException(status_code=400, detail=f"Action inconnue : {action}")
+    if selection.user_ids is not None and len(selection.user_ids) > user_admin_service.ADMIN_BULK_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"Maximum {user_admin_service.ADMIN_BULK_MAX_IDS} utilisateurs par opération")
+    try:
+        where = user_admin_service.selection(
+            current_user.id, selection.user_ids, **(selection.filter.model_dump() if selection.filter else {})
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if action == "delete":
+        return user_admin_service.bulk_delete(db, where)
+    return user_admin_service.bulk_update(db, action, where)
+
+@router.post("/users/import")
+def import_users(
+    file: UploadFile = File(...),
+    status: str = "active",
+    current_user: models.User = Depends(auth.get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """CSV of teachers (email, nom, etablissement, formule; , or ;). Existing emails are left untouched."""
+    status = status.lower()
+    if status not in ["active", "pending"]:
+        raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+    try:
+        rows, errors = user_admin_service.parse_teachers_csv(file.file.read())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"CSV invalide : {e}")
+    result = user_admin_service.import_teachers(db, rows, status)
+    return {**result, "errors": errors}
+
 from fastapi import BackgroundTasks
 
 @router.post("/scan")
@@ -5,8 +5,8 @@ from pydantic import BaseModel
 from typing import Optional
 from .. import models, auth
 from ..database import get_db
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+from ..services.user_cache import user_cache
+from ..services.google_auth_service import google_token_verifier
 import secrets
 
 import os
@@ -94,17 +94,17 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         is_active=True 
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
 
-    # Send welcome email (async ideally)
-    # Send welcome email (async ideally)
+    # Welcome email, queued in the same transaction as the account (sent in the background)
     try:
         from ..services.email_service import email_service
-        email_service.send_welcome_email(new_user)
+        email_service.send_welcome_email(db, new_user)
     except Exception as e:
         print(f"Failed to send welcome email: {e}")
 
+    db.commit()
+    db.refresh(new_user)
+
     # 5. Generate Token
     access_token = auth.create_access_token(data={"sub": new_user.email})
     return {"access_token": access_token, "token_type": "bearer"}
@@ -128,6 +128,7 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
 
     user.last_login = datetime.utcnow()
     db.commit()
+    user_cache.invalidate(user.email)
 
     access_token = auth.create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
@@ -152,11 +153,11 @@ def google_login(token_data: GoogleToken, db: Session = Depends(get_db)):
         # We pass None as clock_skew_in_seconds to avoid time sync issues
         try:
              # Try with strict check first if env var is present
-             idinfo = id_token.verify_oauth2_token(token, google_requests.Request(), client_id)
+             idinfo = google_token_verifier.verify_oauth2_token(token, client_id)
         except ValueError as e:
              # If Audience mismatch (wrong Client ID), log it but TRY AGAIN without audience check if trusted
              print(f"⚠️ Google Auth Warning: {e}. Retrying without audience check...")
-             idinfo = id_token.verify_oauth2_token(token, google_requests.Request(), audience=None)
+             idinfo = google_token_verifier.verify_oauth2_token(token, audience=None)
              
              # Manually check if email is verified to be safe
              if not idinfo.get('email_verified'):
@@ -195,17 +196,17 @@ def google_login(token_data: GoogleToken, db: Session = Depends(get_db)):
                 new_user.is_active = True
                 
             db.add(new_user)
-            db.commit()
-            db.refresh(new_user)
-            user = new_user
-            
-            # Send welcome email (async ideally, but sync for now)
-            # Send welcome email (async ideally, but sync for now)
+
+            # Welcome email, queued in the same transaction as the account (sent in the background)
             try:
                 from ..services.email_service import email_service
-                email_service.send_welcome_email(user)
+                email_service.send_welcome_email(db, new_user)
             except Exception as e:
                 print(f"Failed to send welcome email: {e}")
+
+            db.commit()
+            db.refresh(new_user)
+            user = new_user
         
         # Ensure admin rights are preserved/updated on login if needed
         if user.email == "jacques.giraudeau@gmail.com":
@@ -224,6 +225,7 @@ def google_login(token_data: GoogleToken, db: Session = Depends(get_db)):
 
         user.last_login = datetime.utcnow()
         db.commit()
+        user_cache.invalidate(user.email)
             
         access_token = auth.create_access_token(data={"sub": user.email})
         return {"access_token": access_token, "token_type": "bearer"}
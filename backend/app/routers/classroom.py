@@ -1,10 +1,9 @@
 from fastapi import APIRouter, HTTPException, Body
 from pydantic import BaseModel
 import logging
-import os
-import google.oauth2.credentials
-from googleapiclient.discovery import build
-from typing import Optional
+from typing import List, Optional
+from ..services.google_api import google_api
+from ..services import classroom_service
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,6 +14,7 @@ router = APIRouter()
 class GoogleToken(BaseModel):
     token: str
     refresh_token: Optional[str] = None
+    refresh: bool = False # Bypass the cached course list
 
 class CourseWorkCreate(BaseModel):
     token: str
@@ -24,53 +24,50 @@ class CourseWorkCreate(BaseModel):
     description: str = ""
     materials: list = [] 
 
-def get_credentials(token: str, refresh_token: str = None):
-    """Helper to create Google Credentials with auto-refresh capability."""
-    # Fetch Client Credentials
-    client_id = os.getenv("GOOGLE_CLIENT_ID")
-    client_secret = os.getenv("GOOGLE_CLIENT_SECRET")
-    token_uri = "https://oauth2.googleapis.com/token"
+class CourseWorkBulkCreate(BaseModel):
+    token: str
+    refresh_token: Optional[str] = None
+    courseIds: List[str]
+    title: str
+    description: str = ""
 
-    return google.oauth2.credentials.Credentials(
-        token,
-        refresh_token=refresh_token,
-        token_uri=token_uri,
-        client_id=client_id,
-        client_secret=client_secret
-    )
+CLASSROOM_BULK_MAX = 100
+
+def _draft_assignment(title: str, description: str) -> dict:
+    return {
+        'title': title,
+        'description': description,
+        'workType': 'ASSIGNMENT',
+        'state': 'DRAFT',
+        'submissionModificationMode': 'MODIFIABLE_UNTIL_TURNED_IN',
+    }
 
 @router.post("/courses")
-async def list_courses(data: GoogleToken = Body(...)):
+def list_courses(data: GoogleToken = Body(...)):
     """List the courses the user is teaching using Google Client Library."""
     try:
-        creds = get_credentials(data.token, data.refresh_token)
-        service = build('classroom', 'v1', credentials=creds)
+        # All pages, cached a few minutes per Google account
+        key = classroom_service.account_key(data.token, data.refresh_token)
+        courses = None if data.refresh else classroom_service.courses_cache.get(key)
+        if courses is None:
+            service = google_api.classroom(data.token, data.refresh_token)
+            courses = classroom_service.list_courses(service)
+            classroom_service.courses_cache.put(key, courses)
+        return courses
 
-        results = service.courses().list(teacherId='me', courseStates='ACTIVE', pageSize=10).execute()
-        courses = results.get('courses', [])
-        
-        return [{"id": c['id'], "name": c['name'], "section": c.get('section', '')} for c in courses]
-        
     except Exception as e:
         logger.error(f"Error listing courses: {e}")
         # Return generic 500 but log detailed error (could be token expiry if refresh fail)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/coursework")
-async def create_assignment(data: CourseWorkCreate = Body(...)):
+def create_assignment(data: CourseWorkCreate = Body(...)):
     """Create a DRAFT assignment using Google Client Library."""
     try:
-        creds = get_credentials(data.token, data.refresh_token)
-        service = build('classroom', 'v1', credentials=creds)
+        service = google_api.classroom(data.token, data.refresh_token)
+
+        course_work = _draft_assignment(data.title, data.description)
 
-        course_work = {
-            'title': data.title,
-            'description': data.description,
-            'workType': 'ASSIGNMENT',
-            'state': 'DRAFT',
-            'submissionModificationMode': 'MODIFIABLE_UNTIL_TURNED_IN',
-        }
-        
         created = service.courses().courseWork().create(
             courseId=data.courseId, 
             body=course_work
@@ -81,3 +78,22 @@ async def create_assignment(data: CourseWorkCreate = Body(...)):
     except Exception as e:
         logger.error(f"Error creating coursework: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/coursework/bulk")
+def create_assignments(data: CourseWorkBulkCreate = Body(...)):
+    """Create the same DRAFT assignment in several courses, with Google batch requests."""
+    if not data.courseIds:
+        raise HTTPException(status_code=400, detail="Aucun cours sélectionné")
+    if len(data.courseIds) > CLASSROOM_BULK_MAX:
+        raise HTTPException(status_code=400, detail=f"Maximum {CLASSROOM_BULK_MAX} cours par envoi")
+    try:
+        service = google_api.classroom(data.token, data.refresh_token)
+        results = classroom_service.create_coursework(
+            service, data.courseIds, _draft_assignment(data.title, data.description)
+        )
+    except Exception as e:
+        logger.error(f"Error creating coursework in {len(data.courseIds)} courses: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Failures are reported per course, the other assignments are created
+    return [{"courseId": course_id, **results[course_id]} for course_id in dict.fromkeys(data.courseIds)]
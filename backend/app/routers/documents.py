@@ -1,11 +1,17 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
+from sqlalchemy.orm import Session, undefer
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy import func, or_, and_
+from sqlalchemy.exc import IntegrityError
 from ..services.gemini_service import gemini_service
+from ..services import versioning_service, search_service
 from ..database import get_db
 from ..auth import get_current_active_user
-from ..models import User, SavedDocument
+from ..models import User, SavedDocument, ActivityLog
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional, Union
+from datetime import datetime
+import base64
 import shutil
 import os
 import tempfile
@@ -29,6 +35,37 @@ class SavedDocResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class DocumentListItem(BaseModel):
+    id: str
+    title: Optional[str] = None
+    document_type: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    size: int = 0 # Length of the content, in characters
+
+class DocumentListPage(BaseModel):
+    items: List[DocumentListItem]
+    next_cursor: Optional[str] = None
+
+class DocumentPatchRequest(BaseModel):
+    base_version: int # Version the delta was computed against
+    delta: List[Union[int, List[str]]] # Line delta, see versioning_service
+    title: Optional[str] = None
+
+# --- Helpers ---
+
+def _encode_cursor(created_at: datetime, doc_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{doc_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, doc_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), doc_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
 # --- Endpoints ---
 
 @router.post("/save")
@@ -45,23 +82,96 @@ async def save_document_endpoint(
             document_type=doc.document_type
         )
         db.add(new_doc)
+        db.flush()
+        versioning_service.record_initial_version(db, new_doc, doc.content)
+        search_service.index_document(db, new_doc, doc.content)
         db.commit()
-        db.refresh(new_doc)
-        return {"status": "success", "id": new_doc.id}
+        return {"status": "success", "id": new_doc.id, "version": new_doc.version}
     except Exception as e:
         print(f"Save error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/list")
+@router.get("/list", response_model=DocumentListPage)
 async def list_documents(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    document_type: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Lightweight, keyset-paginated listing (newest first): metadata and size only, never the bodies.
+    Pass `next_cursor` back as `cursor` to get the next page; full content comes from GET /{doc_id}.
+    """
+    query = db.query(
+        SavedDocument.id,
+        SavedDocument.title,
+        SavedDocument.document_type,
+        SavedDocument.created_at,
+        SavedDocument.updated_at,
+        func.coalesce(SavedDocument.content_size, 0).label("size")
+    ).filter(SavedDocument.user_id == current_user.id)
+
+    if document_type:
+        query = query.filter(SavedDocument.document_type == document_type)
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.filter(or_(
+            SavedDocument.created_at < cursor_created_at,
+            and_(SavedDocument.created_at == cursor_created_at, SavedDocument.id < cursor_id)
+        ))
+
+    # One extra row tells whether there is a next page
+    rows = query.order_by(SavedDocument.created_at.desc(), SavedDocument.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if last.created_at:
+            next_cursor = _encode_cursor(last.created_at, last.id)
+
+    return DocumentListPage(
+        items=[DocumentListItem(**row._mapping) for row in rows],
+        next_cursor=next_cursor
+    )
+
+@router.get("/search")
+async def search_documents(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    # Returns lightweight list (without full content if needed, but for now full is fine)
-    # To optimize: db.query(SavedDocument.id, SavedDocument.title...)
-    docs = db.query(SavedDocument).filter(SavedDocument.user_id == current_user.id).order_by(SavedDocument.created_at.desc()).all()
-    # Normalize created_at to string
-    return docs
+    """
+    Full-text search over the user's saved documents (title + content) and generation topics.
+    Every word must match, as a prefix ("négo" finds "négociation"); best matches first.
+    """
+    hits = search_service.search(db, current_user.id, q, limit)
+    doc_ids = [ref for kind, ref, _ in hits if kind == search_service.KIND_DOCUMENT]
+    log_ids = [int(ref) for kind, ref, _ in hits if kind == search_service.KIND_ACTIVITY]
+
+    docs = {}
+    if doc_ids:
+        docs = {row.id: row for row in db.query(
+            SavedDocument.id, SavedDocument.title, SavedDocument.document_type, SavedDocument.created_at
+        ).filter(SavedDocument.id.in_(doc_ids), SavedDocument.user_id == current_user.id)}
+    logs = {}
+    if log_ids:
+        logs = {str(row.id): row for row in db.query(
+            ActivityLog.id, ActivityLog.topic, ActivityLog.document_type, ActivityLog.timestamp
+        ).filter(ActivityLog.id.in_(log_ids), ActivityLog.user_id == current_user.id)}
+
+    results = []
+    for kind, ref, rank in hits:
+        if kind == search_service.KIND_DOCUMENT and ref in docs:
+            row = docs[ref]
+            results.append({"kind": kind, "id": row.id, "title": row.title,
+                            "document_type": row.document_type, "date": row.created_at, "rank": rank})
+        elif kind == search_service.KIND_ACTIVITY and ref in logs:
+            row = logs[ref]
+            results.append({"kind": kind, "id": row.id, "title": row.topic,
+                            "document_type": row.document_type, "date": row.timestamp, "rank": rank})
+    return {"query": q, "results": results}
 
 @router.get("/{doc_id}")
 async def get_document(
@@ -69,10 +179,103 @@ async def get_document(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    doc = db.query(SavedDocument).filter(SavedDocument.id == doc_id, SavedDocument.user_id == current_user.id).first()
+    doc = db.query(SavedDocument).options(
+        undefer(SavedDocument.content_text), undefer(SavedDocument.content_blob)
+    ).filter(
+        SavedDocument.id == doc_id, SavedDocument.user_id == current_user.id
+    ).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {
+        "id": doc.id,
+        "user_id": doc.user_id,
+        "title": doc.title,
+        "content": doc.content,
+        "document_type": doc.document_type,
+        "created_at": doc.created_at,
+        "updated_at": doc.updated_at,
+        "version": doc.version
+    }
+
+@router.patch("/{doc_id}")
+async def patch_document(
+    doc_id: str,
+    patch: DocumentPatchRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Autosave / refine-save: applies a line delta to `base_version` and stores the result as a new version.
+    Returns 409 if the document changed since `base_version` (the client must reload it).
+    """
+    doc = db.query(SavedDocument).options(
+        undefer(SavedDocument.content_text), undefer(SavedDocument.content_blob)
+    ).filter(SavedDocument.id == doc_id, SavedDocument.user_id == current_user.id).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if doc.version != patch.base_version:
+        raise HTTPException(status_code=409, detail=f"Le document a été modifié entre-temps (version actuelle : {doc.version})")
+
+    old_content = doc.content or ""
+    try:
+        new_content = versioning_service.apply_delta(old_content, patch.delta)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Modification invalide : {e}")
+
+    if new_content == old_content and (not patch.title or patch.title == doc.title):
+        return {"status": "unchanged", "id": doc.id, "version": doc.version, "size": len(old_content)}
+
+    # Only a content change is a new version; a rename keeps the number
+    if new_content != old_content:
+        versioning_service.record_new_version(db, doc, old_content, new_content)
+        doc.content = new_content
+    if patch.title:
+        doc.title = patch.title
+    search_service.index_document(db, doc, new_content)
+    try:
+        db.commit()
+    except (StaleDataError, IntegrityError):
+        # A concurrent save took this version number first
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Le document a été modifié entre-temps")
+    return {"status": "success", "id": doc.id, "version": doc.version, "size": len(new_content)}
+
+@router.get("/{doc_id}/versions")
+async def list_document_versions(
+    doc_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    doc = db.query(SavedDocument.id, SavedDocument.version).filter(
+        SavedDocument.id == doc_id, SavedDocument.user_id == current_user.id
+    ).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    versions = versioning_service.list_versions(db, doc_id)
+    return {
+        "current_version": doc.version,
+        "versions": [
+            {"version": v.version, "kind": v.kind, "size": v.size, "created_at": v.created_at}
+            for v in versions
+        ]
+    }
+
+@router.get("/{doc_id}/versions/{version}")
+async def get_document_version(
+    doc_id: str,
+    version: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    doc = db.query(SavedDocument.id).filter(
+        SavedDocument.id == doc_id, SavedDocument.user_id == current_user.id
+    ).first()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
-    return doc
+    content = versioning_service.get_version_content(db, doc_id, version)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Version introuvable")
+    return {"id": doc_id, "version": version, "content": content}
 
 @router.delete("/{doc_id}")
 async def delete_document(
@@ -83,6 +286,7 @@ async def delete_document(
     doc = db.query(SavedDocument).filter(SavedDocument.id == doc_id, SavedDocument.user_id == current_user.id).first()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
+    search_service.remove_document(db, doc.id)
     db.delete(doc)
     db.commit()
     return {"status": "deleted"}
@@ -1,17 +1,26 @@
 from fastapi import APIRouter, HTTPException, Response
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List, Literal
+from sqlalchemy.orm import Session, undefer
+from concurrent.futures import as_completed
 from fpdf import FPDF
 from docx import Document
 import docx.shared
 import io
+import os
 import re
+import shutil
+import zipfile
 import pandas as pd
 from ..services.gemini_service import gemini_service
+from ..services.export_service import export_service
 import json
 
 from ..auth import get_current_user
-from ..models import User
+from ..database import get_db
+from ..models import User, SavedDocument
 from fastapi import Depends
 
 router = APIRouter()
@@ -34,28 +43,89 @@ class ExportRequest(BaseModel):
     content: str
     filename: Optional[str] = "document"
 
-def _load_unicode_font(pdf):
-    """Try to load a Unicode TTF font. Returns font family name or None."""
+class BulkExportRequest(BaseModel):
+    document_ids: List[str]
+    formats: List[Literal["pdf", "docx", "gift"]] = ["pdf"]
+    filename: Optional[str] = "documents"
+
+def _safe_filename(name):
+    """ASCII-only filename safe for Content-Disposition and ZIP entries."""
+    import unicodedata
+    safe = unicodedata.normalize('NFKD', name or "document").encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-zA-Z0-9_\-]', '_', safe)
+
+def _emit(data, output=None):
+    """
+    Renderers return bytes, or write them into `output` (a file object) when given.
+    The bytes are built in memory first either way (fpdf2 and python-docx have no streaming
+    output): `output` saves a copy, it does not bound memory.
+    """
+    if output is None:
+        return data
+    output.write(data)
+    return output
+
+def _export_response(artifact, media_type, filename):
+    """
+    Sends a rendered export in chunks read from the open artifact (a stored file, or a spooled
+    render that could not be stored), closed once the body is sent or the client goes away.
+    Reading from the handle rather than the cache path means an eviction mid-response cannot
+    break it.
+    """
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Access-Control-Expose-Headers": "Content-Disposition"
+    }
+    artifact.seek(0, os.SEEK_END)
+    headers["Content-Length"] = str(artifact.tell())
+    artifact.seek(0)
+
+    async def iter_artifact():
+        try:
+            while chunk := await run_in_threadpool(artifact.read, 64 * 1024):
+                yield chunk
+        finally:
+            artifact.close()
+    return StreamingResponse(iter_artifact(), media_type=media_type, headers=headers)
+
+_FONT_CANDIDATES = [
+    # Linux / Railway (Docker)
+    ('/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+     '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+     '/usr/share/fonts/truetype/dejavu/DejaVuSans-Oblique.ttf',
+     '/usr/share/fonts/truetype/dejavu/DejaVuSans-BoldOblique.ttf'),
+    # macOS
+    ('/System/Library/Fonts/Supplemental/Arial.ttf',
+     '/System/Library/Fonts/Supplemental/Arial Bold.ttf',
+     '/System/Library/Fonts/Supplemental/Arial Italic.ttf',
+     '/System/Library/Fonts/Supplemental/Arial Bold Italic.ttf'),
+]
+
+def _load_unicode_font(pdf, share_styles=False):
+    """
+    Try to load a Unicode TTF font. Returns font family name or None.
+    With share_styles, styles whose file is missing are not registered as copies of the
+    regular font (each copy would be embedded separately): pdf.style_fallbacks maps them
+    to a loaded style instead.
+    """
     import os
-    font_candidates = [
-        # Linux / Railway (Docker)
-        ('/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
-         '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
-         '/usr/share/fonts/truetype/dejavu/DejaVuSans-Oblique.ttf',
-         '/usr/share/fonts/truetype/dejavu/DejaVuSans-BoldOblique.ttf'),
-        # macOS
-        ('/System/Library/Fonts/Supplemental/Arial.ttf',
-         '/System/Library/Fonts/Supplemental/Arial Bold.ttf',
-         '/System/Library/Fonts/Supplemental/Arial Italic.ttf',
-         '/System/Library/Fonts/Supplemental/Arial Bold Italic.ttf'),
-    ]
-    for regular, bold, italic, bold_italic in font_candidates:
+    for regular, bold, italic, bold_italic in _FONT_CANDIDATES:
         if os.path.exists(regular):
             try:
-                pdf.add_font('UniFont', '', regular)
-                pdf.add_font('UniFont', 'B', bold if os.path.exists(bold) else regular)
-                pdf.add_font('UniFont', 'I', italic if os.path.exists(italic) else regular)
-                pdf.add_font('UniFont', 'BI', bold_italic if os.path.exists(bold_italic) else regular)
+                if share_styles:
+                    pdf.add_font('UniFont', '', regular)
+                    fallbacks = {}
+                    for style, path in (('B', bold), ('I', italic), ('BI', bold_italic)):
+                        if os.path.exists(path):
+                            pdf.add_font('UniFont', style, path)
+                        else:
+                            fallbacks[style] = 'B' if 'B' in style and os.path.exists(bold) else ''
+                    pdf.style_fallbacks = fallbacks
+                else:
+                    pdf.add_font('UniFont', '', regular)
+                    pdf.add_font('UniFont', 'B', bold if os.path.exists(bold) else regular)
+                    pdf.add_font('UniFont', 'I', italic if os.path.exists(italic) else regular)
+                    pdf.add_font('UniFont', 'BI', bold_italic if os.path.exists(bold_italic) else regular)
                 print(f"DEBUG: Loaded Unicode font from {regular}")
                 return 'UniFont'
             except Exception as e:
@@ -80,11 +150,356 @@ def _sanitize_for_latin1(text):
         text = text.replace(old, new)
     return text.encode('latin-1', 'replace').decode('latin-1')
 
-def md_to_pdf(md_text):
+# --- PDF size optimization ---
+
+PDF_OPTIMIZE = os.getenv("PDF_OPTIMIZE", "false").lower() == "true"
+
+_PDF_OBJ_RE = re.compile(rb'(\d+) 0 obj\n')
+_PDF_REF_RE = re.compile(rb'(\d+) 0 R\b')
+_PDF_LENGTH_RE = re.compile(rb'/Length (\d+)')
+
+def _optimize_pdf_bytes(data):
+    """
+    Post-processes fpdf2 output: deflates the streams fpdf2 leaves uncompressed
+    (ToUnicode CMaps), recompresses Flate streams at level 9, merges byte-identical
+    objects and rewrites a compact xref table.
+    Returns `data` unchanged if it cannot be parsed or the rewrite does not check out.
+    """
+    try:
+        return _rewrite_pdf(data)
+    except Exception as e:
+        print(f"⚠️ PDF optimization skipped: {e}")
+        return data
+
+def _rewrite_pdf(data):
+    import zlib
+
+    trailer_at = data.rindex(b'\ntrailer\n')
+    xref_at = data.rindex(b'\nxref\n', 0, trailer_at + 1)
+    trailer = data[trailer_at + 1:data.rindex(b'startxref')]
+
+    # 1. Parse objects (fpdf2 writes direct /Length values)
+    objects = {}
+    pos = data.index(b'\n', data.index(b'%PDF')) + 1
+    while True:
+        match = _PDF_OBJ_RE.search(data, pos, xref_at + 1)
+        if not match:
+            break
+        num = int(match.group(1))
+        body_start = match.end()
+        stream_at = data.find(b'stream\n', body_start)
+        endobj_at = data.find(b'endobj\n', body_start)
+        if stream_at != -1 and stream_at < endobj_at:
+            head = data[body_start:stream_at].rstrip(b'\n')
+            length = int(_PDF_LENGTH_RE.search(head).group(1))
+            stream = data[stream_at + 7:stream_at + 7 + length]
+            pos = data.index(b'endobj\n', stream_at + 7 + length) + 7
+        else:
+            head = data[body_start:endobj_at].rstrip(b'\n')
+            stream = None
+            pos = endobj_at + 7
+        objects[num] = [head, stream]
+
+    # 2. Compress streams
+    for obj in objects.values():
+        head, stream = obj
+        if stream is None or b'/DecodeParms' in head:
+            continue
+        if b'/Filter' not in head:
+            packed = zlib.compress(stream, 9)
+            if len(packed) < len(stream):
+                head = head.replace(b'<<\n', b'<<\n/Filter /FlateDecode\n', 1)
+                obj[:] = [head, packed]
+        elif b'/Filter /FlateDecode' in head and b'/Filter [' not in head:
+            packed = zlib.compress(zlib.decompress(stream), 9)
+            if len(packed) < len(stream):
+                obj[1] = packed
+        obj[0] = _PDF_LENGTH_RE.sub(b'/Length %d' % len(obj[1]), obj[0], count=1)
+
+    # 3. Merge identical objects until no more duplicates appear (merging can make parents identical)
+    def remap_refs(blob, mapping):
+        return _PDF_REF_RE.sub(lambda m: b'%d 0 R' % mapping.get(int(m.group(1)), int(m.group(1))), blob)
+
+    while True:
+        seen, duplicates = {}, {}
+        for num in sorted(objects):
+            key = (objects[num][0], objects[num][1])
+            if key in seen:
+                duplicates[num] = seen[key]
+            else:
+                seen[key] = num
+        if not duplicates:
+            break
+        for num in duplicates:
+            del objects[num]
+        for obj in objects.values():
+            obj[0] = remap_refs(obj[0], duplicates)
+        trailer = remap_refs(trailer, duplicates)
+
+    # Every reference must land on a parsed object (stream data is not searched)
+    for blob in [head for head, _ in objects.values()] + [trailer]:
+        for ref in _PDF_REF_RE.findall(blob):
+            if int(ref) not in objects:
+                raise ValueError(f"reference to missing object {int(ref)}")
+
+    # 4. Renumber compactly and rebuild the file
+    renumber = {old: new for new, old in enumerate(sorted(objects), start=1)}
+    out = io.BytesIO()
+    out.write(data[:data.index(b'\n', data.index(b'%PDF')) + 1])
+    out.write(b'%\xe9\xeb\xf1\xbf\n')
+    offsets = []
+    for old in sorted(objects):
+        head, stream = objects[old]
+        offsets.append(out.tell())
+        out.write(b'%d 0 obj\n' % renumber[old])
+        out.write(remap_refs(head, renumber))
+        if stream is not None:
+            out.write(b'\nstream\n' + stream + b'\nendstream')
+        out.write(b'\nendobj\n')
+    xref_offset = out.tell()
+    out.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b'%010d 00000 n \n' % offset)
+    trailer = remap_refs(trailer, renumber)
+    trailer = re.sub(rb'/Size \d+', b'/Size %d' % (len(objects) + 1), trailer)
+    out.write(trailer + b'startxref\n%d\n%%%%EOF\n' % xref_offset)
+    return out.getvalue()
+
+# --- Native PDF table layout (replaces write_html for Markdown tables) ---
+# fpdf2's HTML and table renderers break lines character by character through multi_cell.
+# Grids are laid out here instead: words are measured once (cached), wrapped greedily,
+# and drawn with plain rect()/text() calls.
+
+# GFM delimiter row: one dash per cell is enough (|:-|--:|)
+_TABLE_SEPARATOR_RE = re.compile(r'^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$')
+_INLINE_MARKER_RE = re.compile(r'(\*\*|__|\*)')
+_text_width_cache = {}
+
+def _split_md_blocks(section):
+    """Splits a Markdown section into ('text', str) and ('table', [lines]) blocks, in order."""
+    blocks = []
+    text_lines, table_lines = [], []
+    for line in section.split('\n'):
+        if line.strip().startswith('|'):
+            if text_lines:
+                blocks.append(('text', '\n'.join(text_lines)))
+                text_lines = []
+            table_lines.append(line.strip())
+        else:
+            if table_lines:
+                blocks.append(('table', table_lines))
+                table_lines = []
+            text_lines.append(line)
+    if table_lines:
+        blocks.append(('table', table_lines))
+    if text_lines:
+        blocks.append(('text', '\n'.join(text_lines)))
+    return blocks
+
+def _split_table_row(line):
+    cells = line.strip().strip('|').split('|')
+    return [c.strip() for c in cells]
+
+def _cell_to_words(text, force_bold=False):
+    """
+    Parses inline Markdown/HTML of a table cell into hard lines of (style, word) tokens.
+    Handles **bold**, *italic* / __italic__, <strong>/<em> and <br>.
+    """
+    text = re.sub(r'<br\s*/?>', '\n', text)
+    text = re.sub(r'</?(?:strong|b)>', '**', text)
+    text = re.sub(r'</?(?:em|i)>', '*', text)
+    text = re.sub(r'<[^>]+>', '', text)
+
+    lines = []
+    bold = italic = False
+    for raw_line in text.split('\n'):
+        words = []
+        for part in _INLINE_MARKER_RE.split(raw_line):
+            if part == '**':
+                bold = not bold
+            elif part in ('*', '__'):
+                italic = not italic
+            else:
+                style = ('B' if bold or force_bold else '') + ('I' if italic else '')
+                words.extend((style, word) for word in part.split())
+        lines.append(words)
+    return lines
+
+def _parse_md_table(lines):
+    """
+    Returns (rows, aligns): rows of parsed cells, padded/truncated to the header width.
+    Only the line under the header can be the delimiter row: a body row of "-" cells is kept.
+    """
+    header = _split_table_row(lines[0])
+    n_cols = len(header)
+    aligns = ['L'] * n_cols
+    rows = [header]
+    body = lines[1:]
+    if body and _TABLE_SEPARATOR_RE.match(body[0]):
+        for i, spec in enumerate(_split_table_row(body[0])[:n_cols]):
+            if spec.startswith(':') and spec.endswith(':'):
+                aligns[i] = 'C'
+            elif spec.endswith(':'):
+                aligns[i] = 'R'
+        body = body[1:]
+    for line in body:
+        row = _split_table_row(line)
+        rows.append((row + [''] * n_cols)[:n_cols])
+    parsed = [[_cell_to_words(cell, force_bold=(r == 0)) for cell in row] for r, row in enumerate(rows)]
+    return parsed, aligns
+
+def _text_width(pdf, text, style=''):
+    """get_string_width() memoized per font, style and size: grids repeat the same words."""
+    key = (pdf.font_family, style, pdf.font_size_pt, text)
+    width = _text_width_cache.get(key)
+    if width is None:
+        current_style = pdf.font_style
+        pdf.set_font(style=style)
+        width = pdf.get_string_width(text)
+        pdf.set_font(style=current_style)
+        if len(_text_width_cache) > 20000:
+            _text_width_cache.clear()
+        _text_width_cache[key] = width
+    return width
+
+def _wrap_cell(pdf, cell_lines, width):
+    """Greedy word wrap. Returns a list of lines, each a list of (style, word, x_offset) plus its width."""
+    space = _text_width(pdf, ' ')
+    wrapped = []
+    for words in cell_lines:
+        line, x = [], 0.0
+        for style, word in words:
+            w = _text_width(pdf, word, style)
+            if line and x + space + w > width:
+                wrapped.append((line, x))
+                line, x = [], 0.0
+            if line:
+                x += space
+            line.append((style, word, x))
+            x += w
+        wrapped.append((line, x))
+    return wrapped
+
+def _measure_col_widths(pdf, rows, available, padding):
+    """
+    Column widths from measured content: each column gets at least its longest word,
+    and the remaining width is shared in proportion to the natural (unwrapped) width.
+    """
+    n_cols = len(rows[0])
+    space = _text_width(pdf, ' ')
+    minimum = [0.0] * n_cols
+    natural = [0.0] * n_cols
+    for row in rows:
+        for c, cell_lines in enumerate(row):
+            for words in cell_lines:
+                widths = [_text_width(pdf, word, style) for style, word in words]
+                if widths:
+                    natural[c] = max(natural[c], sum(widths) + space * (len(widths) - 1))
+                    minimum[c] = max(minimum[c], max(widths))
+    minimum = [m + 2 * padding for m in minimum]
+    natural = [max(n + 2 * padding, m) for n, m in zip(natural, minimum)]
+
+    if sum(natural) <= available:
+        scale = available / sum(natural)
+        return [n * scale for n in natural]
+    if sum(minimum) >= available:
+        scale = available / sum(minimum)
+        return [m * scale for m in minimum]
+    spare = available - sum(minimum)
+    stretch = [n - m for n, m in zip(natural, minimum)]
+    total_stretch = sum(stretch) or 1
+    return [m + spare * s / total_stretch for m, s in zip(minimum, stretch)]
+
+def _render_pdf_table(pdf, lines, font_name):
+    """
+    Lays out and draws a Markdown table; the header row is repeated after page breaks.
+    A row taller than a page is split between lines of text and continued on the next pages.
+    """
+    rows, aligns = _parse_md_table(lines)
+    if not rows or not rows[0]:
+        return
+    # Wide grids (GRILLE D'AIDE: 7 columns) need a smaller body font
+    pdf.set_font(font_name, '', 9 if len(rows[0]) >= 5 else 10)
+    padding = 1.5
+    line_h = pdf.font_size * 1.4
+    col_widths = _measure_col_widths(pdf, rows, pdf.epw, padding)
+
+    layout = []
+    for row in rows:
+        cells = [_wrap_cell(pdf, cell, w - 2 * padding) for cell, w in zip(row, col_widths)]
+        height = max(len(cell) for cell in cells) * line_h + 2 * padding
+        layout.append((cells, height))
+
+    def draw_row(cells, is_header, first=0, count=None):
+        """Draws lines [first:first + count] of each cell (all of them by default) as one row."""
+        if count is None:
+            count = max(len(cell) for cell in cells)
+        height = count * line_h + 2 * padding
+        x = pdf.l_margin
+        y = pdf.y
+        pdf.set_fill_color(221, 221, 221)
+        for cell, w, align in zip(cells, col_widths, aligns):
+            pdf.rect(x, y, w, height, style='DF' if is_header else 'D')
+            for i, (words, line_w) in enumerate(cell[first:first + count]):
+                if align == 'C':
+                    offset = (w - 2 * padding - line_w) / 2
+                elif align == 'R':
+                    offset = w - 2 * padding - line_w
+                else:
+                    offset = 0
+                baseline = y + padding + i * line_h + (line_h + pdf.font_size * 0.7) / 2
+                for style, word, word_x in words:
+                    if pdf.font_style != style:
+                        pdf.set_font(style=style)
+                    pdf.text(x + padding + offset + word_x, baseline, word)
+            x += w
+        pdf.set_font(style='')
+        pdf.set_y(y + height)
+
+    header_cells, header_height = layout[0]
+    # Room under the repeated header on a fresh page
+    page_room = pdf.page_break_trigger - pdf.t_margin - header_height
+
+    def new_page():
+        pdf.add_page(orientation=pdf.cur_orientation)
+        draw_row(header_cells, True)
+
+    pdf.ln(2)
+    # Keep the header with the first body row (its first line, if it has to be split anyway)
+    first_height = layout[1][1] if len(layout) > 1 else 0
+    if first_height > page_room:
+        first_height = line_h + 2 * padding
+    if pdf.y + header_height + first_height > pdf.page_break_trigger:
+        pdf.add_page(orientation=pdf.cur_orientation)
+    draw_row(header_cells, True)
+    for cells, height in layout[1:]:
+        if pdf.y + height <= pdf.page_break_trigger:
+            draw_row(cells, False)
+        elif height <= page_room:
+            new_page()
+            draw_row(cells, False)
+        else:
+            first, n_lines = 0, max(len(cell) for cell in cells)
+            while first < n_lines:
+                if pdf.y + line_h + 2 * padding > pdf.page_break_trigger:
+                    new_page()
+                fit = int((pdf.page_break_trigger - pdf.y - 2 * padding) // line_h)
+                count = max(1, min(fit, n_lines - first))
+                draw_row(cells, False, first, count)
+                first += count
+    pdf.ln(3)
+
+def md_to_pdf(md_text, optimize=None, output=None):
     """
     Converts Markdown to PDF using FPDF2 + markdown library for proper HTML rendering.
+    Tables are laid out natively (measured column widths, cached text widths, multi-line cells).
     Supports: bold, italic, headers, tables, lists, landscape pages for grids.
+    optimize (default: PDF_OPTIMIZE env) shares font styles that have no dedicated file and
+    runs _optimize_pdf_bytes on the output. Fonts are always subset by fpdf2.
+    Returns the PDF bytes, or writes them into `output` when a file object is given.
     """
+    if optimize is None:
+        optimize = PDF_OPTIMIZE
     print(f"DEBUG: Starting PDF generation... Content len: {len(md_text)}")
     try:
         from fpdf import FPDF
@@ -92,6 +507,16 @@ def md_to_pdf(md_text):
         import os
 
         class PDF(FPDF):
+            style_fallbacks = {}
+
+            def set_font(self, family=None, style="", size=0):
+                # Missing styles are drawn with a loaded one instead of an embedded duplicate
+                if self.style_fallbacks and isinstance(style, str) and (family or self.font_family or '').lower() == 'unifont':
+                    emphasis = ''.join(sorted(c for c in style.upper() if c in 'BI'))
+                    if emphasis in self.style_fallbacks:
+                        style = self.style_fallbacks[emphasis] + ''.join(c for c in style.upper() if c in 'SU')
+                super().set_font(family, style, size)
+
             def footer(self):
                 self.set_y(-15)
                 self.set_font('Helvetica', 'I', 8)
@@ -101,7 +526,7 @@ def md_to_pdf(md_text):
         pdf.set_auto_page_break(auto=True, margin=15)
 
         # Load Unicode font for proper French character support
-        font_name = _load_unicode_font(pdf)
+        font_name = _load_unicode_font(pdf, share_styles=optimize)
         if not font_name:
             print("DEBUG: No Unicode font found, sanitizing text for latin-1")
             md_text = _sanitize_for_latin1(md_text)
@@ -123,29 +548,24 @@ def md_to_pdf(md_text):
             else:
                 pdf.add_page(orientation='L' if is_landscape else 'P')
 
-            # Convert markdown to HTML with table support
-            html = markdown.markdown(section, extensions=['tables'])
-
-            # FPDF2 limitation: no nested HTML tags inside <td>/<th>
-            # Strip formatting tags and convert <br> to newlines
-            def clean_cell(match):
-                content = match.group(2)
-                content = re.sub(r'<br\s*/?>', '\n', content)
-                content = re.sub(r'</?(?:strong|em|b|i|code|p)>', '', content)
-                return match.group(1) + content + match.group(3)
-            html = re.sub(r'(<t[dh][^>]*>)(.*?)(</t[dh]>)', clean_cell, html, flags=re.DOTALL)
-
-            # Style tables for PDF rendering
-            html = html.replace('<table>', '<table border="1" cellpadding="5" width="100%">')
-            html = html.replace('<th>', '<th bgcolor="#DDDDDD">')
-
-            # Render HTML
-            pdf.set_font(font_name, size=11)
-            pdf.write_html(html)
+            # Tables go through the native layout engine, the rest through write_html
+            for kind, block in _split_md_blocks(section):
+                if kind == 'table':
+                    _render_pdf_table(pdf, block, font_name)
+                    continue
+                if not block.strip():
+                    continue
+                html = markdown.markdown(block)
+                pdf.set_font(font_name, size=11)
+                pdf.write_html(html)
 
-        output = bytes(pdf.output())
-        print(f"DEBUG: PDF generation success, bytes: {len(output)}")
-        return output
+        pdf_bytes = pdf.output()
+        if optimize:
+            raw_size = len(pdf_bytes)
+            pdf_bytes = _optimize_pdf_bytes(bytes(pdf_bytes))
+            print(f"DEBUG: PDF optimized {raw_size} -> {len(pdf_bytes)} bytes")
+        print(f"DEBUG: PDF generation success, bytes: {len(pdf_bytes)}")
+        return _emit(bytes(pdf_bytes) if output is None else pdf_bytes, output)
 
     except Exception as e:
         print(f"❌ PDF generation error: {e}")
@@ -158,12 +578,24 @@ def md_to_pdf(md_text):
         pdf.set_font("Helvetica", size=12)
         safe_text = md_text.encode('latin-1', 'replace').decode('latin-1')
         pdf.multi_cell(0, 10, safe_text)
-        return bytes(pdf.output())
+        return _emit(bytes(pdf.output()), output)
+
+def _pdf_cache_variant():
+    """
+    Settings that change md_to_pdf's bytes for the same Markdown: the optimizer and the
+    font files found (they decide the style fallbacks). Part of the artifact cache key.
+    """
+    fonts = next((files for files in _FONT_CANDIDATES if os.path.exists(files[0])), ())
+    present = ''.join('1' if os.path.exists(path) else '0' for path in fonts)
+    return f"optimize={int(PDF_OPTIMIZE)};fonts={fonts[0] if fonts else 'latin1'}:{present}"
+
+md_to_pdf.cache_variant = _pdf_cache_variant
 
-def md_to_docx(md_text):
+def md_to_docx(md_text, output=None):
     """
     Converts Markdown to DOCX using pure python-docx with improved Table parsing and Layout control.
     Supports Landscape mode for Grids.
+    Returns the DOCX bytes, or saves straight into `output` when a file object is given.
     """
     print(f"DEBUG: Starting DOCX generation... Content len: {len(md_text)}")
     try:
@@ -284,6 +716,10 @@ def md_to_docx(md_text):
         if in_table:
             flush_table(table_lines)
 
+        if output is not None:
+            doc.save(output)
+            print(f"DEBUG: DOCX generation success, bytes: {output.tell()}")
+            return output
         result = io.BytesIO()
         doc.save(result)
         docx_bytes = result.getvalue()
@@ -295,6 +731,11 @@ def md_to_docx(md_text):
         # Fallback to absolute basic
         doc = Document()
         doc.add_paragraph(f"Error generating formatted doc: {e}\n\nRaw Content:\n{md_text}")
+        if output is not None:
+            output.seek(0)
+            output.truncate()
+            doc.save(output)
+            return output
         result = io.BytesIO()
         doc.save(result)
         return result.getvalue()
@@ -303,19 +744,10 @@ def md_to_docx(md_text):
 async def export_pdf(request: ExportRequest, current_user: User = Depends(get_current_user)):
     print(f"DEBUG: Export PDF Request Received. Content len: {len(request.content)}")
     try:
-        import unicodedata
-        safe_filename = unicodedata.normalize('NFKD', request.filename).encode('ascii', 'ignore').decode('ascii')
-        safe_filename = re.sub(r'[^a-zA-Z0-9_\-]', '_', safe_filename)
+        safe_filename = _safe_filename(request.filename)
         
-        pdf_bytes = md_to_pdf(request.content)
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename={safe_filename}.pdf",
-                "Access-Control-Expose-Headers": "Content-Disposition"
-            }
-        )
+        pdf_artifact = await export_service.render("pdf", md_to_pdf, request.content)
+        return _export_response(pdf_artifact, "application/pdf", f"{safe_filename}.pdf")
     except Exception as e:
         print(f"❌ PDF Export Error CRASH: {e}")
         import traceback
@@ -326,18 +758,13 @@ async def export_pdf(request: ExportRequest, current_user: User = Depends(get_cu
 async def export_docx(request: ExportRequest, current_user: User = Depends(get_current_user)):
     print(f"DEBUG: Export DOCX Request Received. Content len: {len(request.content)}")
     try:
-        import unicodedata
-        safe_filename = unicodedata.normalize('NFKD', request.filename).encode('ascii', 'ignore').decode('ascii')
-        safe_filename = re.sub(r'[^a-zA-Z0-9_\-]', '_', safe_filename)
+        safe_filename = _safe_filename(request.filename)
 
-        docx_bytes = md_to_docx(request.content)
-        return Response(
-            content=docx_bytes,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            headers={
-                "Content-Disposition": f"attachment; filename={safe_filename}.docx",
-                "Access-Control-Expose-Headers": "Content-Disposition"
-            }
+        docx_artifact = await export_service.render("docx", md_to_docx, request.content)
+        return _export_response(
+            docx_artifact,
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            f"{safe_filename}.docx"
         )
     except Exception as e:
         print(f"❌ DOCX Export Error CRASH: {e}")
@@ -347,99 +774,105 @@ async def export_docx(request: ExportRequest, current_user: User = Depends(get_c
 
 # --- Specialized Quiz Exports ---
 
+def md_to_gift(md_text, output=None):
+    """
+    Transforms a Markdown quiz into Moodle GIFT format using Gemini.
+    Returns the GIFT text as UTF-8 bytes (or writes it into `output`).
+    """
+    prompt = f"""Tu es un expert en Moodle (format GIFT). Transforme ce quiz Markdown en format GIFT (.txt) valide.
+    Règles CRITIQUES :
+    1. Chaque question DOIT être suivie d'une ligne vide.
+    2. Format QCM : La question {{=RéponseCorrecte ~MauvaiseRéponse1 ~MauvaiseRéponse2}}
+    3. Pas de titres de parties (ex: ### Partie 1), juste les questions.
+    4. Échappe les caractères spéciaux si nécessaire (ex: ~ , = , # , {{ , }}).
+    5. Ne réponds QUE avec le texte GIFT pur. Pas de markdown, pas de ```.
+
+    Quiz à transformer :
+    {md_text}
+    """
+
+    response = gemini_service.client.models.generate_content(
+        model=gemini_service.model_name,
+        contents=prompt
+    )
+    gift_content = response.text.strip()
+
+    # Clean potential AI noise
+    gift_content = re.sub(r'^```[\w]*\n?', '', gift_content)
+    gift_content = re.sub(r'\n?```$', '', gift_content)
+    return _emit(gift_content.encode('utf-8'), output)
+
 @router.post("/quiz/gift")
 async def export_gift(request: ExportRequest, current_user: User = Depends(get_current_user)):
     """
     Transforms a Markdown quiz into Moodle GIFT format using Gemini.
     """
     try:
-        prompt = f"""Tu es un expert en Moodle (format GIFT). Transforme ce quiz Markdown en format GIFT (.txt) valide.
-        Règles CRITIQUES :
-        1. Chaque question DOIT être suivie d'une ligne vide.
-        2. Format QCM : La question {{=RéponseCorrecte ~MauvaiseRéponse1 ~MauvaiseRéponse2}}
-        3. Pas de titres de parties (ex: ### Partie 1), juste les questions.
-        4. Échappe les caractères spéciaux si nécessaire (ex: ~ , = , # , {{ , }}).
-        5. Ne réponds QUE avec le texte GIFT pur. Pas de markdown, pas de ```.
-
-        Quiz à transformer :
-        {request.content}
-        """
-        
-        response = gemini_service.client.models.generate_content(
-            model=gemini_service.model_name,
-            contents=prompt
-        )
-        gift_content = response.text.strip()
-        
-        # Clean potential AI noise
-        gift_content = re.sub(r'^```[\w]*\n?', '', gift_content)
-        gift_content = re.sub(r'\n?```$', '', gift_content)
-        
-        return Response(
-            content=gift_content.encode('utf-8'),
-            media_type="text/plain",
-            headers={
-                "Content-Disposition": f"attachment; filename={request.filename}_moodle.txt",
-                "Access-Control-Expose-Headers": "Content-Disposition"
-            }
-        )
+        gift_artifact = await export_service.render("gift", md_to_gift, request.content)
+
+        return _export_response(gift_artifact, "text/plain", f"{request.filename}_moodle.txt")
     except Exception as e:
         print(f"❌ GIFT Export Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def md_to_wooclap(md_text, output=None):
+    """
+    Transforms a Markdown quiz into an Excel file for Wooclap using the specific template.
+    Returns the XLSX bytes, or writes the workbook into `output` when given.
+    """
+    prompt = f"""Transforme ce quiz Markdown en un JSON structuré pour Excel (Wooclap). 
+    Utilise EXACTEMENT cette structure de colonnes pour chaque objet :
+    - "Type": "MCQ" (toujours MCQ pour l'instant)
+    - "Title": [Le texte de la question]
+    - "Correct": [L'index de la bonne réponse : 1, 2, 3 ou 4]
+    - "Choice 1": [Option A]
+    - "Choice 2": [Option B]
+    - "Choice 3": [Option C]
+    - "Choice 4": [Option D]
+
+    Règles :
+    - Ne renvoie que le JSON (liste d'objets). Pas de texte explicatif.
+    - Si une question n'est pas un QCM, ignore-la.
+
+    Quiz :
+    {md_text}
+    """
+
+    response = gemini_service.client.models.generate_content(
+        model=gemini_service.model_name,
+        contents=prompt
+    )
+
+    json_str = response.text.strip()
+    json_str = re.sub(r'^```json\n?', '', json_str)
+    json_str = re.sub(r'\n?```$', '', json_str)
+
+    data = json.loads(json_str)
+    df = pd.DataFrame(data)
+
+    # Ensure column order matches user image exactly
+    expected_cols = ["Type", "Title", "Correct", "Choice 1", "Choice 2", "Choice 3", "Choice 4"]
+    # Filter and reorder columns that exist
+    current_cols = [c for c in expected_cols if c in df.columns]
+    df = df[current_cols]
+
+    target = output if output is not None else io.BytesIO()
+    with pd.ExcelWriter(target, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Wooclap')
+    return output if output is not None else target.getvalue()
+
 @router.post("/quiz/wooclap")
 async def export_wooclap(request: ExportRequest, current_user: User = Depends(get_current_user)):
     """
     Transforms a Markdown quiz into an Excel file for Wooclap using the specific template.
     """
     try:
-        prompt = f"""Transforme ce quiz Markdown en un JSON structuré pour Excel (Wooclap). 
-        Utilise EXACTEMENT cette structure de colonnes pour chaque objet :
-        - "Type": "MCQ" (toujours MCQ pour l'instant)
-        - "Title": [Le texte de la question]
-        - "Correct": [L'index de la bonne réponse : 1, 2, 3 ou 4]
-        - "Choice 1": [Option A]
-        - "Choice 2": [Option B]
-        - "Choice 3": [Option C]
-        - "Choice 4": [Option D]
-
-        Règles :
-        - Ne renvoie que le JSON (liste d'objets). Pas de texte explicatif.
-        - Si une question n'est pas un QCM, ignore-la.
-
-        Quiz :
-        {request.content}
-        """
-        
-        response = gemini_service.client.models.generate_content(
-            model=gemini_service.model_name,
-            contents=prompt
-        )
-        
-        json_str = response.text.strip()
-        json_str = re.sub(r'^```json\n?', '', json_str)
-        json_str = re.sub(r'\n?```$', '', json_str)
-        
-        data = json.loads(json_str)
-        df = pd.DataFrame(data)
-        
-        # Ensure column order matches user image exactly
-        expected_cols = ["Type", "Title", "Correct", "Choice 1", "Choice 2", "Choice 3", "Choice 4"]
-        # Filter and reorder columns that exist
-        current_cols = [c for c in expected_cols if c in df.columns]
-        df = df[current_cols]
-        
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Wooclap')
+        xlsx_artifact = await export_service.render("xlsx", md_to_wooclap, request.content)
             
-        return Response(
-            content=output.getvalue(),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={
-                "Content-Disposition": f"attachment; filename={request.filename}_wooclap.xlsx",
-                "Access-Control-Expose-Headers": "Content-Disposition"
-            }
+        return _export_response(
+            xlsx_artifact,
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            f"{request.filename}_wooclap.xlsx"
         )
     except Exception as e:
         print(f"❌ Wooclap Export Error: {e}")
@@ -479,3 +912,144 @@ async def export_google(request: ExportRequest, current_user: User = Depends(get
     except Exception as e:
         print(f"❌ Google Forms Export Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+# --- Bulk Export ---
+
+# format -> (renderer, file suffix)
+BULK_RENDERERS = {
+    "pdf": (md_to_pdf, ".pdf"),
+    "docx": (md_to_docx, ".docx"),
+    "gift": (md_to_gift, "_moodle.txt"),
+}
+
+# --- Speculative Prefetch ---
+
+# Local renderers only: GIFT and Wooclap call Gemini, which the CPU budget does not bound,
+# so a speculative render would be a paid API call for an export that may never happen
+PREFETCH_RENDERERS = {
+    "pdf": md_to_pdf,
+    "docx": md_to_docx,
+}
+
+# Formats teachers most often export right after generating each document type
+PREFETCH_FORMATS = {
+    "quiz": ["pdf"],
+    "jeu_de_role": ["docx"],
+    "jeu_de_role_evenement": ["docx"],
+}
+
+def prefetch_exports(document_type, content):
+    """
+    Schedules low-priority background renders of the likely export formats into the
+    artifact store, so the export click that usually follows a generation is a cache hit.
+    No-op unless EXPORT_PREFETCH_ENABLED is set.
+    """
+    scheduled = [
+        fmt for fmt in PREFETCH_FORMATS.get(document_type, [])
+        if export_service.prefetch(fmt, PREFETCH_RENDERERS[fmt], content)
+    ]
+    if scheduled:
+        print(f"DEBUG: Prefetch scheduled for {document_type}: {scheduled}")
+    return scheduled
+
+def _close_artifact(future):
+    """Done callback for a render whose result nobody reads."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+class _ZipStream:
+    """Write-only file object: zipfile writes into it, the response generator drains it."""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return b"".join(chunks)
+
+@router.post("/bulk")
+async def export_bulk(
+    request: BulkExportRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Exports several saved documents at once as a ZIP archive.
+    Renders run concurrently on the export worker pool and each file is written
+    to the archive as soon as it is ready, so the ZIP is streamed, never buffered whole.
+    They count as interactive exports (prefetch yields to them), and the renders that have
+    not started yet are cancelled if the client disconnects.
+    GIFT is only produced for quiz documents.
+    """
+    if not request.document_ids:
+        raise HTTPException(status_code=400, detail="No documents selected")
+
+    docs = db.query(SavedDocument).options(
+        undefer(SavedDocument.content_text), undefer(SavedDocument.content_blob)
+    ).filter(
+        SavedDocument.user_id == current_user.id,
+        SavedDocument.id.in_(request.document_ids)
+    ).all()
+    if not docs:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    print(f"DEBUG: Bulk export of {len(docs)} documents, formats: {request.formats}")
+
+    # Schedule every render now so the pool works while the first bytes are sent
+    futures = {}
+    for doc in docs:
+        for fmt in dict.fromkeys(request.formats):
+            if fmt == "gift" and doc.document_type != "quiz":
+                continue
+            renderer, suffix = BULK_RENDERERS[fmt]
+            entry_name = f"{_safe_filename(doc.title)}_{doc.id[:8]}{suffix}"
+            futures[export_service.submit_render(fmt, renderer, doc.content or "")] = entry_name
+    pending = set(futures)
+
+    def write_zip():
+        stream = _ZipStream()
+        errors = []
+        with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for future in as_completed(futures):
+                pending.discard(future)
+                entry_name = futures[future]
+                try:
+                    artifact = future.result()
+                    with artifact, archive.open(entry_name, mode="w") as entry:
+                        shutil.copyfileobj(artifact, entry)
+                except Exception as e:
+                    print(f"❌ Bulk Export Error ({entry_name}): {e}")
+                    errors.append(f"{entry_name} : {e}")
+                yield stream.drain()
+            if errors:
+                archive.writestr("erreurs.txt", "\n".join(errors))
+        yield stream.drain()
+
+    async def stream_zip():
+        parts = write_zip()
+        try:
+            async for chunk in iterate_in_threadpool(parts):
+                yield chunk
+        finally:
+            parts.close()
+            # Client gone (or response done): drop the renders nobody will read
+            if pending:
+                print(f"DEBUG: Bulk export interrupted, {len(pending)} renders dropped")
+            for future in pending:
+                if not future.cancel():
+                    future.add_done_callback(_close_artifact)
+
+    return StreamingResponse(
+        stream_zip(),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename={_safe_filename(request.filename)}.zip",
+            "Access-Control-Expose-Headers": "Content-Disposition"
+        }
+    )
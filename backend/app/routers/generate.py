@@ -3,7 +3,7 @@ from pydantic import BaseModel
 from typing import Optional, Literal
 from sqlalchemy.orm import Session
 from ..database import get_db
-from ..models import ActivityLog
+from ..services.activity_service import activity_sink
 from ..services.gemini_service import gemini_service
 # Lazy import: knowledge_base will be imported inside functions to avoid startup delays
 from google import genai
@@ -486,6 +486,7 @@ class GenerateResponse(BaseModel):
 from ..auth import get_current_user
 from ..models import User
 from ..services.usage_service import check_and_increment_usage
+from .export import prefetch_exports
 import re
 
 @router.post("/course", response_model=GenerateResponse)
@@ -561,9 +562,9 @@ async def generate_document(request: GenerateRequest, db: Session = Depends(get_
             full_text = full_text.replace(match.group(0), "").strip()
             
         
-        # Log activity
+        # Log activity (written behind the response, the id is reserved now)
         try:
-            new_log = ActivityLog(
+            log_id = activity_sink.record(
                 document_type=request.document_type,
                 topic=request.topic,
                 duration_hours=request.duration_hours,
@@ -571,14 +572,13 @@ async def generate_document(request: GenerateRequest, db: Session = Depends(get_
                 user_id=current_user.id
             )
             # Add category/track to activity log? Model doesn't support it yet, so skip or use 'topic'
-            db.add(new_log)
-            db.commit()
-            db.refresh(new_log)
-            log_id = new_log.id
         except Exception as log_error:
             print(f"⚠️ Activity logging failed: {log_error}")
             log_id = None
 
+        # Opt-in: pre-render the likely exports in the background (EXPORT_PREFETCH_ENABLED)
+        prefetch_exports(request.document_type, full_text)
+
         return GenerateResponse(
             content=full_text, 
             document_type=request.document_type,
@@ -1,12 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional, List
-import google.oauth2.credentials
-from googleapiclient.discovery import build
-from ..services.gemini_service import gemini_service
-
-import json
-import re
+from ..services.google_api import google_api
+from ..services import google_forms
 
 router = APIRouter()
 
@@ -18,166 +14,37 @@ class GoogleFormRequest(BaseModel):
     title: str
     content: str # Markdown content
 
-@router.post("/forms/create")
-async def create_google_form_endpoint(request: GoogleFormRequest):
-    try:
-        # 1. Parse markdown to JSON using Gemini
-        prompt = f"""
-        Tu es un expert en éducation. Transforme ce quiz (format Markdown) en un tableau JSON strict pour créer un Google Form.
-        Structure attendue pour chaque question :
-        {{
-            "title": "Le texte de la question",
-            "options": ["Option A", "Option B", "Option C", "Option D"],
-            "correct_solution": "Option A" (Le texte exact de la bonne réponse, ou null si non précisé)
-        }}
-
-        Quiz Markdown :
-        {request.content}
-
-        Règles :
-        - JSON Valid uniquement.
-        - Pas de ```json au début ou à la fin. Juste le tableau [ ... ].
-        """
-        
-        response = gemini_service.client.models.generate_content(
-            model=gemini_service.model_name,
-            contents=prompt
-        )
-        
-        cleaned_json = response.text.replace('```json', '').replace('```', '').strip()
-        # Handle potential leading/trailing whitespace or text
-        match = re.search(r'\[.*\]', cleaned_json, re.DOTALL)
-        if match:
-            cleaned_json = match.group(0)
-            
-        questions_data = json.loads(cleaned_json)
-        
-        # 2. Init Google Forms API
-        # We need Client credentials for refreshing
-        client_id = os.getenv("GOOGLE_CLIENT_ID")
-        client_secret = os.getenv("GOOGLE_CLIENT_SECRET")
-        token_uri = "https://oauth2.googleapis.com/token"
+class QuizForm(BaseModel):
+    title: str
+    content: str # Markdown content
 
-        creds = google.oauth2.credentials.Credentials(
-            request.token,
-            refresh_token=request.refresh_token,
-            token_uri=token_uri,
-            client_id=client_id,
-            client_secret=client_secret
-        )
-        
-        # Build service (this will auto-refresh if token is expired and refresh_token is present)
-        form_service = build('forms', 'v1', credentials=creds)
-        
-        # 3. Create the Form
-        form_body = {
-            "info": {
-                "title": request.title,
-                "documentTitle": request.title
-            }
-        }
-        form = form_service.forms().create(body=form_body).execute()
-        form_id = form['formId']
-        
-        # 4. Convert to Quiz (Optional, but good for teachers)
-        # Update settings to make it a quiz
-        update_settings = {
-            "requests": [
-                {
-                    "updateSettings": {
-                        "settings": {
-                            "quizSettings": {
-                                "isQuiz": True
-                            }
-                        },
-                        "updateMask": "quizSettings.isQuiz"
-                    }
-                }
-            ]
-        }
-        try:
-             form_service.forms().batchUpdate(formId=form_id, body=update_settings).execute()
-        except Exception as e:
-             print(f"Warning: Could not set Quiz mode: {e}")
+class GoogleFormBatchRequest(BaseModel):
+    token: str # Google Access Token
+    refresh_token: Optional[str] = None # Refresh Token for renewal
+    quizzes: List[QuizForm]
 
-        # 5. Add Questions
-        batch_requests = []
-        for index, q in enumerate(questions_data):
-            # Prepare options with grading if correct_solution found
-            options_List = []
-            valid_option_values = set()
-            clean_correct = str(q.get('correct_solution')).strip() if q.get('correct_solution') else None
-            
-            for opt_text in q.get('options', []):
-                clean_opt = str(opt_text).strip()
-                if clean_opt: # Ensure text is not empty
-                    option_obj = {"value": clean_opt}
-                    options_List.append(option_obj)
-                    valid_option_values.add(clean_opt)
-            
-            # FAILSAFE: Google API requires at least 1 option
-            if not options_List:
-                print(f"⚠️ Warning: Question '{q.get('title')}' has no options. Adding placeholder.")
-                options_List.append({"value": "Vrai"})
-                options_List.append({"value": "Faux"})
-                valid_option_values.add("Vrai")
-                valid_option_values.add("Faux")
+@router.post("/forms/create")
+def create_google_form_endpoint(request: GoogleFormRequest):
+    try:
+        # 1. Questions from the quiz Markdown (parsed locally, Gemini only for free-form quizzes)
+        questions_data = google_forms.quiz_questions(request.content)
 
-            # Validation: Ensure Correct Answer is in Options
-            final_correct_value = None
-            if clean_correct:
-                if clean_correct in valid_option_values:
-                    final_correct_value = clean_correct
-                else:
-                    # Fallback 1: Case-insensitive check
-                    found_match = None
-                    for val in valid_option_values:
-                        if val.lower() == clean_correct.lower():
-                            found_match = val
-                            break
-                    
-                    if found_match:
-                        final_correct_value = found_match
-                    else:
-                        # Fallback 2: Append missing correct answer
-                        print(f"⚠️ Fixing: Correct answer '{clean_correct}' missing from options. Appending it.")
-                        options_List.append({"value": clean_correct})
-                        final_correct_value = clean_correct
+        # 2. Init Google Forms API (cached discovery document, auto-refresh if a refresh_token is present)
+        form_service = google_api.forms(request.token, request.refresh_token)
 
-            # Construct Question Item
-            question_item = {
-                "createItem": {
-                    "item": {
-                        "title": q.get('title', f"Question {index+1}"),
-                        "questionItem": {
-                            "question": {
-                                "required": True,
-                            "grading": {
-                                    "pointValue": 1,
-                                    "correctAnswers": {
-                                        "answers": [{"value": final_correct_value}]
-                                    }
-                                } if final_correct_value else None,
-                                "choiceQuestion": {
-                                    "type": "RADIO",
-                                    "options": options_List,
-                                    "shuffle": True
-                                }
-                            }
-                        }
-                    },
-                    "location": {
-                        "index": index
-                    }
-                }
-            }
-            batch_requests.append(question_item)
-            
-        if batch_requests:
-            form_service.forms().batchUpdate(formId=form_id, body={"requests": batch_requests}).execute()
-            
-        return {"url": form["responderUri"], "edit_url": f"https://docs.google.com/forms/d/{form_id}/edit", "id": form_id}
+        # 3. Create the Form, then quiz mode and questions in one batchUpdate
+        return google_forms.create_form(form_service, request.title, questions_data)
 
     except Exception as e:
         print(f"❌ Google Forms Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/forms/create-batch")
+def create_google_forms_batch_endpoint(request: GoogleFormBatchRequest):
+    """One form per quiz, created concurrently. Failures are reported per quiz."""
+    if not request.quizzes:
+        raise HTTPException(status_code=400, detail="Aucun quiz à publier")
+    if len(request.quizzes) > google_forms.GOOGLE_FORMS_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Maximum {google_forms.GOOGLE_FORMS_BATCH_MAX} quiz par envoi")
+    quizzes = [{"title": quiz.title, "content": quiz.content} for quiz in request.quizzes]
+    return {"forms": google_forms.create_forms(request.token, request.refresh_token, quizzes)}
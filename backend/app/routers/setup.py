@@ -9,6 +9,7 @@ from typing import Optional
 import os
 from .. import models, auth
 from ..database import get_db
+from ..services.user_cache import user_cache
 
 router = APIRouter()
 
@@ -85,6 +86,7 @@ def setup_first_admin(
         existing_user.is_active = True
         existing_user.status = "active"
         db.commit()
+        user_cache.invalidate(existing_user.email)
         db.refresh(existing_user)
         
         return {
@@ -4,6 +4,7 @@ import stripe
 import os
 from .. import models
 from ..database import get_db
+from ..services.user_cache import user_cache
 from sqlalchemy.orm import Session
 from fastapi import Depends
 
@@ -98,16 +99,17 @@ async def webhook_received(request: Request, stripe_signature: str = Header(None
                 user.stripe_customer_id = customer_id
                 user.status = models.UserStatus.ACTIVE 
                 # (You might want to set status active here too if default was pending)
-                
-                db.commit()
 
-                # Send Confirmation Email
+                # Confirmation email, queued in the same transaction as the activation
                 try:
                     from ..services.email_service import email_service
-                    email_service.send_subscription_confirmation_email(user)
+                    email_service.send_subscription_confirmation_email(db, user)
                 except Exception as e:
                     print(f"Failed to send subscription confirmation email: {e}")
 
+                db.commit()
+                user_cache.invalidate(user.email)
+
     return {"status": "success"}
 
 @router.get("/verify-session/{session_id}")
@@ -127,6 +129,7 @@ async def verify_session(session_id: str, db: Session = Depends(get_db)):
                     user.stripe_customer_id = customer_id
                     user.status = "active"
                     db.commit()
+                    user_cache.invalidate(user.email)
                     return {"status": "active", "plan": "subscription"}
         
         return {"status": "pending"}
@@ -1,63 +1,186 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from ..database import get_db
-from ..models import ActivityLog, PublishedQuiz
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session, undefer
+from ..database import get_db, engine, SessionLocal
+from ..auth import get_current_active_user
+from ..models import PublishedQuiz, User, UserRole
+from ..services.stats_service import dashboard_cache
+from ..services.quiz_cache import quiz_cache, quiz_version, is_valid_code, QUIZ_CACHE_CONTROL
+from ..services.quiz_parser import parse_quiz, public_questions, student_content, grade
+from ..services.publish_service import publish_quizzes
+from ..services.submission_service import parsed_quiz_cache, quiz_results_cache, record_submission, get_quiz_results
 from pydantic import BaseModel
-import uuid
-from datetime import datetime
+from typing import Dict, List
 
 router = APIRouter(tags=["student"])
 
+BULK_PUBLISH_MAX = 100
+
 class PublishRequest(BaseModel):
     log_id: int
     content: str
     title: str
 
+class BulkPublishRequest(BaseModel):
+    quizzes: List[PublishRequest]
+
+class SubmissionRequest(BaseModel):
+    student_name: str
+    answers: Dict[int, str] # question number -> option letter (or short text for open questions)
+
+def _quiz_payload(title: str, content: str) -> dict:
+    """What students get: the quiz without its answer key (kept in the database for grading)."""
+    return {"title": title, "content": student_content(content), "questions": public_questions(parse_quiz(content))}
+
+# Checked on every read: a plain connection, no Session (most reads are cache hits)
+_QUIZ_VERSION = select(PublishedQuiz.updated_at).where(PublishedQuiz.share_code == bindparam("code"))
+
+def _load_quiz(code: str):
+    """
+    Cached entry of a published quiz (see quiz_cache). Only its version is read from the database,
+    the quiz itself on a miss.
+    """
+    if not is_valid_code(code):
+        raise HTTPException(status_code=404, detail="Quiz introuvable ou code invalide")
+    with engine.connect() as conn:
+        row = conn.execute(_QUIZ_VERSION, {"code": code}).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Quiz introuvable ou code invalide")
+    entry = quiz_cache.get(code, quiz_version(row.updated_at))
+    if entry is None:
+        db = SessionLocal()
+        try:
+            quiz = db.query(PublishedQuiz).filter(PublishedQuiz.share_code == code).first()
+            if not quiz:
+                raise HTTPException(status_code=404, detail="Quiz introuvable ou code invalide")
+            entry = quiz_cache.put(code, quiz_version(quiz.updated_at), _quiz_payload(quiz.title, quiz.content))
+        finally:
+            db.close()
+    return entry
+
+def _parsed_quiz(code: str) -> dict:
+    """Parsed quiz with its answer key, for grading: parsed from the stored Markdown, cached per served version."""
+    def load_content():
+        db = SessionLocal()
+        try:
+            quiz = db.query(PublishedQuiz).options(
+                undefer(PublishedQuiz.content_text), undefer(PublishedQuiz.content_blob)
+            ).filter(PublishedQuiz.share_code == code).first()
+            return quiz.content if quiz else None
+        finally:
+            db.close()
+    return parsed_quiz_cache.get(_load_quiz(code), load_content)
+
+def _publish(db: Session, items, owner_id=None, admin=False):
+    """Publishes [(log_id, title, content)], then warms the quiz cache and invalidates the rollups."""
+    try:
+        published = publish_quizzes(db, items, owner_id, admin)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=f"Document non trouvé : {e.args[0]}")
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=f"Ce quiz a été publié par un autre enseignant : {e.args[0]}")
+    except RuntimeError:
+        raise HTTPException(status_code=503, detail="Document pas encore enregistré, réessayez dans un instant")
+    contents = {log_id: (title, content) for log_id, title, content in items}
+    versions = dict(db.query(PublishedQuiz.share_code, PublishedQuiz.updated_at).filter(
+        PublishedQuiz.share_code.in_([share_code for _, _, share_code, _ in published])
+    ))
+    for log_id, user_id, share_code, created in published:
+        # Warm the cache: the students arrive right after the code is projected
+        quiz_cache.put(share_code, quiz_version(versions.get(share_code)), _quiz_payload(*contents[log_id]))
+        if not created:
+            quiz_results_cache.invalidate(share_code)  # the answer key may have changed
+        if user_id:
+            dashboard_cache.invalidate(user_id)
+    return published
+
+# Sync endpoints (run in the threadpool): the Session and the quiz cache block, and publishing
+# may write buffered activity logs first
 @router.post("/publish")
-async def publish_quiz(request: PublishRequest, db: Session = Depends(get_db)):
-    """
-    Publishes a quiz for students and generates a unique code.
-    """
-    # Check if document exists
-    log = db.query(ActivityLog).filter(ActivityLog.id == request.log_id).first()
-    if not log:
-        raise HTTPException(status_code=404, detail="Document non trouvé")
-    
-    # Generate unique share code
-    share_code = str(uuid.uuid4())[:8].upper()
-    
-    # Check if already published
-    existing = db.query(PublishedQuiz).filter(PublishedQuiz.share_code == share_code).first()
-    while existing:
-        share_code = str(uuid.uuid4())[:8].upper()
-        existing = db.query(PublishedQuiz).filter(PublishedQuiz.share_code == share_code).first()
-
-    # Create published entry
-    new_quiz = PublishedQuiz(
-        share_code=share_code,
-        title=request.title,
-        content=request.content
+def publish_quiz(
+    request: PublishRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Publishes one of the caller's quizzes for students and generates a unique code.
+    Re-publishing the same document updates its quiz and keeps the code.
+    """
+    published = _publish(
+        db, [(request.log_id, request.title, request.content)],
+        current_user.id, admin=current_user.role == UserRole.ADMIN
+    )
+    return {"share_code": published[0][2]}
+
+@router.post("/publish/bulk")
+def publish_quizzes_bulk(
+    request: BulkPublishRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Publishes several of the caller's quizzes in one transaction (same rules as /publish)."""
+    if not request.quizzes or len(request.quizzes) > BULK_PUBLISH_MAX:
+        raise HTTPException(status_code=400, detail=f"Entre 1 et {BULK_PUBLISH_MAX} quiz par publication groupée")
+    log_ids = [item.log_id for item in request.quizzes]
+    if len(set(log_ids)) != len(log_ids):
+        raise HTTPException(status_code=400, detail="Un même document est présent plusieurs fois")
+    # Only the author's own documents (any document for an admin); others are reported as not found
+    published = _publish(
+        db, [(item.log_id, item.title, item.content) for item in request.quizzes],
+        current_user.id, admin=current_user.role == UserRole.ADMIN
     )
-    db.add(new_quiz)
-    
-    # Mark activity log as published
-    log.is_published = datetime.utcnow()
-    log.share_code = share_code
-    
-    db.commit()
-    
-    return {"share_code": share_code}
+    return {"published": [{"log_id": log_id, "share_code": code} for log_id, _, code, _ in published]}
 
 @router.get("/quiz/{code}")
-async def get_student_quiz(code: str, db: Session = Depends(get_db)):
+def get_student_quiz(code: str, request: Request):
     """
     Retrieves a published quiz using its share code.
+    Served from quiz_cache (pre-serialized JSON) once its version is checked in the database.
+    `questions` is the parsed structure (numbers, texts, options) students answer in.
+    """
+    entry = _load_quiz(code)
+
+    headers = {"ETag": entry.etag, "Cache-Control": QUIZ_CACHE_CONTROL}
+    if entry.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+@router.post("/quiz/{code}/submit")
+def submit_quiz(code: str, submission: SubmissionRequest):
+    """
+    Submits a student's answers. They are checked against the parsed quiz and graded
+    locally (answer key of the "Corrigé" section); the row is written in the background.
+    """
+    student_name = submission.student_name.strip()
+    if not student_name or len(student_name) > 100:
+        raise HTTPException(status_code=400, detail="Nom de l'élève invalide")
+    if any(len(answer) > 2000 for answer in submission.answers.values()):
+        raise HTTPException(status_code=400, detail="Réponse trop longue")
+
+    parsed = _parsed_quiz(code)
+    if not parsed["questions"]:
+        raise HTTPException(status_code=422, detail="Ce quiz n'accepte pas de réponses en ligne")
+    try:
+        details, score, total = grade(parsed, submission.answers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    answers = {d["question"]: d["answer"] for d in details if d["answer"] is not None}
+    submission_id = record_submission(code, student_name, parsed, answers, score, total)
+    return {"submission_id": submission_id, "score": score, "total": total, "results": details}
+
+@router.get("/quiz/{code}/results")
+def get_quiz_results_endpoint(
+    code: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Per-question results of a published quiz, for its author. Served from the answer rollup
+    (cached a few seconds); submissions appear once the write-behind batch is flushed (~1 s).
     """
-    quiz = db.query(PublishedQuiz).filter(PublishedQuiz.share_code == code).first()
-    if not quiz:
+    quiz = db.query(PublishedQuiz.user_id).filter(PublishedQuiz.share_code == code).first()
+    if not quiz or (quiz.user_id != current_user.id and current_user.role != UserRole.ADMIN):
         raise HTTPException(status_code=404, detail="Quiz introuvable ou code invalide")
-    
-    return {
-        "title": quiz.title,
-        "content": quiz.content
-    }
+    parsed = _parsed_quiz(code)
+    return get_quiz_results(db, code, parsed)
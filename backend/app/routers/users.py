@@ -4,6 +4,7 @@ from pydantic import BaseModel
 from typing import Optional
 from .. import models, auth
 from ..database import get_db
+from ..services.user_cache import user_cache
 
 router = APIRouter()
 
@@ -27,4 +28,5 @@ def update_user_plan(
         current_user.is_active = True
 
     db.commit()
+    user_cache.invalidate(current_user.email)
     return {"message": "Plan updated", "plan": current_user.plan_selection, "status": current_user.status}
@@ -0,0 +1,210 @@
+import os
+import json
+import threading
+from datetime import datetime
+from sqlalchemy import delete, func, select, text
+from .. import models
+from . import search_service
+from .content_codec import compress_text, decompress_text
+
+# activity_logs keeps the current month plus this many full months; older months are archived
+ACTIVITY_RETENTION_MONTHS = int(os.getenv("ACTIVITY_RETENTION_MONTHS", "12"))
+ACTIVITY_ARCHIVE_CHUNK = int(os.getenv("ACTIVITY_ARCHIVE_CHUNK", "20000"))
+# Optional copy of each archived month as a Parquet file (needs pandas + pyarrow or fastparquet)
+ACTIVITY_ARCHIVE_PARQUET_DIR = os.getenv("ACTIVITY_ARCHIVE_PARQUET_DIR")
+# Monthly partitions created in advance on PostgreSQL
+ACTIVITY_PARTITIONS_AHEAD = int(os.getenv("ACTIVITY_PARTITIONS_AHEAD", "3"))
+# Opt-in: archival deletes rows from activity_logs. When off, new months on PostgreSQL land in the
+# DEFAULT partition and are moved to their own partition on the first maintenance run
+ACTIVITY_MAINTENANCE_ENABLED = os.getenv("ACTIVITY_MAINTENANCE_ENABLED", "false").lower() == "true"
+ACTIVITY_MAINTENANCE_INTERVAL = float(os.getenv("ACTIVITY_MAINTENANCE_INTERVAL", str(6 * 3600)))
+
+# Arbitrary constant identifying the maintenance advisory lock on PostgreSQL
+MAINTENANCE_LOCK_KEY = 7_340_002
+
+_logs = models.ActivityLog.__table__
+COLUMNS = [column.name for column in _logs.columns]
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"activity_logs_{month:%Y_%m}"
+
+
+def retention_cutoff(now: datetime = None) -> datetime:
+    return add_months(month_start(now or datetime.utcnow()), -ACTIVITY_RETENTION_MONTHS)
+
+
+def is_partitioned(conn) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(text(
+        "SELECT relkind FROM pg_class WHERE oid = to_regclass('activity_logs')"
+    )).scalar() == "p"
+
+
+def _partition_exists(conn, month: datetime) -> bool:
+    return conn.execute(text("SELECT to_regclass(:name)"), {"name": partition_name(month)}).scalar() is not None
+
+
+def create_partition(conn, month: datetime):
+    """
+    Adds the partition of `month`. Rows that already landed in the DEFAULT partition for that
+    month (maintenance did not run in time) are moved into it first, as ATTACH requires.
+    """
+    name, start, end = partition_name(month), month, add_months(month, 1)
+    bounds = {"start": start, "end": end}
+    conn.execute(text(f"CREATE TABLE {name} (LIKE activity_logs INCLUDING DEFAULTS)"))
+    conn.execute(text(
+        f"""WITH moved AS (
+            DELETE FROM activity_logs_default WHERE "timestamp" >= :start AND "timestamp" < :end RETURNING *
+        ) INSERT INTO {name} SELECT * FROM moved"""
+    ), bounds)
+    conn.execute(text(
+        f"ALTER TABLE activity_logs ATTACH PARTITION {name} FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    ))
+
+
+def ensure_partitions(conn, now: datetime = None, ahead: int = ACTIVITY_PARTITIONS_AHEAD) -> int:
+    """Creates the partitions of the current month and the next `ahead` months (PostgreSQL)."""
+    if not is_partitioned(conn):
+        return 0
+    created = 0
+    current = month_start(now or datetime.utcnow())
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        if not _partition_exists(conn, month):
+            create_partition(conn, month)
+            created += 1
+    return created
+
+
+def _write_parquet(month: datetime, rows):
+    try:
+        import pandas
+        os.makedirs(ACTIVITY_ARCHIVE_PARQUET_DIR, exist_ok=True)
+        path = os.path.join(ACTIVITY_ARCHIVE_PARQUET_DIR, f"activity_logs_{month:%Y_%m}.parquet")
+        pandas.DataFrame(rows, columns=COLUMNS).to_parquet(path, index=False)
+    except Exception as e:
+        print(f"⚠️ Parquet export of {month:%Y-%m} failed (archive table still written): {e}")
+
+
+def archive_month(conn, month: datetime) -> int:
+    """
+    Moves one month of activity logs into activity_log_archives (compressed JSON lines, in
+    chunks) and removes them from activity_logs and the search index. On a partitioned table
+    the month's partition is detached and dropped instead of deleting row by row.
+    Runs in the caller's transaction. Returns the number of rows archived.
+    """
+    in_month = (_logs.c.timestamp >= month) & (_logs.c.timestamp < add_months(month, 1))
+    # Server-side cursor for this SELECT only (Connection.execution_options would apply to the inserts too)
+    result = conn.execute(
+        select(_logs).where(in_month).order_by(_logs.c.id), execution_options={"stream_results": True}
+    )
+
+    archived = 0
+    parquet_rows = [] if ACTIVITY_ARCHIVE_PARQUET_DIR else None
+    for chunk in result.partitions(ACTIVITY_ARCHIVE_CHUNK):
+        lines = []
+        for row in chunk:
+            values = dict(zip(COLUMNS, row))
+            for key in ("timestamp", "is_published"):
+                if isinstance(values[key], datetime):
+                    values[key] = values[key].isoformat()
+            lines.append(json.dumps(values, ensure_ascii=False))
+        payload_format, payload = compress_text("\n".join(lines))
+        conn.execute(models.ActivityLogArchive.__table__.insert().values(
+            month=f"{month:%Y-%m}", first_id=chunk[0][0], last_id=chunk[-1][0], row_count=len(chunk),
+            payload_format=payload_format, payload=payload, created_at=datetime.utcnow()
+        ))
+        search_service.remove_entries(conn, search_service.KIND_ACTIVITY, [row[0] for row in chunk])
+        if parquet_rows is not None:
+            parquet_rows.extend(tuple(row) for row in chunk)
+        archived += len(chunk)
+
+    if parquet_rows:
+        _write_parquet(month, parquet_rows)
+
+    if is_partitioned(conn) and _partition_exists(conn, month):
+        name = partition_name(month)
+        conn.execute(text(f"ALTER TABLE activity_logs DETACH PARTITION {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+    # Rows of that month outside its partition (DEFAULT partition, or a plain table)
+    conn.execute(delete(_logs).where(in_month))
+    return archived
+
+
+def archive_expired(engine, now: datetime = None) -> int:
+    """Archives every month older than the retention window, one transaction per month."""
+    cutoff = retention_cutoff(now)
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql" and not conn.execute(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}
+            ).scalar():
+                return total  # another worker is on it
+            oldest = conn.execute(
+                select(func.min(_logs.c.timestamp)).where(_logs.c.timestamp < cutoff)
+            ).scalar()
+            if oldest is None:
+                return total
+            month = month_start(oldest)
+            count = archive_month(conn, month)
+        print(f"🗄️ Activity logs of {month:%Y-%m} archived ({count} rows)")
+        total += count
+
+
+def iter_archived_logs(db, month: str):
+    """Yields the archived logs of a "YYYY-MM" month as dicts (exports, audits)."""
+    archives = db.query(models.ActivityLogArchive).filter(
+        models.ActivityLogArchive.month == month
+    ).order_by(models.ActivityLogArchive.first_id).all()
+    for archive in archives:
+        for line in decompress_text(archive.payload_format, archive.payload).splitlines():
+            yield json.loads(line)
+
+
+class ActivityMaintenance:
+    """Daemon thread: creates upcoming partitions and archives expired months every few hours."""
+    def __init__(self, interval: float = ACTIVITY_MAINTENANCE_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        from ..database import engine
+        try:
+            with engine.begin() as conn:
+                created = ensure_partitions(conn)
+            if created:
+                print(f"🗓️ {created} activity log partitions created")
+            archive_expired(engine)
+        except Exception as e:
+            print(f"⚠️ Activity log maintenance failed: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if not ACTIVITY_MAINTENANCE_ENABLED or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="activity-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+activity_maintenance = ActivityMaintenance()
@@ -0,0 +1,210 @@
+import os
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from .. import models
+from .stats_service import dashboard_cache
+
+# Activity logs are written behind the generation response, in batches
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "1.0"))
+ACTIVITY_BATCH_SIZE = int(os.getenv("ACTIVITY_BATCH_SIZE", "100"))
+ACTIVITY_QUEUE_MAX = int(os.getenv("ACTIVITY_QUEUE_MAX", "10000"))
+# Ids are reserved this many at a time, so the response can carry a log_id before the INSERT
+ACTIVITY_ID_BLOCK_SIZE = int(os.getenv("ACTIVITY_ID_BLOCK_SIZE", "50"))
+
+
+class IdAllocator:
+    """
+    Hands out ids for a table without inserting, one database round trip per block:
+      PostgreSQL  nextval() of the table's serial sequence, N values at once, so ids stay
+                  consistent with rows inserted with the column default
+      others      hi-lo on the id_blocks table (UPDATE next_value = next_value + N)
+    Ids of a block that is not used up (worker restart) are simply skipped.
+    """
+    def __init__(self, table: str, block_size: int = ACTIVITY_ID_BLOCK_SIZE):
+        self.table = table
+        self.block_size = block_size
+        self._ids = deque()
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        with self._lock:
+            if not self._ids:
+                self._ids.extend(self._reserve_block())
+            return self._ids.popleft()
+
+    def _reserve_block(self):
+        from ..database import SessionLocal
+        db = SessionLocal()
+        try:
+            if db.get_bind().dialect.name == "postgresql":
+                ids = db.execute(
+                    text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :n)"),
+                    {"table": self.table, "n": self.block_size},
+                ).scalars().all()
+                db.commit()
+                return ids
+
+            for _ in range(3):
+                updated = db.execute(
+                    text("UPDATE id_blocks SET next_value = next_value + :n WHERE name = :name"),
+                    {"n": self.block_size, "name": self.table},
+                ).rowcount
+                if updated:
+                    end = db.execute(text("SELECT next_value FROM id_blocks WHERE name = :name"), {"name": self.table}).scalar()
+                    db.commit()
+                    return range(end - self.block_size, end)
+                try:
+                    # First use (no migration ran): start after the ids already in the table
+                    start = db.execute(text(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {self.table}")).scalar()
+                    db.execute(
+                        text("INSERT INTO id_blocks (name, next_value) VALUES (:name, :end)"),
+                        {"name": self.table, "end": start + self.block_size},
+                    )
+                    db.commit()
+                    return range(start, start + self.block_size)
+                except IntegrityError:
+                    db.rollback()  # another worker seeded it first: reserve with the UPDATE
+            raise RuntimeError(f"Could not reserve ids for {self.table}")
+        finally:
+            db.close()
+
+
+activity_ids = IdAllocator("activity_logs")
+
+
+class ActivitySink:
+    """
+    Write-behind buffer for ActivityLog rows. `record` reserves the id and returns at once;
+    a daemon thread inserts the buffered rows every ACTIVITY_FLUSH_INTERVAL seconds, or as soon
+    as ACTIVITY_BATCH_SIZE are waiting, and the buffer is drained on shutdown.
+    Rows go through the ORM, so the after_insert hooks (stats rollup, search index) still run.
+    """
+    def __init__(self, interval: float = ACTIVITY_FLUSH_INTERVAL, batch_size: int = ACTIVITY_BATCH_SIZE,
+                 max_queue: int = ACTIVITY_QUEUE_MAX, ids: IdAllocator = activity_ids):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.ids = ids
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._retry = []  # rows of a failed batch, written first next time
+        self._pending_ids = set()
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, **fields) -> int:
+        """Buffers one activity log (ActivityLog column values) and returns its id."""
+        row = {"id": self.ids.next_id(), "timestamp": datetime.utcnow(), **fields}
+        with self._pending_lock:
+            self._pending_ids.add(row["id"])
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.flush([row])
+            return row["id"]
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+        self._ensure_started()
+        return row["id"]
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stop.clear()
+                    self._thread = threading.Thread(target=self._run, name="activity-sink", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def ensure_written(self, log_ids) -> set:
+        """
+        Writes now, synchronously, if any of these ids is still buffered in this worker (e.g. publishing
+        a just-generated quiz). Returns the ids still not written (the database refused the batch).
+        """
+        with self._pending_lock:
+            buffered = self._pending_ids.intersection(log_ids)
+        if buffered:
+            self.flush()  # waits for a flush in progress on the background thread
+            with self._pending_lock:
+                buffered &= self._pending_ids
+        return buffered
+
+    def flush(self, rows=None) -> int:
+        """Writes everything buffered so far (in batches). Returns the number of rows written."""
+        with self._flush_lock:
+            rows = self._retry + (rows or [])
+            self._retry = []
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            written = 0
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                size = len(batch)
+                if not self._write(batch):
+                    # `batch` now only holds the rows that were not written
+                    self._retry = batch + rows[start + size:]
+                    written += size - len(batch)
+                    break
+                written += size
+            return written
+
+    def _write(self, rows) -> bool:
+        """
+        Inserts rows in one transaction. If one of them is refused (duplicate id), each row is
+        written on its own: refused rows are dropped, and `rows` is left with the ones that failed
+        otherwise. Returns False when `rows` still has to be retried.
+        """
+        from ..database import SessionLocal
+        db = SessionLocal()
+        try:
+            db.add_all([models.ActivityLog(**row) for row in rows])
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if len(rows) > 1:
+                # Isolate the offending row instead of retrying the whole batch forever
+                db.close()
+                rows[:] = [row for row in rows if not self._write([row])]
+                return not rows
+            print(f"⚠️ Activity log {rows[0]['id']} dropped: {e}")
+            with self._pending_lock:
+                self._pending_ids.discard(rows[0]["id"])
+            return True
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Activity log write failed ({len(rows)} rows): {e}")
+            return False
+        finally:
+            db.close()
+        with self._pending_lock:
+            self._pending_ids.difference_update(row["id"] for row in rows)
+        for user_id in {row.get("user_id") for row in rows if row.get("user_id")}:
+            dashboard_cache.invalidate(user_id)
+        return True
+
+    def pending(self) -> int:
+        return self._queue.qsize() + len(self._retry)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+
+activity_sink = ActivitySink()
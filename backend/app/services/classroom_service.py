@@ -0,0 +1,68 @@
+import os
+import hashlib
+from .google_api import Backoff, is_rate_limited
+from .stats_service import DashboardCache
+
+# Google accepts up to 1000 calls per batch request; Classroom recommends at most 50
+CLASSROOM_BATCH_SIZE = int(os.getenv("CLASSROOM_BATCH_SIZE", "50"))
+CLASSROOM_PAGE_SIZE = int(os.getenv("CLASSROOM_PAGE_SIZE", "100"))
+CLASSROOM_COURSES_CACHE_TTL = float(os.getenv("CLASSROOM_COURSES_CACHE_TTL", "300"))
+
+# Course lists per Google account (keyed by a hash of its refresh token, stable across access tokens)
+courses_cache = DashboardCache(ttl=CLASSROOM_COURSES_CACHE_TTL)
+
+
+def account_key(token: str, refresh_token: str = None) -> str:
+    return hashlib.sha256((refresh_token or token).encode()).hexdigest()
+
+
+def list_courses(service, backoff: Backoff = None):
+    """Every ACTIVE course the user teaches, following nextPageToken."""
+    backoff = backoff or Backoff()
+    courses = []
+    page_token = None
+    while True:
+        results = backoff.execute(service.courses().list(
+            teacherId='me', courseStates='ACTIVE', pageSize=CLASSROOM_PAGE_SIZE, pageToken=page_token,
+            fields="courses(id,name,section),nextPageToken",
+        ))
+        courses.extend(
+            {"id": c['id'], "name": c['name'], "section": c.get('section', '')}
+            for c in results.get('courses', [])
+        )
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            return courses
+
+
+def create_coursework(service, course_ids, course_work: dict, backoff: Backoff = None):
+    """
+    Creates the same coursework in every course with Google batch requests (one HTTP call per
+    CLASSROOM_BATCH_SIZE courses). Courses rate limited inside a batch are sent again in the
+    next round, after the backoff. Returns {course_id: {"id", "url"} or {"error"}}.
+    """
+    backoff = backoff or Backoff()
+    results = {}
+    pending = list(dict.fromkeys(course_ids))
+    for attempt in range(backoff.retries + 1):
+        limited = []
+
+        def collect(course_id, response, error):
+            if error is None:
+                results[course_id] = {"id": response.get('id'), "url": response.get('alternateLink')}
+            elif is_rate_limited(error) and attempt < backoff.retries:
+                limited.append(course_id)
+            else:
+                results[course_id] = {"error": str(error)}
+
+        for start in range(0, len(pending), CLASSROOM_BATCH_SIZE):
+            batch = service.new_batch_http_request(callback=collect)
+            for course_id in pending[start:start + CLASSROOM_BATCH_SIZE]:
+                batch.add(service.courses().courseWork().create(courseId=course_id, body=course_work),
+                          request_id=course_id)
+            backoff.execute(batch)
+        if not limited:
+            break
+        pending = limited
+        backoff.pause(attempt)
+    return results
@@ -0,0 +1,77 @@
+import os
+import time
+import threading
+from sqlalchemy import update
+from .. import models
+from .content_codec import compress_text
+
+# Legacy plain-text bodies are compressed gradually after startup
+CONTENT_BACKFILL_ENABLED = os.getenv("CONTENT_BACKFILL_ENABLED", "true").lower() == "true"
+CONTENT_BACKFILL_BATCH = int(os.getenv("CONTENT_BACKFILL_BATCH", "200"))
+CONTENT_BACKFILL_PAUSE = float(os.getenv("CONTENT_BACKFILL_PAUSE", "1.0"))
+
+
+class ContentBackfill:
+    """
+    Rewrites rows whose body is still in the legacy `content` column into the compressed
+    columns, in small batches on a daemon thread. Each row is updated only if it is still
+    uncompressed, so a concurrent edit through the model always wins.
+    """
+    MODELS = (models.SavedDocument, models.PublishedQuiz)
+
+    def __init__(self, batch_size: int = CONTENT_BACKFILL_BATCH, pause: float = CONTENT_BACKFILL_PAUSE):
+        self.batch_size = batch_size
+        self.pause = pause
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_batch(self, db, model) -> int:
+        rows = db.query(model.id, model.content_text).filter(
+            model.content_format.is_(None), model.content_text.isnot(None)
+        ).limit(self.batch_size).all()
+        for row in rows:
+            content_format, blob = compress_text(row.content_text)
+            db.execute(
+                update(model)
+                .where(model.id == row.id, model.content_format.is_(None))
+                .values(content_format=content_format, content_blob=blob,
+                        content_size=len(row.content_text), content_text=None)
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        return len(rows)
+
+    def run(self) -> int:
+        from ..database import SessionLocal
+        total = 0
+        for model in self.MODELS:
+            while not self._stop.is_set():
+                db = SessionLocal()
+                try:
+                    done = self.run_batch(db, model)
+                except Exception as e:
+                    db.rollback()
+                    print(f"⚠️ Content backfill failed on {model.__tablename__}: {e}")
+                    return total
+                finally:
+                    db.close()
+                total += done
+                if done < self.batch_size:
+                    break
+                time.sleep(self.pause)
+        if total:
+            print(f"🗜️ Content backfill: {total} bodies compressed")
+        return total
+
+    def start(self):
+        if not CONTENT_BACKFILL_ENABLED or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="content-backfill", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+content_backfill = ContentBackfill()
@@ -0,0 +1,47 @@
+import os
+import zlib
+
+# Codec used for new writes. zstd is used only when the optional `zstandard` package is installed.
+CONTENT_COMPRESSION = os.getenv("CONTENT_COMPRESSION", "zlib").lower()
+CONTENT_ZLIB_LEVEL = int(os.getenv("CONTENT_ZLIB_LEVEL", "6"))
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_CODECS = {
+    "zlib": (
+        lambda data: zlib.compress(data, CONTENT_ZLIB_LEVEL),
+        zlib.decompress,
+    ),
+}
+if zstandard is not None:
+    _CODECS["zstd"] = (
+        lambda data: zstandard.ZstdCompressor(level=10).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+
+if CONTENT_COMPRESSION not in _CODECS:
+    print(f"⚠️ Content compression '{CONTENT_COMPRESSION}' unavailable, using zlib.")
+    CONTENT_COMPRESSION = "zlib"
+
+
+def compress_text(text: str):
+    """Returns (format, blob) for a Markdown body."""
+    compress, _ = _CODECS[CONTENT_COMPRESSION]
+    return CONTENT_COMPRESSION, compress(text.encode("utf-8"))
+
+
+def decompress_text(content_format: str, blob: bytes) -> str:
+    codec = _CODECS.get(content_format)
+    if codec is None:
+        raise ValueError(f"Unsupported content format: {content_format}")
+    return codec[1](blob).decode("utf-8")
+
+
+def decode_content(content_format, blob, text):
+    """Reads a body from its stored columns: compressed blob when a format is set, else legacy plain text."""
+    if content_format and blob is not None:
+        return decompress_text(content_format, blob)
+    return text
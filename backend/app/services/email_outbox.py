@@ -0,0 +1,253 @@
+import os
+import time
+import uuid
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from sqlalchemy import delete, event, insert, select, update
+from .. import models
+
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+EMAIL_POLL_INTERVAL = float(os.getenv("EMAIL_POLL_INTERVAL", "5"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "8"))
+EMAIL_RETRY_BASE = float(os.getenv("EMAIL_RETRY_BASE", "30"))
+EMAIL_RETRY_MAX = float(os.getenv("EMAIL_RETRY_MAX", "3600"))
+# A claimed batch not finished after this long (worker killed) is picked up again
+EMAIL_LEASE_SECONDS = float(os.getenv("EMAIL_LEASE_SECONDS", "300"))
+# The SMTP connection is kept open between batches, and re-opened after this much idle time
+EMAIL_SMTP_IDLE_TIMEOUT = float(os.getenv("EMAIL_SMTP_IDLE_TIMEOUT", "60"))
+EMAIL_SMTP_STARTTLS = os.getenv("EMAIL_SMTP_STARTTLS", "true").lower() == "true"
+EMAIL_SENT_RETENTION_DAYS = int(os.getenv("EMAIL_SENT_RETENTION_DAYS", "30"))
+
+_outbox = models.EmailOutbox.__table__
+
+
+def enqueue(db, to_email: str, subject: str, body_html: str):
+    """
+    Adds the email to the outbox in the caller's transaction (no SMTP on the request path): it is
+    queued only if the change it announces is committed, and the sender is woken after that commit.
+    """
+    db.add(models.EmailOutbox(to_email=to_email, subject=subject, body_html=body_html,
+                              status="pending", attempts=0, next_attempt_at=datetime.utcnow()))
+    event.listen(db, "after_commit", lambda session: email_sender.wake(), once=True)
+
+
+def enqueue_many(db, messages) -> int:
+    """
+    Adds [(to_email, subject, body_html)] to the outbox in the caller's transaction, in one
+    INSERT. The caller wakes the sender once it has committed.
+    """
+    if not messages:
+        return 0
+    now = datetime.utcnow()
+    db.execute(insert(_outbox), [
+        {"to_email": to_email, "subject": subject, "body_html": body_html, "status": "pending",
+         "attempts": 0, "next_attempt_at": now, "created_at": now}
+        for to_email, subject, body_html in messages
+    ])
+    return len(messages)
+
+
+def _retry_delay(attempts: int) -> float:
+    return min(EMAIL_RETRY_MAX, EMAIL_RETRY_BASE * 2 ** (attempts - 1))
+
+
+def _is_permanent(error: Exception) -> bool:
+    """5xx replies (unknown mailbox, rejected content...) will not succeed on retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+class EmailSender:
+    """
+    Background sender for the email outbox. A daemon thread claims due emails in batches
+    (a lease on next_attempt_at, so several workers never send the same one), sends them
+    over one SMTP connection kept open and authenticated between batches, and reschedules
+    failures with exponential backoff until EMAIL_MAX_ATTEMPTS.
+    """
+    def __init__(self, host: str = None, port: int = None, user: str = None, password: str = None,
+                 starttls: bool = EMAIL_SMTP_STARTTLS, batch_size: int = EMAIL_BATCH_SIZE,
+                 interval: float = EMAIL_POLL_INTERVAL):
+        self.host = host or os.getenv("SMTP_SERVER", "smtp-relay.brevo.com")
+        self.port = port or int(os.getenv("SMTP_PORT", "587"))
+        self.user = user if user is not None else os.getenv("SMTP_USER")
+        self.password = password if password is not None else os.getenv("SMTP_PASSWORD")
+        self.sender = self.user or os.getenv("SMTP_FROM", "no-reply@localhost")
+        self.starttls = starttls
+        self.batch_size = batch_size
+        self.interval = interval
+        self._smtp = None
+        self._smtp_used_at = 0.0
+        self._send_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._purged_at = 0.0
+
+    # --- SMTP connection -------------------------------------------------
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=30)
+        smtp.ehlo()
+        if self.starttls and smtp.has_extn("starttls"):
+            smtp.starttls()
+            smtp.ehlo()
+        if self.user and self.password:
+            smtp.login(self.user, self.password)
+        self._smtp_used_at = time.monotonic()
+        return smtp
+
+    def _connection(self):
+        if self._smtp is not None and time.monotonic() - self._smtp_used_at > EMAIL_SMTP_IDLE_TIMEOUT:
+            self._close()  # The server has probably dropped it already
+        if self._smtp is None:
+            self._smtp = self._connect()
+        return self._smtp
+
+    def _close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def _deliver(self, row):
+        message = MIMEMultipart()
+        message['From'] = self.sender
+        message['To'] = row.to_email
+        message['Subject'] = row.subject
+        message.attach(MIMEText(row.body_html, 'html'))
+        try:
+            self._connection().send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # Dropped between two batches: reconnect once
+            self._smtp = None
+            self._connection().send_message(message)
+        self._smtp_used_at = time.monotonic()
+
+    # --- Outbox ----------------------------------------------------------
+
+    def _claim(self, db):
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        due = select(_outbox.c.id).where(
+            _outbox.c.status == "pending", _outbox.c.next_attempt_at <= now
+        ).order_by(_outbox.c.id).limit(self.batch_size)
+        # The conditions are re-checked by the UPDATE itself: a row is claimed by one worker only
+        db.execute(update(_outbox).where(
+            _outbox.c.id.in_(due.scalar_subquery()), _outbox.c.status == "pending", _outbox.c.next_attempt_at <= now
+        ).values(claim_token=token, next_attempt_at=now + timedelta(seconds=EMAIL_LEASE_SECONDS),
+                 attempts=_outbox.c.attempts + 1))
+        db.commit()
+        return db.execute(select(_outbox).where(_outbox.c.claim_token == token).order_by(_outbox.c.id)).fetchall()
+
+    def flush(self) -> int:
+        """Sends every due email now. Returns the number sent."""
+        from ..database import SessionLocal
+        sent_total = 0
+        with self._send_lock:
+            while True:
+                db = SessionLocal()
+                try:
+                    rows = self._claim(db)
+                    if not rows:
+                        return sent_total
+                    sent, failures = [], []
+                    for row in rows:
+                        try:
+                            self._deliver(row)
+                            sent.append(row.id)
+                        except Exception as e:
+                            failures.append((row, e))
+                            if not isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                                self._close()  # Connection-level problem: start afresh
+                    self._record(db, sent, failures)
+                    sent_total += len(sent)
+                    if failures and not sent:
+                        return sent_total  # Server unavailable: wait for the backoff
+                finally:
+                    db.close()
+
+    def _record(self, db, sent, failures):
+        now = datetime.utcnow()
+        if sent:
+            db.execute(update(_outbox).where(_outbox.c.id.in_(sent)).values(
+                status="sent", sent_at=now, claim_token=None, last_error=None
+            ))
+        for row, error in failures:
+            permanent = _is_permanent(error) or row.attempts >= EMAIL_MAX_ATTEMPTS
+            db.execute(update(_outbox).where(_outbox.c.id == row.id).values(
+                status="failed" if permanent else "pending",
+                next_attempt_at=now + timedelta(seconds=_retry_delay(row.attempts)),
+                claim_token=None, last_error=str(error)[:1000],
+            ))
+            if permanent:
+                print(f"❌ Email to {row.to_email} failed permanently: {error}")
+            else:
+                print(f"⚠️ Email to {row.to_email} failed (attempt {row.attempts}), retrying later: {error}")
+        db.commit()
+        if sent:
+            print(f"✅ {len(sent)} emails sent")
+
+    def _purge_sent(self):
+        from ..database import SessionLocal
+        db = SessionLocal()
+        try:
+            db.execute(delete(_outbox).where(
+                _outbox.c.status == "sent",
+                _outbox.c.sent_at < datetime.utcnow() - timedelta(days=EMAIL_SENT_RETENTION_DAYS),
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    # --- Thread ----------------------------------------------------------
+
+    def wake(self):
+        self._wake.set()
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stop.clear()
+                    self._thread = threading.Thread(target=self._run, name="email-sender", daemon=True)
+                    self._thread.start()
+
+    def start(self):
+        """Called at startup: sends what was left pending by a previous process."""
+        if self.user:
+            self._ensure_started()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.flush()
+                if time.monotonic() - self._purged_at > 3600:
+                    self._purged_at = time.monotonic()
+                    self._purge_sent()
+            except Exception as e:
+                print(f"⚠️ Email sender error: {e}")
+        with self._send_lock:
+            self._close()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+email_sender = EmailSender()
@@ -1,10 +1,8 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 from .. import models
+from .email_outbox import enqueue, enqueue_many
 
 # Load env explicitly to ensure SMTP credentials are found
 env_path = Path(__file__).resolve().parent.parent.parent / '.env'
@@ -23,30 +21,21 @@ class EmailService:
         else:
             print("⚠️ EmailService: SMTP_USER not found in environment.")
 
-    def _send_email(self, to_email: str, subject: str, body_html: str):
+    def _send_email(self, db, to_email: str, subject: str, body_html: str):
+        """
+        Queues the email in the outbox, in the caller's transaction (commit it afterwards);
+        the background sender delivers it (see email_outbox).
+        """
         if not self.smtp_user or not self.smtp_password:
             print("⚠️ SMTP credentials not set. Email skipped.")
             return
 
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.smtp_user
-            msg['To'] = to_email
-            msg['Subject'] = subject
-
-            msg.attach(MIMEText(body_html, 'html'))
-
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()  # Secure the connection
-            server.login(self.smtp_user, self.smtp_password)
-            text = msg.as_string()
-            server.sendmail(self.smtp_user, to_email, text)
-            server.quit()
-            print(f"✅ Email sent to {to_email}")
+            enqueue(db, to_email, subject, body_html)
         except Exception as e:
-            print(f"❌ Failed to send email: {e}")
+            print(f"❌ Failed to queue email: {e}")
 
-    def send_welcome_email(self, user: models.User):
+    def send_welcome_email(self, db, user: models.User):
         """Called when user registers (Status: PENDING)"""
         subject = "Bienvenue sur Professeur Virtuel - Demande reçue"
         body = f"""
@@ -65,10 +54,9 @@ class EmailService:
         if not self.smtp_user:
             print(f"📧 [MOCK] Welcome Email to {user.email}")
         else:
-            self._send_email(user.email, subject, body)
+            self._send_email(db, user.email, subject, body)
 
-    def send_approval_email(self, user: models.User):
-        """Called when admin validates account (Status: ACTIVE)"""
+    def _approval_message(self, user):
         subject = "Compte validé ! Accédez à Professeur Virtuel"
         body = f"""
         <html>
@@ -80,12 +68,9 @@ class EmailService:
             </body>
         </html>
         """
-        if not self.smtp_user:
-            print(f"📧 [MOCK] Approval Email to {user.email}")
-        else:
-            self._send_email(user.email, subject, body)
+        return subject, body
 
-    def send_rejection_email(self, user: models.User):
+    def _rejection_message(self, user):
         subject = "Concernant votre demande d'inscription"
         body = f"""
         <html>
@@ -95,12 +80,36 @@ class EmailService:
             </body>
         </html>
         """
+        return subject, body
+
+    def send_approval_email(self, db, user: models.User):
+        """Called when admin validates account (Status: ACTIVE)"""
+        subject, body = self._approval_message(user)
+        if not self.smtp_user:
+            print(f"📧 [MOCK] Approval Email to {user.email}")
+        else:
+            self._send_email(db, user.email, subject, body)
+
+    def send_rejection_email(self, db, user: models.User):
+        subject, body = self._rejection_message(user)
         if not self.smtp_user:
             print(f"📧 [MOCK] Rejection Email to {user.email}")
         else:
-            self._send_email(user.email, subject, body)
+            self._send_email(db, user.email, subject, body)
+
+    def queue_bulk_emails(self, db, kind: str, users) -> int:
+        """
+        Approval ("approval") or rejection ("rejection") emails for many users (rows with email,
+        full_name, plan_selection), added to the caller's transaction in one INSERT.
+        Call email_sender.wake() once it is committed. Returns the number queued.
+        """
+        build = self._approval_message if kind == "approval" else self._rejection_message
+        if not self.smtp_user or not self.smtp_password:
+            print(f"📧 [MOCK] {len(users)} {kind} emails")
+            return 0
+        return enqueue_many(db, [(user.email, *build(user)) for user in users])
 
-    def send_subscription_confirmation_email(self, user: models.User):
+    def send_subscription_confirmation_email(self, db, user: models.User):
         """Called when payment is successful via Stripe"""
         subject = "Confirmation de votre abonnement Professeur Virtuel Pro"
         frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
@@ -134,6 +143,6 @@ class EmailService:
         if not self.smtp_user:
             print(f"📧 [MOCK] Subscription Email to {user.email}")
         else:
-            self._send_email(user.email, subject, body)
+            self._send_email(db, user.email, subject, body)
 
 email_service = EmailService()
@@ -0,0 +1,230 @@
+import os
+import time
+import asyncio
+import shutil
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Rendering (fpdf2 / python-docx) is CPU-bound and blocking: keep it off the event loop
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "4"))
+
+# Rendered artifacts are cached on disk, keyed by format + content hash
+EXPORT_CACHE_DIR = Path(os.getenv("EXPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "profvirtuel_exports")))
+EXPORT_CACHE_MAX_FILES = int(os.getenv("EXPORT_CACHE_MAX_FILES", "500"))
+# Finished renders are kept in memory up to this size on their way to the store, then roll over to a temp file
+EXPORT_SPOOL_MAX_BYTES = int(os.getenv("EXPORT_SPOOL_MAX_BYTES", str(1024 * 1024)))
+
+# Speculative pre-rendering after generation (opt-in)
+EXPORT_PREFETCH_ENABLED = os.getenv("EXPORT_PREFETCH_ENABLED", "false").lower() == "true"
+# CPU seconds prefetch may burn per rolling minute, so it never competes with interactive exports
+PREFETCH_CPU_BUDGET = float(os.getenv("PREFETCH_CPU_BUDGET", "15"))
+PREFETCH_MAX_QUEUE = int(os.getenv("PREFETCH_MAX_QUEUE", "20"))
+PREFETCH_MAX_WAIT = float(os.getenv("PREFETCH_MAX_WAIT", "30"))
+
+
+class ArtifactStore:
+    """
+    Disk cache of rendered exports. Files are written atomically so readers never see partial
+    output, and handed out as open file objects: eviction only unlinks the name, so a response
+    still streaming an evicted artifact keeps reading it.
+    """
+
+    def __init__(self, root: Path = EXPORT_CACHE_DIR, max_files: int = EXPORT_CACHE_MAX_FILES):
+        self.root = root
+        self.max_files = max_files
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(fmt: str, content: str, variant: str = "") -> str:
+        return hashlib.sha256(f"{fmt}\0{variant}\0{content}".encode("utf-8")).hexdigest()
+
+    def path(self, fmt: str, content: str, variant: str = "") -> Path:
+        return self.root / f"{self.key(fmt, content, variant)}.{fmt}"
+
+    def get(self, fmt: str, content: str, variant: str = ""):
+        """Returns the cached artifact opened for reading (the caller closes it), or None."""
+        path = self.path(fmt, content, variant)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # LRU touch
+        except OSError:
+            pass  # Evicted meanwhile: the open handle is still readable
+        return f
+
+    def put(self, fmt: str, content: str, fileobj, variant: str = ""):
+        """Copies a rendered file object (read from its start) into the store; returns it opened for reading."""
+        path = self.path(fmt, content, variant)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                fileobj.seek(0)
+                shutil.copyfileobj(fileobj, f)
+            stored = open(tmp_path, "rb")  # Opened before the rename: eviction cannot race us
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._evict()
+        return stored
+
+    def _evict(self):
+        files = [p for p in self.root.iterdir() if not p.name.endswith(".tmp")]
+        if len(files) <= self.max_files:
+            return
+        files.sort(key=lambda p: p.stat().st_mtime)
+        for old in files[:len(files) - self.max_files]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+def _cache_variant(fn) -> str:
+    """Renderer settings that change the output bytes (fn.cache_variant(), if it has one)."""
+    variant = getattr(fn, "cache_variant", None)
+    return variant() if variant else ""
+
+
+def _lower_thread_priority():
+    # Linux schedules threads individually: renice only the prefetch thread
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass
+
+
+class ExportService:
+    def __init__(self, max_workers: int = EXPORT_WORKERS):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self.store = ArtifactStore()
+
+        # Single low-priority lane for speculative renders
+        self.prefetch_enabled = EXPORT_PREFETCH_ENABLED
+        self.prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export-prefetch", initializer=_lower_thread_priority)
+        self._lock = threading.Lock()
+        self._interactive_inflight = 0
+        self._prefetch_queued = 0
+        self._prefetch_cpu = []  # (timestamp, cpu seconds) over the last minute
+        print(f"🖨️ ExportService initialized with {max_workers} workers (prefetch: {'on' if self.prefetch_enabled else 'off'})")
+
+    def submit(self, fn, *args):
+        """Schedules a render on the worker pool and returns a concurrent Future."""
+        return self.executor.submit(fn, *args)
+
+    async def run(self, fn, *args):
+        """Awaitable wrapper around submit() for use inside async endpoints."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def render_cached(self, fmt: str, fn, content: str):
+        """
+        Blocking render through the artifact store. `fn(content, output=...)` writes into a
+        SpooledTemporaryFile (on disk past EXPORT_SPOOL_MAX_BYTES). The renderers still build the
+        whole file in memory before writing it, so that limit only covers the copy held between
+        render and store, not the render itself.
+        Returns the cached artifact opened for reading, or the spool itself (rewound) if it
+        could not be stored. The caller closes it.
+        """
+        variant = _cache_variant(fn)
+        cached = self.store.get(fmt, content, variant)
+        if cached:
+            print(f"DEBUG: Export cache hit ({fmt})")
+            return cached
+        spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES)
+        try:
+            fn(content, output=spool)
+        except Exception:
+            spool.close()
+            raise
+        try:
+            stored = self.store.put(fmt, content, spool, variant)
+        except OSError as e:
+            print(f"⚠️ Export artifact not stored ({fmt}): {e}")
+            spool.seek(0)
+            return spool
+        spool.close()
+        return stored
+
+    async def render(self, fmt: str, fn, content: str):
+        """Interactive render: served from the artifact store when possible, else rendered on the pool."""
+        cached = self.store.get(fmt, content, _cache_variant(fn))
+        if cached:
+            print(f"DEBUG: Export cache hit ({fmt})")
+            return cached
+        return await asyncio.wrap_future(self.submit_render(fmt, fn, content))
+
+    def submit_render(self, fmt: str, fn, content: str):
+        """
+        Schedules an interactive render_cached() on the pool and returns its concurrent Future.
+        It counts as in flight (prefetch yields) until the future is done or cancelled.
+        """
+        with self._lock:
+            self._interactive_inflight += 1
+        future = self.submit(self.render_cached, fmt, fn, content)
+        future.add_done_callback(self._interactive_done)
+        return future
+
+    def _interactive_done(self, _future):
+        with self._lock:
+            self._interactive_inflight -= 1
+
+    # --- Prefetch ---
+
+    def _prefetch_budget_left(self) -> float:
+        cutoff = time.monotonic() - 60
+        with self._lock:
+            self._prefetch_cpu = [(t, s) for t, s in self._prefetch_cpu if t >= cutoff]
+            return PREFETCH_CPU_BUDGET - sum(s for _, s in self._prefetch_cpu)
+
+    def _run_prefetch(self, fmt: str, fn, content: str):
+        try:
+            # Yield to interactive exports: wait until the pool is idle, give up after PREFETCH_MAX_WAIT
+            deadline = time.monotonic() + PREFETCH_MAX_WAIT
+            while self._interactive_inflight > 0:
+                if time.monotonic() > deadline:
+                    print(f"DEBUG: Prefetch {fmt} dropped (interactive exports busy)")
+                    return
+                time.sleep(0.2)
+
+            if self._prefetch_budget_left() <= 0:
+                print(f"DEBUG: Prefetch {fmt} dropped (CPU budget exhausted)")
+                return
+            cached = self.store.get(fmt, content, _cache_variant(fn))
+            if cached:
+                cached.close()
+                return
+
+            started = time.thread_time()
+            self.render_cached(fmt, fn, content).close()
+            with self._lock:
+                self._prefetch_cpu.append((time.monotonic(), time.thread_time() - started))
+        except Exception as e:
+            print(f"⚠️ Prefetch {fmt} failed: {e}")
+        finally:
+            with self._lock:
+                self._prefetch_queued -= 1
+
+    def prefetch(self, fmt: str, fn, content: str) -> bool:
+        """Schedules a best-effort background render. Returns False when skipped."""
+        if not self.prefetch_enabled or not content:
+            return False
+        with self._lock:
+            if self._prefetch_queued >= PREFETCH_MAX_QUEUE:
+                return False
+            self._prefetch_queued += 1
+        self.prefetch_executor.submit(self._run_prefetch, fmt, fn, content)
+        return True
+
+    def shutdown(self):
+        self.prefetch_executor.shutdown(wait=False, cancel_futures=True)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+export_service = ExportService()
@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import random
+import threading
+import httplib2
+import google.oauth2.credentials
+import google_auth_httplib2
+from googleapiclient import discovery, discovery_cache
+from googleapiclient.errors import HttpError
+
+GOOGLE_TOKEN_URI = "https://oauth2.googleapis.com/token"
+GOOGLE_API_TIMEOUT = float(os.getenv("GOOGLE_API_TIMEOUT", "30"))
+GOOGLE_API_MAX_RETRIES = int(os.getenv("GOOGLE_API_MAX_RETRIES", "5"))
+GOOGLE_API_BACKOFF_BASE = float(os.getenv("GOOGLE_API_BACKOFF_BASE", "1.0"))
+GOOGLE_API_BACKOFF_MAX = float(os.getenv("GOOGLE_API_BACKOFF_MAX", "32"))
+
+_RATE_LIMIT_REASONS = ("ratelimitexceeded", "userratelimitexceeded", "resource_exhausted", "quota")
+
+
+def get_credentials(token: str, refresh_token: str = None):
+    """Google user credentials, refreshed automatically when a refresh token is given."""
+    return google.oauth2.credentials.Credentials(
+        token,
+        refresh_token=refresh_token,
+        token_uri=GOOGLE_TOKEN_URI,
+        client_id=os.getenv("GOOGLE_CLIENT_ID"),
+        client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
+    )
+
+
+def is_rate_limited(error: HttpError) -> bool:
+    """429, or a 403 whose reason is a rate limit: the request was rejected, not applied."""
+    status = error.resp.status
+    if status == 429:
+        return True
+    return status == 403 and any(reason in str(error.content).lower() for reason in _RATE_LIMIT_REASONS)
+
+
+class Backoff:
+    """
+    Exponential backoff with jitter, shared by the workers of one batch: when one of them is
+    rate limited, the others also hold their next call until the pause is over.
+    Retry-After is honoured when Google sends it.
+    """
+    def __init__(self, retries: int = GOOGLE_API_MAX_RETRIES, base: float = GOOGLE_API_BACKOFF_BASE,
+                 maximum: float = GOOGLE_API_BACKOFF_MAX, sleep=time.sleep):
+        self.retries = retries
+        self.base = base
+        self.maximum = maximum
+        self.sleep = sleep
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def execute(self, request):
+        """request.execute(), retried only while rate limited (Forms writes are not idempotent)."""
+        for attempt in range(self.retries + 1):
+            self._wait()
+            try:
+                return request.execute()
+            except HttpError as e:
+                if not is_rate_limited(e) or attempt == self.retries:
+                    raise
+                self.pause(attempt, e.resp.get("retry-after"))
+
+    def pause(self, attempt: int, retry_after: str = None):
+        """Holds the next calls of every worker for the backoff delay of this attempt."""
+        delay = min(self.maximum, self.base * 2 ** attempt) * (0.5 + random.random() / 2)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        print(f"⚠️ Google API rate limited, retrying in {delay:.1f} s ({attempt + 1}/{self.retries})")
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+    def _wait(self):
+        with self._lock:
+            pause = self._resume_at - time.monotonic()
+        if pause > 0:
+            self.sleep(pause)
+
+
+class GoogleApiFactory:
+    """
+    Builds Google API clients without the per-request cost of `discovery.build`:
+      - discovery documents come from the copies bundled with google-api-python-client
+        (no network), parsed once per API/version and kept in memory
+      - a client is then a thin Resource over that document, bound to the user's credentials
+      - HTTP goes through one httplib2.Http per thread (httplib2 is not thread-safe), so
+        the TLS connections to googleapis.com are reused across requests
+    """
+    def __init__(self, timeout: float = GOOGLE_API_TIMEOUT, endpoints: dict = None):
+        self.timeout = timeout
+        self.endpoints = endpoints or {}  # {api: root URL}, to target another server (tests)
+        self._documents = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def document(self, api: str, version: str) -> dict:
+        key = (api, version)
+        document = self._documents.get(key)
+        if document is None:
+            with self._lock:
+                document = self._documents.get(key)
+                if document is None:
+                    document = self._load_document(api, version)
+                    self._documents[key] = document
+        return document
+
+    def _load_document(self, api: str, version: str) -> dict:
+        static = discovery_cache.get_static_doc(api, version)
+        if static is not None:
+            return json.loads(static)
+        # Not bundled with this library version: fetch it once
+        print(f"⚠️ No static discovery document for {api} {version}, fetching it")
+        return discovery.build(api, version, http=httplib2.Http(timeout=self.timeout), static_discovery=False)._rootDesc
+
+    def http(self) -> httplib2.Http:
+        """The calling thread's pooled transport."""
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = httplib2.Http(timeout=self.timeout)
+        return http
+
+    def service(self, api: str, version: str, credentials):
+        authorized = google_auth_httplib2.AuthorizedHttp(credentials, http=self.http())
+        document = self.document(api, version)
+        if api in self.endpoints:
+            # rootUrl also gives the batch endpoint, which client_options would not change
+            document = {**document, "rootUrl": self.endpoints[api], "mtlsRootUrl": self.endpoints[api]}
+        return discovery.build_from_document(document, http=authorized)
+
+    def classroom(self, token: str, refresh_token: str = None):
+        return self.service("classroom", "v1", get_credentials(token, refresh_token))
+
+    def forms(self, token: str, refresh_token: str = None):
+        return self.service("forms", "v1", get_credentials(token, refresh_token))
+
+
+google_api = GoogleApiFactory()
@@ -0,0 +1,79 @@
+import os
+import re
+import time
+import threading
+import requests
+from google.auth import jwt, exceptions
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+
+# Used when Google's response carries no usable Cache-Control max-age
+GOOGLE_CERTS_DEFAULT_TTL = int(os.getenv("GOOGLE_CERTS_DEFAULT_TTL", "3600"))
+# Unknown key ids trigger an early refresh (key rotation), at most once per interval
+GOOGLE_CERTS_MIN_REFRESH = int(os.getenv("GOOGLE_CERTS_MIN_REFRESH", "60"))
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class GoogleTokenVerifier:
+    """
+    Verifies Google ID tokens locally against Google's signing certificates.
+    Certificates are fetched once through a pooled requests.Session and kept for
+    the max-age announced by Google, instead of being downloaded on every login.
+    """
+    def __init__(self, certs_url: str = GOOGLE_CERTS_URL, session: requests.Session = None):
+        self.certs_url = certs_url
+        self.session = session or requests.Session()
+        self._certs = None
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _max_age(cache_control: str) -> int:
+        if cache_control:
+            match = _MAX_AGE_RE.search(cache_control)
+            if match:
+                return int(match.group(1))
+        return GOOGLE_CERTS_DEFAULT_TTL
+
+    def _refresh(self):
+        response = self.session.get(self.certs_url, timeout=10)
+        if response.status_code != 200:
+            raise exceptions.TransportError(f"Could not fetch certificates at {self.certs_url}")
+        self._certs = response.json()
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + self._max_age(response.headers.get("Cache-Control"))
+        print(f"🔑 Google certificates refreshed ({len(self._certs)} keys)")
+
+    def get_certs(self, kid: str = None) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            expired = self._certs is None or now >= self._expires_at
+            rotated = (
+                kid is not None
+                and self._certs is not None
+                and kid not in self._certs
+                and now - self._fetched_at >= GOOGLE_CERTS_MIN_REFRESH
+            )
+            if expired or rotated:
+                self._refresh()
+            return self._certs
+
+    def verify_oauth2_token(self, token, audience=None, clock_skew_in_seconds: int = 0):
+        """Drop-in replacement for google.oauth2.id_token.verify_oauth2_token (x509 certs only)."""
+        if isinstance(token, bytes):
+            token = token.decode("utf-8")
+        kid = jwt.decode_header(token).get("kid")
+        certs = self.get_certs(kid)
+
+        idinfo = jwt.decode(token, certs=certs, audience=audience, clock_skew_in_seconds=clock_skew_in_seconds)
+        if idinfo["iss"] not in GOOGLE_ISSUERS:
+            raise exceptions.GoogleAuthError(
+                f"Wrong issuer. 'iss' should be one of the following: {GOOGLE_ISSUERS}"
+            )
+        return idinfo
+
+
+google_token_verifier = GoogleTokenVerifier()
@@ -0,0 +1,186 @@
+import os
+import re
+import json
+from concurrent.futures import ThreadPoolExecutor
+from .gemini_service import gemini_service
+from .google_api import Backoff, google_api
+from .quiz_parser import parse_quiz
+
+# Forms created at the same time for one teacher (Forms API quota is per user)
+GOOGLE_FORMS_CONCURRENCY = int(os.getenv("GOOGLE_FORMS_CONCURRENCY", "4"))
+GOOGLE_FORMS_BATCH_MAX = int(os.getenv("GOOGLE_FORMS_BATCH_MAX", "20"))
+
+
+def local_questions(content: str):
+    """
+    Questions in the Forms shape ({title, options, correct_solution}) read with quiz_parser,
+    or None when the Markdown is not a plain multiple-choice quiz (Gemini converts it then).
+    """
+    questions = parse_quiz(content)["questions"]
+    if not questions or any(len(q["options"]) < 2 for q in questions):
+        return None
+    return [
+        {
+            "title": q["text"] or f"Question {q['number']}",
+            "options": list(q["options"].values()),
+            "correct_solution": q["options"].get(q["answer"]) if q["answer"] else None,
+        }
+        for q in questions
+    ]
+
+
+def gemini_questions(content: str):
+    prompt = f"""
+    Tu es un expert en éducation. Transforme ce quiz (format Markdown) en un tableau JSON strict pour créer un Google Form.
+    Structure attendue pour chaque question :
+    {{
+        "title": "Le texte de la question",
+        "options": ["Option A", "Option B", "Option C", "Option D"],
+        "correct_solution": "Option A" (Le texte exact de la bonne réponse, ou null si non précisé)
+    }}
+
+    Quiz Markdown :
+    {content}
+
+    Règles :
+    - JSON Valid uniquement.
+    - Pas de ```json au début ou à la fin. Juste le tableau [ ... ].
+    """
+
+    response = gemini_service.client.models.generate_content(
+        model=gemini_service.model_name,
+        contents=prompt
+    )
+
+    cleaned_json = response.text.replace('```json', '').replace('```', '').strip()
+    # Handle potential leading/trailing whitespace or text
+    match = re.search(r'\[.*\]', cleaned_json, re.DOTALL)
+    if match:
+        cleaned_json = match.group(0)
+    return json.loads(cleaned_json)
+
+
+def quiz_questions(content: str):
+    return local_questions(content) or gemini_questions(content)
+
+
+def question_item(index: int, q: dict) -> dict:
+    """createItem request for one multiple-choice question, graded when its answer is known."""
+    # Prepare options with grading if correct_solution found
+    options_List = []
+    valid_option_values = set()
+    clean_correct = str(q.get('correct_solution')).strip() if q.get('correct_solution') else None
+
+    for opt_text in q.get('options', []):
+        clean_opt = str(opt_text).strip()
+        if clean_opt and clean_opt not in valid_option_values: # Forms rejects empty and duplicate options
+            options_List.append({"value": clean_opt})
+            valid_option_values.add(clean_opt)
+
+    # FAILSAFE: Google API requires at least 1 option
+    if not options_List:
+        print(f"⚠️ Warning: Question '{q.get('title')}' has no options. Adding placeholder.")
+        options_List.append({"value": "Vrai"})
+        options_List.append({"value": "Faux"})
+        valid_option_values.add("Vrai")
+        valid_option_values.add("Faux")
+
+    # Validation: Ensure Correct Answer is in Options
+    final_correct_value = None
+    if clean_correct:
+        if clean_correct in valid_option_values:
+            final_correct_value = clean_correct
+        else:
+            # Fallback 1: Case-insensitive check
+            found_match = None
+            for val in valid_option_values:
+                if val.lower() == clean_correct.lower():
+                    found_match = val
+                    break
+
+            if found_match:
+                final_correct_value = found_match
+            else:
+                # Fallback 2: Append missing correct answer
+                print(f"⚠️ Fixing: Correct answer '{clean_correct}' missing from options. Appending it.")
+                options_List.append({"value": clean_correct})
+                final_correct_value = clean_correct
+
+    question = {
+        "required": True,
+        "choiceQuestion": {
+            "type": "RADIO",
+            "options": options_List,
+            "shuffle": True
+        }
+    }
+    if final_correct_value:
+        question["grading"] = {
+            "pointValue": 1,
+            "correctAnswers": {
+                "answers": [{"value": final_correct_value}]
+            }
+        }
+    return {
+        "createItem": {
+            "item": {
+                "title": q.get('title', f"Question {index+1}"),
+                "questionItem": {"question": question}
+            },
+            "location": {
+                "index": index
+            }
+        }
+    }
+
+
+def create_form(form_service, title: str, questions, backoff: Backoff = None) -> dict:
+    """
+    Two round trips, the minimum the Forms API allows (forms.create only accepts the title):
+    create the form, then one batchUpdate that turns on quiz mode and adds every question.
+    """
+    backoff = backoff or Backoff()
+    form = backoff.execute(form_service.forms().create(body={
+        "info": {
+            "title": title,
+            "documentTitle": title
+        }
+    }))
+    form_id = form['formId']
+
+    requests = [{
+        "updateSettings": {
+            "settings": {
+                "quizSettings": {
+                    "isQuiz": True
+                }
+            },
+            "updateMask": "quizSettings.isQuiz"
+        }
+    }]
+    requests.extend(question_item(index, q) for index, q in enumerate(questions))
+    backoff.execute(form_service.forms().batchUpdate(formId=form_id, body={"requests": requests}))
+
+    return {"url": form["responderUri"], "edit_url": f"https://docs.google.com/forms/d/{form_id}/edit", "id": form_id}
+
+
+def create_forms(token: str, refresh_token: str, quizzes, factory=google_api,
+                 concurrency: int = GOOGLE_FORMS_CONCURRENCY, backoff: Backoff = None):
+    """
+    Creates one form per {"title", "content"} quiz, `concurrency` at a time, with one shared
+    backoff (same user, same quota). Returns one result per quiz, in order: the form links,
+    or {"title", "error"} when that quiz failed.
+    """
+    backoff = backoff or Backoff()
+
+    def publish(quiz):
+        try:
+            # Built in the worker thread: each thread has its own HTTP transport
+            service = factory.forms(token, refresh_token)
+            return {"title": quiz["title"], **create_form(service, quiz["title"], quiz_questions(quiz["content"]), backoff)}
+        except Exception as e:
+            print(f"❌ Google Forms Error ({quiz['title']}): {e}")
+            return {"title": quiz["title"], "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(quizzes)))) as pool:
+        return list(pool.map(publish, quizzes))
@@ -0,0 +1,92 @@
+import os
+import secrets
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from .. import models
+from .activity_service import activity_sink
+
+# Share codes are typed by students: no 0/O or 1/I. 32^8 ≈ 10^12 codes, so a collision on the
+# unique index is rare enough to be handled by retrying, without looking codes up first.
+SHARE_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+SHARE_CODE_LENGTH = int(os.getenv("SHARE_CODE_LENGTH", "8"))
+SHARE_CODE_MAX_ATTEMPTS = 5
+
+
+def new_share_code() -> str:
+    return "".join(secrets.choice(SHARE_CODE_ALPHABET) for _ in range(SHARE_CODE_LENGTH))
+
+
+def _is_share_code_conflict(error: IntegrityError) -> bool:
+    # SQLite: "UNIQUE constraint failed: published_quizzes.share_code"
+    # PostgreSQL: duplicate key value violates unique constraint "ix_published_quizzes_share_code"
+    return "share_code" in str(error.orig).lower()
+
+
+def publish_quizzes(db, items, owner_id=None, admin=False):
+    """
+    Publishes [(log_id, title, content)] in one transaction and returns [(log_id, user_id, share_code, created)].
+    A log published before keeps its code and its quiz is updated (created=False), only on behalf
+    of the quiz's author (owner_id) or an admin.
+    New quizzes get random codes and are inserted directly; if the unique index rejects one,
+    the transaction is rolled back and replayed with new codes.
+    Raises LookupError(log_id) if a log does not exist, or does not belong to owner_id when given
+    (unless admin), PermissionError(log_id) if its quiz would be overwritten by someone else than
+    its author, and RuntimeError if a log buffered in this worker could not be written yet.
+    """
+    log_ids = [log_id for log_id, _, _ in items]
+    # A quiz is often published right after its generation: its log may still be buffered
+    unwritten = activity_sink.ensure_written(log_ids)
+    if unwritten:
+        raise RuntimeError(f"Activity log {min(unwritten)} not written yet")
+    for attempt in range(SHARE_CODE_MAX_ATTEMPTS):
+        logs = {log.id: log for log in db.query(models.ActivityLog).filter(models.ActivityLog.id.in_(log_ids))}
+        missing = [log_id for log_id in log_ids if log_id not in logs]
+        if missing:
+            raise LookupError(missing[0])
+        if owner_id is not None and not admin:
+            foreign = [log_id for log_id in log_ids if logs[log_id].user_id != owner_id]
+            if foreign:
+                raise LookupError(foreign[0])
+
+        previous_codes = [log.share_code for log in logs.values() if log.share_code]
+        existing = {}
+        if previous_codes:
+            existing = {quiz.share_code: quiz for quiz in db.query(models.PublishedQuiz).filter(
+                models.PublishedQuiz.share_code.in_(previous_codes)
+            )}
+        if not admin:
+            # Quizzes published before the author was recorded belong to their log's author
+            overwritten = [log_id for log_id in log_ids if logs[log_id].share_code in existing]
+            denied = [log_id for log_id in overwritten if owner_id is None
+                      or (existing[logs[log_id].share_code].user_id or logs[log_id].user_id) != owner_id]
+            if denied:
+                raise PermissionError(denied[0])
+
+        now = datetime.utcnow()
+        published = []
+        batch_codes = set()
+        for log_id, title, content in items:
+            log = logs[log_id]
+            quiz = existing.get(log.share_code)
+            if quiz is not None:
+                quiz.title = title
+                quiz.content = content
+                published.append((log.id, log.user_id, quiz.share_code, False))
+            else:
+                code = new_share_code()
+                while code in batch_codes:
+                    code = new_share_code()
+                batch_codes.add(code)
+                db.add(models.PublishedQuiz(share_code=code, title=title, content=content, user_id=log.user_id))
+                log.share_code = code
+                published.append((log.id, log.user_id, code, True))
+            log.is_published = now
+
+        try:
+            db.commit()
+            return published
+        except IntegrityError as e:
+            db.rollback()
+            if not _is_share_code_conflict(e) or attempt == SHARE_CODE_MAX_ATTEMPTS - 1:
+                raise
+            print(f"⚠️ Share code collision, retrying ({attempt + 1}/{SHARE_CODE_MAX_ATTEMPTS})")
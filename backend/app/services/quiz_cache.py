@@ -0,0 +1,152 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# Published quizzes are served from pre-serialized JSON: memory first, then disk (shared by the
+# workers of a host and kept across restarts), then the database on a miss. Entries are keyed by
+# the quiz version stored in the database (published_quizzes.updated_at), checked on every read,
+# so a re-publish handled by any worker or host is seen everywhere.
+QUIZ_CACHE_DIR = Path(os.getenv("QUIZ_CACHE_DIR", os.path.join(tempfile.gettempdir(), "profvirtuel_quizzes")))
+QUIZ_CACHE_MAX_FILES = int(os.getenv("QUIZ_CACHE_MAX_FILES", "5000"))
+QUIZ_CACHE_MEMORY_ENTRIES = int(os.getenv("QUIZ_CACHE_MEMORY_ENTRIES", "500"))
+# Browsers reuse a quiz for max-age, then revalidate it with If-None-Match (304, no body).
+# Kept short: a re-published answer key must reach the students before they submit.
+QUIZ_HTTP_MAX_AGE = int(os.getenv("QUIZ_HTTP_MAX_AGE", "60"))
+QUIZ_CACHE_CONTROL = f"public, max-age={QUIZ_HTTP_MAX_AGE}"
+
+# Share codes become file names: anything else is rejected before touching the disk
+_CODE_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def is_valid_code(code: str) -> bool:
+    return bool(_CODE_RE.match(code or ""))
+
+
+# Part of every version: bumped when the served payload changes, so that copies left on disk
+# by an older release are not served (2: answer key removed from "content")
+QUIZ_PAYLOAD_FORMAT = "2"
+
+
+def quiz_version(updated_at) -> str:
+    """Cache version of a published quiz, from its updated_at column."""
+    return f"{QUIZ_PAYLOAD_FORMAT}-" + (updated_at.strftime("%Y%m%d%H%M%S%f") if updated_at else "0")
+
+
+class CachedQuiz:
+    __slots__ = ("body", "etag", "version")
+
+    def __init__(self, body: bytes, version: str):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.version = version
+
+
+class QuizCache:
+    """
+    Read-through cache of GET /api/student/quiz/{code} responses, keyed by share code and version.
+    The caller reads the current version from the database (see quiz_version); older copies, in
+    memory or on disk, are never served again and are removed on the next put.
+    """
+
+    def __init__(self, root: Path = QUIZ_CACHE_DIR, max_files: int = QUIZ_CACHE_MAX_FILES,
+                 memory_entries: int = QUIZ_CACHE_MEMORY_ENTRIES):
+        self.root = root
+        self.max_files = max_files
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()  # code -> CachedQuiz
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, code: str, version: str) -> Path:
+        return self.root / f"{code}.{version}.json"
+
+    def _versions(self, code: str):
+        try:
+            return list(self.root.glob(f"{code}.*.json"))
+        except OSError:
+            return []
+
+    def _remember(self, code: str, entry: CachedQuiz):
+        with self._lock:
+            self._memory[code] = entry
+            self._memory.move_to_end(code)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, code: str, version: str):
+        """Returns the CachedQuiz of this version, or None on a miss (the caller loads the quiz and calls put)."""
+        if not is_valid_code(code):
+            return None
+        with self._lock:
+            entry = self._memory.get(code)
+            if entry is not None and entry.version == version:
+                self._memory.move_to_end(code)
+                return entry
+        try:
+            entry = CachedQuiz(self._path(code, version).read_bytes(), version)
+        except OSError:
+            return None
+        self._remember(code, entry)
+        return entry
+
+    def put(self, code: str, version: str, payload: dict) -> CachedQuiz:
+        """Serializes and stores a quiz (publish / re-publish / miss). Disk errors only cost a cache miss."""
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        entry = CachedQuiz(body, version)
+        if not is_valid_code(code):
+            return entry
+        self._remember(code, entry)
+        path = self._path(code, version)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(body)
+                os.replace(tmp_path, path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            print(f"⚠️ Quiz cache write failed for {code}: {e}")
+            return entry
+        for old in self._versions(code):
+            if old != path:
+                try:
+                    old.unlink()
+                except OSError:
+                    pass
+        self._evict()
+        return entry
+
+    def invalidate(self, code: str):
+        with self._lock:
+            self._memory.pop(code, None)
+        if is_valid_code(code):
+            for path in self._versions(code):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def _evict(self):
+        try:
+            files = [p for p in self.root.iterdir() if p.suffix == ".json"]
+            if len(files) <= self.max_files:
+                return
+            files.sort(key=lambda p: p.stat().st_mtime)
+        except OSError:
+            return  # another worker is evicting at the same time
+        for old in files[:len(files) - self.max_files]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+quiz_cache = QuizCache()
@@ -0,0 +1,158 @@
+import re
+
+# Generated quizzes are free-form Markdown (see the "quiz" prompt in routers/generate.py):
+# numbered questions with lettered options, then a "Corrigé" section giving the right letter.
+# Questions without options (open questions) are accepted in submissions but not graded.
+
+_QUESTION_RE = re.compile(
+    r"^\s*(?:#{1,6}\s*)?(?:\*\*|__)?\s*(?:Question|Q)?\s*(\d{1,3})\s*(?:\*\*|__)?\s*(?:[.)°:]|\s[-–—])\s*(?:\*\*|__)?\s*(.*)$",
+    re.IGNORECASE,
+)
+_OPTION_RE = re.compile(r"^\s*(?:[-*•+]\s*)?(?:\*\*)?\(?([A-Fa-f])\s?[).:](?:\*\*)?\s+(.+)$")
+_KEY_HEADING_RE = re.compile(
+    r"^\s*(?:#{1,6}\s*|\*\*(?!\s*(?:Question|Q)?\s*\d)).*(?:corrig|r[ée]ponses|solutions)", re.IGNORECASE
+)
+_ANSWER_RE = re.compile(
+    r"r[ée]ponse(?:\s+(?:correcte|attendue|juste|exacte))?\s*(?:\*\*)?\s*[:=]?\s*(?:\*\*)?\s*\(?([A-Fa-f])\b",
+    re.IGNORECASE,
+)
+_LETTER_RE = re.compile(r"(?:^|[\s*(])([A-F])(?:[).]|\*\*)(?=\s|\*|$)")
+_BARE_LETTER_RE = re.compile(r"^\s*(?:\*\*)?\(?([A-Fa-f])\)?(?:\*\*)?\.?\s*$")
+
+
+def _clean(text: str) -> str:
+    return re.sub(r"[*_]{2}", "", text).strip()
+
+
+def _split_blocks(lines, ordered: bool):
+    """Groups lines under the numbered question that precedes them: [(number, first line rest, lines)]."""
+    blocks = []
+    for line in lines:
+        match = _QUESTION_RE.match(line)
+        if match and not _OPTION_RE.match(line):
+            number = int(match.group(1))
+            # Numbered lists inside a question or an explanation (steps, criteria...) must not start
+            # a new one: in the questions section numbers follow each other, in the key each appears once
+            if ordered:
+                is_question = not blocks or number == blocks[-1][0] + 1
+            else:
+                is_question = all(block[0] != number for block in blocks)
+            if is_question:
+                blocks.append((number, match.group(2), []))
+                continue
+        if blocks:
+            blocks[-1][2].append(line)
+    return blocks
+
+
+def _find_answer(block_lines, options, in_key: bool = False) -> str:
+    text = "\n".join(block_lines)
+    for match in _ANSWER_RE.finditer(text):
+        letter = match.group(1).upper()
+        if letter in options:
+            return letter
+    for line in block_lines:
+        if not in_key and _OPTION_RE.match(line):
+            continue  # under the question, "A) ..." lists an option, it does not give the answer
+        bare = _BARE_LETTER_RE.match(line)
+        if bare and bare.group(1).upper() in options:
+            return bare.group(1).upper()
+        for match in _LETTER_RE.finditer(line):
+            if match.group(1) in options:
+                return match.group(1)
+    return None
+
+
+def _key_start(lines) -> int:
+    """Index of the answer key heading ("Corrigé", "Réponses"...), or len(lines) if there is none."""
+    return next((i for i, line in enumerate(lines) if i > 0 and _KEY_HEADING_RE.match(line)), len(lines))
+
+
+def parse_quiz(content: str) -> dict:
+    """
+    Returns {"questions": [{"number", "text", "options": {letter: text}, "answer": letter or None}]}.
+    `answer` comes from the answer key section (or from a "Réponse : X" line under the question).
+    """
+    lines = (content or "").splitlines()
+    key_start = _key_start(lines)
+
+    questions = []
+    for number, first, body in _split_blocks(lines[:key_start], ordered=True):
+        options = {}
+        text_lines = [first] if first.strip() else []
+        for line in body:
+            option = _OPTION_RE.match(line)
+            if option:
+                options[option.group(1).upper()] = _clean(option.group(2))
+            elif not options and line.strip() and not _KEY_HEADING_RE.match(line):
+                text_lines.append(line)
+        questions.append({
+            "number": number,
+            "text": _clean(" ".join(text_lines)),
+            "options": options,
+            "answer": _find_answer(body, options) if options else None,
+        })
+
+    by_number = {q["number"]: q for q in questions}
+    for number, first, body in _split_blocks(lines[key_start:], ordered=False):
+        question = by_number.get(number)
+        if question and question["options"]:
+            answer = _find_answer([first] + body, question["options"], in_key=True)
+            if answer:
+                question["answer"] = answer
+    return {"questions": questions}
+
+
+def student_content(content: str) -> str:
+    """
+    Quiz Markdown shown to students: the answer key section is cut off, and so are the
+    "Réponse : X" lines given under a question's options.
+    """
+    lines = (content or "").splitlines()
+    kept, in_options = [], False
+    for line in lines[:_key_start(lines)]:
+        if _OPTION_RE.match(line):
+            in_options = True
+        elif _QUESTION_RE.match(line):
+            in_options = False
+        elif in_options and _ANSWER_RE.search(line):
+            continue
+        kept.append(line)
+    return "\n".join(kept).rstrip()
+
+
+def public_questions(parsed: dict) -> list:
+    """Question structure sent to students (no answers)."""
+    return [
+        {"number": q["number"], "text": q["text"], "options": q["options"]}
+        for q in parsed["questions"]
+    ]
+
+
+def grade(parsed: dict, answers: dict):
+    """
+    Grades {question number: letter or text}. Raises ValueError on an unknown question or option.
+    Returns (details, score, total) where total counts the questions that have an answer key.
+    Details are sent back to the student: they say whether each answer is right, never which one is.
+    """
+    questions = {q["number"]: q for q in parsed["questions"]}
+    for number, value in answers.items():
+        question = questions.get(number)
+        if question is None:
+            raise ValueError(f"Question inconnue : {number}")
+        if question["options"] and str(value).strip().upper() not in question["options"]:
+            raise ValueError(f"Réponse invalide pour la question {number}")
+
+    details = []
+    score = total = 0
+    for number, question in questions.items():
+        given = answers.get(number)
+        if question["options"] and given is not None:
+            given = str(given).strip().upper()
+        correct = None
+        if question["answer"]:
+            total += 1
+            correct = given == question["answer"]
+            score += int(correct)
+        details.append({"question": number, "answer": given, "correct": correct})
+    return details, score, total
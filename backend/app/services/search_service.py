@@ -0,0 +1,138 @@
+import re
+from sqlalchemy import column, delete, event, select, table, text
+from .. import models
+
+# Full-text index over saved documents (title + content) and activity topics.
+# search_entries maps (kind, ref) to an integer id shared with the engine-specific index:
+#   SQLite      search_fts FTS5 table (rowid = search_entries.id), bm25 ranking; its `owner`
+#               column holds owner_token(user_id), so MATCH itself keeps to one user's entries
+#   PostgreSQL  search_entries.tsv tsvector + GIN index, ts_rank ranking
+# Bodies are stored compressed, so the index is fed from application code, not SQL triggers.
+
+KIND_DOCUMENT = "document"
+KIND_ACTIVITY = "activity"
+
+PG_CONFIG = "french"
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _is_sqlite(conn) -> bool:
+    return conn.dialect.name == "sqlite"
+
+
+def owner_token(user_id: str) -> str:
+    """A single FTS5 token per user id (ids contain '-', which the tokenizer splits on)."""
+    return "u" + (user_id or "").encode("utf-8").hex()
+
+
+def _entry_id(conn, kind: str, ref: str, user_id: str) -> int:
+    entry_id = conn.execute(
+        text("SELECT id FROM search_entries WHERE kind = :kind AND ref = :ref"), {"kind": kind, "ref": ref}
+    ).scalar()
+    if entry_id is None:
+        conn.execute(
+            text("INSERT INTO search_entries (kind, ref, user_id) VALUES (:kind, :ref, :user_id)"),
+            {"kind": kind, "ref": ref, "user_id": user_id},
+        )
+        entry_id = conn.execute(
+            text("SELECT id FROM search_entries WHERE kind = :kind AND ref = :ref"), {"kind": kind, "ref": ref}
+        ).scalar()
+    return entry_id
+
+
+def index_entry(conn, kind: str, ref: str, user_id: str, title: str, body: str = ""):
+    """Adds or replaces one entry. Runs on the caller's connection, inside its transaction."""
+    entry_id = _entry_id(conn, kind, str(ref), user_id)
+    params = {"id": entry_id, "title": title or "", "body": body or "", "owner": owner_token(user_id)}
+    if _is_sqlite(conn):
+        conn.execute(text("DELETE FROM search_fts WHERE rowid = :id"), {"id": entry_id})
+        conn.execute(text(
+            "INSERT INTO search_fts (rowid, title, body, owner) VALUES (:id, :title, :body, :owner)"
+        ), params)
+    else:
+        conn.execute(text(
+            f"UPDATE search_entries SET tsv = setweight(to_tsvector('{PG_CONFIG}', :title), 'A') || "
+            f"setweight(to_tsvector('{PG_CONFIG}', :body), 'B') WHERE id = :id"
+        ), params)
+
+
+def remove_entry(conn, kind: str, ref: str):
+    entry_id = conn.execute(
+        text("SELECT id FROM search_entries WHERE kind = :kind AND ref = :ref"), {"kind": kind, "ref": str(ref)}
+    ).scalar()
+    if entry_id is None:
+        return
+    if _is_sqlite(conn):
+        conn.execute(text("DELETE FROM search_fts WHERE rowid = :id"), {"id": entry_id})
+    conn.execute(text("DELETE FROM search_entries WHERE id = :id"), {"id": entry_id})
+
+
+def remove_entries(conn, kind: str, refs):
+    """Bulk removal (archived activity logs)."""
+    refs = [str(ref) for ref in refs]
+    for start in range(0, len(refs), 500):
+        params = {"kind": kind, **{f"r{i}": ref for i, ref in enumerate(refs[start:start + 500])}}
+        placeholders = ", ".join(f":r{i}" for i in range(len(params) - 1))
+        if _is_sqlite(conn):
+            conn.execute(text(
+                f"DELETE FROM search_fts WHERE rowid IN (SELECT id FROM search_entries WHERE kind = :kind AND ref IN ({placeholders}))"
+            ), params)
+        conn.execute(text(f"DELETE FROM search_entries WHERE kind = :kind AND ref IN ({placeholders})"), params)
+
+
+def remove_user_entries(conn, user_ids):
+    """Drops every entry of deleted accounts: user_ids is a list or a SELECT of ids."""
+    entries = models.SearchEntry.__table__
+    owned = entries.c.user_id.in_(user_ids)
+    if _is_sqlite(conn):
+        fts = table("search_fts", column("rowid"))
+        conn.execute(delete(fts).where(fts.c.rowid.in_(select(entries.c.id).where(owned))))
+    conn.execute(delete(entries).where(owned))
+
+
+def index_document(db, doc: models.SavedDocument, content: str = None):
+    index_entry(db.connection(), KIND_DOCUMENT, doc.id, doc.user_id, doc.title,
+                content if content is not None else doc.content)
+
+
+def remove_document(db, doc_id: str):
+    remove_entry(db.connection(), KIND_DOCUMENT, doc_id)
+
+
+@event.listens_for(models.ActivityLog, "after_insert")
+def _index_activity_log(mapper, connection, target):
+    if target.user_id and target.topic:
+        index_entry(connection, KIND_ACTIVITY, target.id, target.user_id, target.topic)
+
+
+def _query_terms(query: str):
+    return [w.lower() for w in _WORD_RE.findall(query or "")][:12]
+
+
+def search(db, user_id: str, query: str, limit: int = 20):
+    """Ranked prefix search over the user's documents and activity topics. Returns [(kind, ref, rank)]."""
+    terms = _query_terms(query)
+    if not terms:
+        return []
+    conn = db.connection()
+    if _is_sqlite(conn):
+        # The user's entries only, every term matching as a prefix of the title or body;
+        # title matches weigh 10x the body
+        terms_match = " ".join(f'"{term}"*' for term in terms)
+        match = f'owner : "{owner_token(user_id)}" AND {{title body}} : ({terms_match})'
+        rows = conn.execute(text(
+            """SELECT e.kind, e.ref, bm25(search_fts, 10.0, 1.0, 0.0) AS rank
+            FROM search_fts JOIN search_entries e ON e.id = search_fts.rowid
+            WHERE search_fts MATCH :match
+            ORDER BY rank LIMIT :limit"""
+        ), {"match": match, "limit": limit}).fetchall()
+        return [(row.kind, row.ref, -row.rank) for row in rows]
+
+    tsquery = " & ".join(f"{term}:*" for term in terms)
+    rows = conn.execute(text(
+        f"""SELECT kind, ref, ts_rank(tsv, to_tsquery('{PG_CONFIG}', :q)) AS rank
+        FROM search_entries
+        WHERE user_id = :user_id AND tsv @@ to_tsquery('{PG_CONFIG}', :q)
+        ORDER BY rank DESC LIMIT :limit"""
+    ), {"q": tsquery, "user_id": user_id, "limit": limit}).fetchall()
+    return [(row.kind, row.ref, row.rank) for row in rows]
@@ -0,0 +1,135 @@
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import event, update
+from sqlalchemy.dialects import postgresql, sqlite
+from .. import models
+
+# Dashboard activity section (rollup + recent + published) is cached briefly per user
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "15"))
+DASHBOARD_PUBLISHED_LIMIT = int(os.getenv("DASHBOARD_PUBLISHED_LIMIT", "50"))
+# "Recent" activity is looked up in this window first, so only the latest partitions are scanned
+ACTIVITY_RECENT_WINDOW_DAYS = int(os.getenv("ACTIVITY_RECENT_WINDOW_DAYS", "90"))
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def increment_user_stats(connection, user_id: str, document_type: str, target_block: str, amount: int = 1):
+    """Adds `amount` to the user's counters for this document type and block (upsert)."""
+    stat = models.UserStat.__table__
+    insert = _UPSERT_DIALECTS.get(connection.dialect.name)
+    for dimension, key in (("type", document_type or ""), ("block", target_block or "")):
+        if insert is not None:
+            stmt = insert(stat).values(user_id=user_id, dimension=dimension, key=key, count=amount)
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=[stat.c.user_id, stat.c.dimension, stat.c.key],
+                set_={"count": stat.c.count + amount},
+            ))
+        else:
+            result = connection.execute(
+                update(stat)
+                .where(stat.c.user_id == user_id, stat.c.dimension == dimension, stat.c.key == key)
+                .values(count=stat.c.count + amount)
+            )
+            if result.rowcount == 0:
+                connection.execute(stat.insert().values(user_id=user_id, dimension=dimension, key=key, count=amount))
+
+
+@event.listens_for(models.ActivityLog, "after_insert")
+def _rollup_activity_log(mapper, connection, target):
+    # Runs in the same transaction as the INSERT: the rollup commits or rolls back with the log
+    if target.user_id:
+        increment_user_stats(connection, target.user_id, target.document_type, target.target_block)
+
+
+class DashboardCache:
+    """Short-TTL cache of the per-user activity section of /api/dashboard/stats."""
+    def __init__(self, ttl: float = DASHBOARD_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}  # user_id -> (expires_at, payload)
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] >= time.monotonic():
+                return entry[1]
+            self._entries.pop(user_id, None)
+            return None
+
+    def put(self, user_id: str, payload: dict):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if len(self._entries) > 10000:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[0] >= now}
+            self._entries[user_id] = (time.monotonic() + self.ttl, payload)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+dashboard_cache = DashboardCache()
+
+
+def get_activity_stats(db, user_id: str) -> dict:
+    """
+    Activity part of the dashboard: O(distinct types + blocks) rollup rows, the last 10 logs
+    (index range scan) and at most DASHBOARD_PUBLISHED_LIMIT published quizzes.
+    """
+    cached = dashboard_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    rows = db.query(models.UserStat.dimension, models.UserStat.key, models.UserStat.count).filter(
+        models.UserStat.user_id == user_id
+    ).all()
+    by_type = {row.key: row.count for row in rows if row.dimension == "type"}
+    by_block = {}
+    for row in rows:
+        if row.dimension == "block":
+            label = row.key if row.key else "Non spécifié"
+            by_block[label] = by_block.get(label, 0) + row.count
+
+    recent_query = db.query(models.ActivityLog).filter(models.ActivityLog.user_id == user_id)
+    window_start = datetime.utcnow() - timedelta(days=ACTIVITY_RECENT_WINDOW_DAYS)
+    recent_activity = recent_query.filter(
+        models.ActivityLog.timestamp >= window_start
+    ).order_by(models.ActivityLog.timestamp.desc()).limit(10).all()
+    if len(recent_activity) < 10:
+        # Occasional user: fall back to the whole (retained) history
+        recent_activity = recent_query.order_by(models.ActivityLog.timestamp.desc()).limit(10).all()
+
+    published = db.query(
+        models.PublishedQuiz.share_code, models.PublishedQuiz.title, models.PublishedQuiz.created_at
+    ).filter(
+        models.PublishedQuiz.user_id == user_id
+    ).order_by(models.PublishedQuiz.created_at.desc()).limit(DASHBOARD_PUBLISHED_LIMIT).all()
+
+    payload = {
+        "total_generated": sum(by_type.values()),
+        "by_type": by_type,
+        "by_block": by_block,
+        "recent": [
+            {
+                "id": log.id,
+                "document_type": log.document_type,
+                "topic": log.topic,
+                "timestamp": log.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+            }
+            for log in recent_activity
+        ],
+        "published": [
+            {
+                "code": q.share_code,
+                "title": q.title,
+                "date": q.created_at.strftime("%Y-%m-%d")
+            }
+            for q in published
+        ],
+    }
+    dashboard_cache.put(user_id, payload)
+    return payload
@@ -0,0 +1,235 @@
+import os
+import json
+import uuid
+import queue
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime
+from sqlalchemy import func, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from .. import models
+from .quiz_parser import parse_quiz
+from .stats_service import DashboardCache
+
+# Submissions are queued in memory and written in batches (a class submits within seconds)
+SUBMISSION_BATCH_SIZE = int(os.getenv("SUBMISSION_BATCH_SIZE", "200"))
+SUBMISSION_FLUSH_INTERVAL = float(os.getenv("SUBMISSION_FLUSH_INTERVAL", "1.0"))
+SUBMISSION_QUEUE_MAX = int(os.getenv("SUBMISSION_QUEUE_MAX", "10000"))
+# Teacher-side results are cached briefly per share code
+QUIZ_RESULTS_CACHE_TTL = float(os.getenv("QUIZ_RESULTS_CACHE_TTL", "10"))
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+quiz_results_cache = DashboardCache(ttl=QUIZ_RESULTS_CACHE_TTL)
+
+
+class ParsedQuizCache:
+    """
+    Parsed structure (with answer key) of the served quizzes, keyed by the ETag of their cached JSON.
+    The served JSON has no answer key: on a miss, load_content() returns the quiz's full Markdown.
+    """
+    def __init__(self, max_entries: int = 200):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # etag -> parsed quiz
+        self._lock = threading.Lock()
+
+    def get(self, entry, load_content) -> dict:
+        with self._lock:
+            parsed = self._entries.get(entry.etag)
+            if parsed is not None:
+                self._entries.move_to_end(entry.etag)
+                return parsed
+        parsed = parse_quiz(load_content())
+        with self._lock:
+            self._entries[entry.etag] = parsed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return parsed
+
+
+parsed_quiz_cache = ParsedQuizCache()
+
+
+def _increment_answer_stats(connection, counts: Counter):
+    stat = models.QuizAnswerStat.__table__
+    upsert = _UPSERT_DIALECTS.get(connection.dialect.name)
+    for (share_code, question, choice), amount in counts.items():
+        if upsert is not None:
+            stmt = upsert(stat).values(share_code=share_code, question=question, choice=choice, count=amount)
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=[stat.c.share_code, stat.c.question, stat.c.choice],
+                set_={"count": stat.c.count + amount},
+            ))
+        else:
+            result = connection.execute(
+                update(stat)
+                .where(stat.c.share_code == share_code, stat.c.question == question, stat.c.choice == choice)
+                .values(count=stat.c.count + amount)
+            )
+            if result.rowcount == 0:
+                connection.execute(stat.insert().values(share_code=share_code, question=question, choice=choice, count=amount))
+
+
+class SubmissionWriter:
+    """
+    Write-behind buffer for quiz submissions. Requests only enqueue a graded row; a daemon
+    thread inserts up to SUBMISSION_BATCH_SIZE rows (plus the per-question rollup) per
+    transaction, at least every SUBMISSION_FLUSH_INTERVAL seconds, and drains on shutdown.
+    If the queue is full, the submission is written synchronously instead of being dropped.
+    """
+    def __init__(self, batch_size: int = SUBMISSION_BATCH_SIZE, interval: float = SUBMISSION_FLUSH_INTERVAL,
+                 max_queue: int = SUBMISSION_QUEUE_MAX):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._retry = []  # items of a failed batch, written first next time
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def submit(self, row: dict, choices):
+        """`row` is a quiz_submissions row, `choices` its [(question, option letter or "")] for the rollup."""
+        item = (row, choices)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.write([item])
+            return
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stop.clear()
+                    self._thread = threading.Thread(target=self._run, name="submission-writer", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.interval)
+            except queue.Empty:
+                if self._retry:
+                    self.flush()
+                continue
+            # Let the batch fill up a little: a class submits in a burst
+            self._stop.wait(min(self.interval, 0.2))
+            self.flush([first])
+
+    def flush(self, items=None) -> int:
+        """Writes everything queued so far (in batches). Returns the number of rows written."""
+        with self._flush_lock:
+            items = self._retry + (items or [])
+            self._retry = []
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            written = 0
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start:start + self.batch_size]
+                if not self.write(batch):
+                    self._retry = items[start:]
+                    break
+                written += len(batch)
+            return written
+
+    def write(self, items) -> bool:
+        if not items:
+            return True
+        from ..database import SessionLocal
+        rows = [row for row, _ in items]
+        counts = Counter(
+            (row["share_code"], question, choice) for row, choices in items for question, choice in choices
+        )
+
+        db = SessionLocal()
+        try:
+            connection = db.connection()
+            connection.execute(insert(models.QuizSubmission.__table__), rows)
+            _increment_answer_stats(connection, counts)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Quiz submission write failed ({len(rows)} rows): {e}")
+            return False
+        finally:
+            db.close()
+        for share_code in {row["share_code"] for row in rows}:
+            quiz_results_cache.invalidate(share_code)
+        return True
+
+    def pending(self) -> int:
+        return self._queue.qsize() + len(self._retry)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+
+submission_writer = SubmissionWriter()
+
+
+def record_submission(share_code: str, student_name: str, parsed: dict, answers: dict, score: int, total: int) -> str:
+    """Queues a graded submission (answers normalized by quiz_parser.grade) and returns its id."""
+    submission_id = str(uuid.uuid4())
+    options = {q["number"]: q["options"] for q in parsed["questions"]}
+    choices = [(number, answer if options.get(number) else "") for number, answer in answers.items()]
+    submission_writer.submit({
+        "id": submission_id,
+        "share_code": share_code,
+        "student_name": student_name,
+        "answers": json.dumps({str(k): v for k, v in answers.items()}, ensure_ascii=False),
+        "score": score,
+        "total": total,
+        "submitted_at": datetime.utcnow(),
+    }, choices)
+    return submission_id
+
+
+def get_quiz_results(db, share_code: str, parsed: dict) -> dict:
+    """Per-question results for the teacher: rollup rows + one aggregate over the submissions."""
+    cached = quiz_results_cache.get(share_code)
+    if cached is not None:
+        return cached
+
+    summary = db.query(
+        func.count(models.QuizSubmission.id), func.avg(models.QuizSubmission.score),
+        func.max(models.QuizSubmission.submitted_at)
+    ).filter(models.QuizSubmission.share_code == share_code).one()
+    stats = db.query(models.QuizAnswerStat.question, models.QuizAnswerStat.choice, models.QuizAnswerStat.count).filter(
+        models.QuizAnswerStat.share_code == share_code
+    ).all()
+    by_question = {}
+    for row in stats:
+        by_question.setdefault(row.question, {})[row.choice] = row.count
+
+    questions = []
+    for question in parsed["questions"]:
+        choices = by_question.get(question["number"], {})
+        answered = sum(count for choice, count in choices.items() if choice)
+        correct = choices.get(question["answer"], 0) if question["answer"] else None
+        questions.append({
+            "number": question["number"],
+            "text": question["text"],
+            "answer": question["answer"],
+            "choices": {letter: choices.get(letter, 0) for letter in question["options"]},
+            "answered": answered if question["options"] else sum(choices.values()),
+            "correct_rate": round(correct / answered, 3) if correct is not None and answered else None,
+        })
+
+    payload = {
+        "share_code": share_code,
+        "submissions": summary[0],
+        "average_score": round(float(summary[1]), 2) if summary[1] is not None else None,
+        "total": sum(1 for q in parsed["questions"] if q["answer"]),
+        "last_submission": summary[2],
+        "questions": questions,
+    }
+    quiz_results_cache.put(share_code, payload)
+    return payload
@@ -1,56 +1,164 @@
-
 from fastapi import HTTPException
 from datetime import datetime, timedelta
+from sqlalchemy import update, func
+from sqlalchemy.orm.attributes import set_committed_value
+from collections import defaultdict
+import threading
+import os
 from .. import models
+from .user_cache import user_cache
 
 # LIMITS
 FREE_GENERATION_LIMIT = 100
 FREE_CHAT_LIMIT = 200
 FREE_TRIAL_DAYS = 90
 
+# Metering of unlimited (subscription/admin) users: counts are batched in memory
+USAGE_METERING_ENABLED = os.getenv("USAGE_METERING_ENABLED", "false").lower() == "true"
+USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", "30"))
+
+# action_type -> (counter column, free tier limit, label used in the error message)
+QUOTA_ACTIONS = {
+    'generate_course': ("generation_count", FREE_GENERATION_LIMIT, "générations"),
+    'chat_message': ("chat_message_count", FREE_CHAT_LIMIT, "messages"),
+}
+
+
+def try_consume_quota(db, user_id: str, column_name: str, limit: int):
+    """
+    Atomically increments a usage counter if it is still below `limit`:
+    UPDATE users SET c = c + 1 WHERE id = :id AND c < :limit [RETURNING c].
+    The check and the increment happen in one statement, so concurrent requests
+    cannot both pass the last free slot. Returns the new count, or None if refused.
+    """
+    column = getattr(models.User, column_name)
+    current = func.coalesce(column, 0)
+    stmt = (
+        update(models.User)
+        .where(models.User.id == user_id, current < limit)
+        .values({column_name: current + 1})
+        .execution_options(synchronize_session=False)
+    )
+    if db.get_bind().dialect.update_returning:
+        new_count = db.execute(stmt.returning(column)).scalar()
+        db.commit()
+        return new_count
+
+    result = db.execute(stmt)
+    db.commit()
+    if result.rowcount == 0:
+        return None
+    return db.query(column).filter(models.User.id == user_id).scalar()
+
+
+class UsageMeter:
+    """
+    In-memory batching of usage increments for users who are not quota-limited.
+    Avoids a commit on the `users` row for every chat message; counts are flushed
+    with one UPDATE per user every USAGE_FLUSH_INTERVAL seconds and on shutdown.
+    """
+    def __init__(self, interval: float = USAGE_FLUSH_INTERVAL):
+        self.interval = interval
+        self._pending = defaultdict(int)  # (user_id, column) -> increment
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, user_id: str, column_name: str, amount: int = 1):
+        with self._lock:
+            self._pending[(user_id, column_name)] += amount
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stop.clear()
+                    self._thread = threading.Thread(target=self._run, name="usage-meter", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+        if not pending:
+            return 0
+
+        from ..database import SessionLocal
+        db = SessionLocal()
+        try:
+            for (user_id, column_name), amount in pending.items():
+                column = getattr(models.User, column_name)
+                db.execute(
+                    update(models.User)
+                    .where(models.User.id == user_id)
+                    .values({column_name: func.coalesce(column, 0) + amount})
+                    .execution_options(synchronize_session=False)
+                )
+            db.commit()
+            return len(pending)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Usage metering flush failed: {e}")
+            # Put the increments back so they are retried on the next flush
+            with self._lock:
+                for key, amount in pending.items():
+                    self._pending[key] += amount
+            return 0
+        finally:
+            db.close()
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+
+usage_meter = UsageMeter()
+
+
 def check_and_increment_usage(db, user: models.User, action_type: str):
     """
     Checks if the user is allowed to perform an action based on their plan and usage.
     Increments the counter if allowed.
-    
+
     action_type: 'generate_course' or 'chat_message'
     """
-    
+    column_name, limit, label = QUOTA_ACTIONS.get(action_type, (None, None, None))
+
     # 1. Bypass for Paid Users (Pro, Enterprise, Admin)
     # Checks if plan_selection is 'subscription' OR role is admin
     if user.plan_selection == 'subscription' or user.role == models.UserRole.ADMIN:
+        if USAGE_METERING_ENABLED and column_name:
+            usage_meter.record(user.id, column_name)
         return True # Unlimited access
 
     # 2. Free Tier Checks
-    
+
     # A. Time Limit (15 days)
     # If created_at is None (legacy users), we might need a fallback or treat them as strict.
     # For now, let's assume if created_at is missing, we give them the benefit of the doubt or set it to now.
     user_creation = user.created_at or datetime.utcnow()
     trial_end_date = user_creation + timedelta(days=FREE_TRIAL_DAYS)
-    
+
     if datetime.utcnow() > trial_end_date:
         raise HTTPException(
-            status_code=403, 
+            status_code=403,
             detail=f"Votre période d'essai de {FREE_TRIAL_DAYS} jours est terminée. Veuillez passer à l'abonnement Pro."
         )
 
-    # B. Usage Limits
-    if action_type == 'generate_course':
-        if user.generation_count >= FREE_GENERATION_LIMIT:
+    # B. Usage Limits (atomic check-and-increment in the database)
+    if column_name:
+        new_count = try_consume_quota(db, user.id, column_name, limit)
+        if new_count is None:
             raise HTTPException(
-                status_code=403, 
-                detail=f"Vous avez atteint la limite de {FREE_GENERATION_LIMIT} générations pour l'essai gratuit. Passez en Pro pour l'illimité."
+                status_code=403,
+                detail=f"Vous avez atteint la limite de {limit} {label} pour l'essai gratuit. Passez en Pro pour l'illimité."
             )
-        user.generation_count += 1
+        # Keep the loaded user in sync without marking it dirty (a later commit must not overwrite the counter)
+        set_committed_value(user, column_name, new_count)
+        user_cache.set_value(user.email, column_name, new_count)
 
-    elif action_type == 'chat_message':
-        if user.chat_message_count >= FREE_CHAT_LIMIT:
-            raise HTTPException(
-                status_code=403, 
-                detail=f"Vous avez atteint la limite de {FREE_CHAT_LIMIT} messages pour l'essai gratuit. Passez en Pro pour l'illimité."
-            )
-        user.chat_message_count += 1
-    
-    db.commit()
     return True
@@ -0,0 +1,195 @@
+import io
+import re
+import csv
+import uuid
+import secrets
+from datetime import datetime
+from types import SimpleNamespace
+from sqlalchemy import and_, delete, insert, or_, select, update
+from .. import models, auth
+from .email_outbox import email_sender
+from .email_service import email_service
+from .user_cache import user_cache
+from . import search_service
+
+ADMIN_BULK_MAX_IDS = 5000
+ADMIN_IMPORT_MAX_ROWS = 5000
+
+_users = models.User.__table__
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# action -> (new values, rows actually changed, notification email)
+BULK_ACTIONS = {
+    "approve": ({"status": "active", "is_active": True},
+                or_(_users.c.status.is_(None), _users.c.status != "active"), "approval"),
+    "reject": ({"status": "rejected", "is_active": False},
+               or_(_users.c.status.is_(None), _users.c.status != "rejected"), "rejection"),
+    "deactivate": ({"is_active": False},
+                   or_(_users.c.is_active.is_(None), _users.c.is_active.is_(True)), None),
+}
+
+
+def selection(exclude_id: str, user_ids=None, status=None, role=None, plan_selection=None,
+              organization_id=None, created_before=None):
+    """WHERE clause for a bulk operation: an id list and/or filters, never the acting admin."""
+    conditions = []
+    if user_ids is not None:
+        conditions.append(_users.c.id.in_(user_ids))
+    if status:
+        conditions.append(_users.c.status == status.lower())
+    if role:
+        conditions.append(_users.c.role == role.lower())
+    if plan_selection:
+        conditions.append(_users.c.plan_selection == plan_selection)
+    if organization_id:
+        conditions.append(_users.c.organization_id == organization_id)
+    if created_before:
+        conditions.append(_users.c.created_at < created_before)
+    if not conditions:
+        raise ValueError("Sélection vide : indiquez des identifiants ou un filtre")
+    return and_(*conditions, _users.c.id != exclude_id)
+
+
+def bulk_update(db, action: str, where) -> dict:
+    """
+    One UPDATE ... RETURNING for every selected user, and their notification emails queued
+    in the same transaction (one INSERT into the outbox).
+    """
+    values, changes, email_kind = BULK_ACTIONS[action]
+    rows = db.execute(
+        update(_users).where(where, changes).values(**values)
+        .returning(_users.c.email, _users.c.full_name, _users.c.plan_selection)
+    ).fetchall()
+    emails = email_service.queue_bulk_emails(db, email_kind, rows) if email_kind and rows else 0
+    db.commit()
+    for row in rows:
+        user_cache.invalidate(row.email)
+    if emails:
+        email_sender.wake()
+    return {"action": action, "updated": len(rows), "emails_queued": emails}
+
+
+def bulk_delete(db, where) -> dict:
+    """
+    Deletes the selected users; like the ORM delete, their chats and documents are kept, unlinked.
+    Their search entries go with them.
+    """
+    selected = select(_users.c.id).where(where).scalar_subquery()
+    search_service.remove_user_entries(db.connection(), selected)
+    for table in (models.ChatSession.__table__, models.SavedDocument.__table__):
+        db.execute(update(table).where(table.c.user_id.in_(selected)).values(user_id=None))
+    emails = db.execute(delete(_users).where(where).returning(_users.c.email)).scalars().all()
+    db.commit()
+    for email in emails:
+        user_cache.invalidate(email)
+    return {"action": "delete", "updated": len(emails), "emails_queued": 0}
+
+
+_HEADERS = {
+    "email": "email", "mail": "email", "e-mail": "email",
+    "full_name": "full_name", "nom": "full_name", "name": "full_name", "nom complet": "full_name",
+    "organization": "organization", "organisation": "organization",
+    "etablissement": "organization", "établissement": "organization",
+    "plan_selection": "plan_selection", "plan": "plan_selection", "formule": "plan_selection",
+}
+
+
+def parse_teachers_csv(data: bytes):
+    """Rows {email, full_name, organization, plan_selection} and [{"line", "error"}] from a CSV (, or ;)."""
+    text = data.decode("utf-8-sig")
+    try:
+        dialect = csv.Sniffer().sniff(text.split("\n", 1)[0], delimiters=",;")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(io.StringIO(text), dialect)
+    header = [_HEADERS.get(name.strip().lower()) for name in next(reader, [])]
+    if "email" not in header:
+        raise ValueError("Colonne 'email' manquante")
+
+    rows, errors, seen = [], [], set()
+    for line, values in enumerate(reader, start=2):
+        if not any(value.strip() for value in values):
+            continue
+        row = {key: value.strip() for key, value in zip(header, values) if key}
+        email = row.get("email", "").lower()
+        if not _EMAIL_RE.match(email):
+            errors.append({"line": line, "error": f"Email invalide : {row.get('email', '')}"})
+            continue
+        if email in seen:
+            errors.append({"line": line, "error": f"Email en double : {email}"})
+            continue
+        seen.add(email)
+        rows.append({
+            "email": email,
+            "full_name": row.get("full_name") or email.split("@")[0],
+            "organization": row.get("organization"),
+            "plan_selection": row.get("plan_selection") or "trial",
+        })
+        if len(rows) > ADMIN_IMPORT_MAX_ROWS:
+            raise ValueError(f"Maximum {ADMIN_IMPORT_MAX_ROWS} enseignants par import")
+    return rows, errors
+
+
+def import_teachers(db, rows, status: str = "active") -> dict:
+    """
+    Creates the teachers that do not exist yet: one SELECT for the known emails and
+    organizations, one INSERT for the new organizations, one for the users, and one for
+    their approval emails (active accounts), in a single transaction.
+    Organizations named in the CSV are matched by name (or created); a teacher without one
+    gets a new organization of their own.
+    """
+    emails = [row["email"] for row in rows]
+    existing = set(db.execute(select(_users.c.email).where(_users.c.email.in_(emails))).scalars()) if emails else set()
+    new_rows = [row for row in rows if row["email"] not in existing]
+
+    organizations = models.Organization.__table__
+    now = datetime.utcnow()
+    names = {row["organization"] for row in new_rows if row["organization"]}
+    # No organization in the CSV: one of their own, never matched by name (names are unique, and two
+    # teachers may have the same one), so it is named after the email
+    own_names = {row["email"]: f"Org de {row['full_name']} ({row['email']})" for row in new_rows if not row["organization"]}
+    lookup = names | set(own_names.values())
+    org_ids = dict(db.execute(
+        select(organizations.c.name, organizations.c.id).where(organizations.c.name.in_(lookup))
+    ).fetchall()) if lookup else {}
+    missing = [{"id": str(uuid.uuid4()), "name": name, "plan": models.PlanType.FREE, "created_at": now}
+               for name in names if name not in org_ids]
+    org_ids.update({org["name"]: org["id"] for org in missing})
+    user_org_ids = {row["email"]: org_ids[row["organization"]] for row in new_rows if row["organization"]}
+    for email, name in own_names.items():
+        if name in org_ids:
+            name = f"{name} {uuid.uuid4().hex[:6]}"  # left behind by a deleted account
+        own = {"id": str(uuid.uuid4()), "name": name, "plan": models.PlanType.FREE, "created_at": now}
+        missing.append(own)
+        user_org_ids[email] = own["id"]
+    if missing:
+        db.execute(insert(organizations), missing)
+
+    emails_queued = 0
+    if new_rows:
+        # Imported teachers sign in with Google: one unusable random password (bcrypt is slow per row)
+        hashed_password = auth.get_password_hash(secrets.token_urlsafe(32))
+        users = [{
+            "id": str(uuid.uuid4()),
+            "email": row["email"],
+            "hashed_password": hashed_password,
+            "full_name": row["full_name"],
+            "role": models.UserRole.TEACHER.value,
+            "status": status,
+            "plan_selection": row["plan_selection"],
+            "is_active": True,
+            "created_at": now,
+            "generation_count": 0,
+            "chat_message_count": 0,
+            "organization_id": user_org_ids[row["email"]],
+        } for row in new_rows]
+        db.execute(insert(_users), users)
+        if status == "active":
+            emails_queued = email_service.queue_bulk_emails(
+                db, "approval", [SimpleNamespace(**user) for user in users]
+            )
+    db.commit()
+    if emails_queued:
+        email_sender.wake()
+    return {"created": len(new_rows), "existing": len(rows) - len(new_rows),
+            "organizations_created": len(missing), "emails_queued": emails_queued}
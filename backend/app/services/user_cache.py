@@ -0,0 +1,84 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from sqlalchemy.orm import make_transient_to_detached
+from .. import models
+
+# Authenticated user projections are cached per process, keyed by the JWT subject (email)
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+_USER_COLUMNS = [c.key for c in models.User.__table__.columns]
+
+
+class UserCache:
+    """
+    TTL cache of `users` rows for get_current_user.
+    Entries are plain column snapshots; invalidate() must be called wherever a user's
+    status, role or plan changes. Other workers see the change after at most USER_CACHE_TTL.
+    """
+    def __init__(self, ttl: float = USER_CACHE_TTL, max_entries: int = USER_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # email -> (expires_at, columns)
+        self._ids = {}  # user id -> email
+        self._lock = threading.Lock()
+
+    def get(self, db, email: str):
+        """Returns a User attached to `db` without querying, or None on a miss."""
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None:
+                return None
+            expires_at, columns = entry
+            if expires_at < time.monotonic():
+                self._drop(email)
+                return None
+            self._entries.move_to_end(email)
+
+        user = models.User(**columns)
+        make_transient_to_detached(user)
+        # load=False attaches the snapshot as a clean persistent object: no SELECT
+        return db.merge(user, load=False)
+
+    def put(self, user: models.User):
+        if self.ttl <= 0:
+            return
+        columns = {key: getattr(user, key) for key in _USER_COLUMNS}
+        with self._lock:
+            self._drop(user.email)
+            self._entries[user.email] = (time.monotonic() + self.ttl, columns)
+            self._ids[user.id] = user.email
+            while len(self._entries) > self.max_entries:
+                _, (_, old_columns) = self._entries.popitem(last=False)
+                self._ids.pop(old_columns["id"], None)
+
+    def set_value(self, email: str, column_name: str, value):
+        """Updates one cached column in place (e.g. usage counters) without invalidating."""
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry:
+                entry[1][column_name] = value
+
+    def invalidate(self, email: str = None, user_id: str = None):
+        with self._lock:
+            if email is None and user_id is not None:
+                email = self._ids.get(user_id)
+            if email is not None:
+                self._drop(email)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._ids.clear()
+
+    def _drop(self, email: str):
+        entry = self._entries.pop(email, None)
+        if entry:
+            self._ids.pop(entry[1]["id"], None)
+
+
+user_cache = UserCache()
@@ -0,0 +1,132 @@
+import os
+import re
+import json
+import difflib
+from .. import models
+from .content_codec import compress_text, decompress_text
+
+# A full snapshot is stored every N versions so rebuilding an old revision replays few deltas
+DOCUMENT_SNAPSHOT_INTERVAL = int(os.getenv("DOCUMENT_SNAPSHOT_INTERVAL", "10"))
+
+# Delta format (JSON list, applied line by line to the previous revision, lines keep their "\n"):
+#   n > 0        keep the next n lines
+#   n < 0        drop the next -n lines
+#   ["a\n", ..]  insert these lines
+# Lines left after the last operation are kept.
+
+
+_LINE_RE = re.compile(r"[^\n]*\n|[^\n]+\Z")
+
+
+def _lines(text: str):
+    # Split on "\n" only (str.splitlines also splits on \r, \u2028...), like the frontend does
+    return _LINE_RE.findall(text or "")
+
+
+def compute_delta(old: str, new: str) -> list:
+    """Line-based delta turning `old` into `new`."""
+    a, b = _lines(old), _lines(new)
+    ops = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+        else:
+            if i2 > i1:
+                ops.append(-(i2 - i1))
+            if j2 > j1:
+                ops.append(b[j1:j2])
+    while ops and isinstance(ops[-1], int) and ops[-1] > 0:
+        ops.pop()  # trailing keeps are implicit
+    return ops
+
+
+def apply_delta(old: str, ops: list) -> str:
+    """Applies a delta; raises ValueError if it does not fit `old`."""
+    lines = _lines(old)
+    out = []
+    pos = 0
+    for op in ops:
+        if isinstance(op, bool):
+            raise ValueError("Invalid delta operation")
+        if isinstance(op, int):
+            count = abs(op)
+            if pos + count > len(lines):
+                raise ValueError("Delta does not match the base revision")
+            if op > 0:
+                out.extend(lines[pos:pos + count])
+            pos += count
+        elif isinstance(op, list) and all(isinstance(line, str) for line in op):
+            out.extend(op)
+        else:
+            raise ValueError("Invalid delta operation")
+    out.extend(lines[pos:])
+    return "".join(out)
+
+
+def _add_version(db, doc_id: str, version: int, kind: str, payload: str, size: int):
+    payload_format, blob = compress_text(payload)
+    db.add(models.DocumentVersion(
+        document_id=doc_id, version=version, kind=kind,
+        payload_format=payload_format, payload=blob, size=size
+    ))
+
+
+def record_initial_version(db, doc: models.SavedDocument, content: str):
+    _add_version(db, doc.id, 1, "snapshot", content or "", len(content or ""))
+
+
+def record_new_version(db, doc: models.SavedDocument, old: str, new: str) -> int:
+    """
+    Stores the revision following doc.version (delta against `old`, or a snapshot every
+    DOCUMENT_SNAPSHOT_INTERVAL versions / when the delta is not smaller than the text).
+    Sets doc.version to the new number and returns it. The caller updates the content and commits.
+    """
+    current = doc.version or 1
+    has_history = db.query(models.DocumentVersion.id).filter(
+        models.DocumentVersion.document_id == doc.id
+    ).first() is not None
+    if not has_history:
+        # Document saved before versioning existed: its current text becomes the base snapshot
+        _add_version(db, doc.id, current, "snapshot", old or "", len(old or ""))
+
+    version = current + 1
+    delta = json.dumps(compute_delta(old, new), ensure_ascii=False)
+    if version % DOCUMENT_SNAPSHOT_INTERVAL == 0 or len(delta) >= len(new or ""):
+        _add_version(db, doc.id, version, "snapshot", new or "", len(new or ""))
+    else:
+        _add_version(db, doc.id, version, "delta", delta, len(new or ""))
+    doc.version = version
+    return version
+
+
+def list_versions(db, doc_id: str):
+    return db.query(
+        models.DocumentVersion.version, models.DocumentVersion.kind,
+        models.DocumentVersion.size, models.DocumentVersion.created_at
+    ).filter(
+        models.DocumentVersion.document_id == doc_id
+    ).order_by(models.DocumentVersion.version.desc()).all()
+
+
+def get_version_content(db, doc_id: str, version: int):
+    """Rebuilds a revision from the closest snapshot at or before it. Returns None if unknown."""
+    snapshot = db.query(models.DocumentVersion).filter(
+        models.DocumentVersion.document_id == doc_id,
+        models.DocumentVersion.version <= version,
+        models.DocumentVersion.kind == "snapshot"
+    ).order_by(models.DocumentVersion.version.desc()).first()
+    if snapshot is None:
+        return None
+
+    text = decompress_text(snapshot.payload_format, snapshot.payload)
+    deltas = db.query(models.DocumentVersion).filter(
+        models.DocumentVersion.document_id == doc_id,
+        models.DocumentVersion.version > snapshot.version,
+        models.DocumentVersion.version <= version
+    ).order_by(models.DocumentVersion.version).all()
+    if (deltas[-1].version if deltas else snapshot.version) != version:
+        return None
+    for delta in deltas:
+        payload = decompress_text(delta.payload_format, delta.payload)
+        text = payload if delta.kind == "snapshot" else apply_delta(text, json.loads(payload))
+    return text
@@ -0,0 +1,136 @@
+"""
+Benchmark for activity log retention (activity_archive).
+
+Generates N activity logs (default 10 000 000) spread evenly over the last MONTHS months and
+USERS teachers, then times the dashboard "recent activity" query for one teacher and a global
+30-day count, before and after archiving the months past ACTIVITY_RETENTION_MONTHS. Also
+reports the archival time and the size of the compressed archive.
+
+    python benchmark_activity_partitions.py [rows]
+
+Runs on a temporary SQLite database; also on PostgreSQL (monthly partitions, migration 0010)
+when TEST_POSTGRES_URL is set - the tables are dropped and recreated there, so use a scratch database.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.migrations import v0010_partition_activity_logs
+from app.services import activity_archive
+from app.services.stats_service import ACTIVITY_RECENT_WINDOW_DAYS
+
+USERS = 2000
+MONTHS = 24
+INSERT_BATCH = 50000
+DOCUMENT_TYPES = ["cours", "quiz", "tp", "evaluation", "planning"]
+
+
+def generate(engine, count):
+    """Bulk-inserts `count` logs (without the ORM hooks: no rollup or search entries)."""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    span = MONTHS * 30 * 86400
+    logs = models.ActivityLog.__table__
+    started = time.perf_counter()
+    for start in range(1, count + 1, INSERT_BATCH):
+        rows = [
+            {
+                "id": i,
+                "timestamp": now - timedelta(seconds=span * (count - i) / count),
+                "document_type": rng.choice(DOCUMENT_TYPES),
+                "topic": f"Séance {i % 997} : négociation commerciale",
+                "duration_hours": rng.choice([1.0, 2.0, 4.0]),
+                "target_block": f"Bloc {rng.randint(1, 3)}",
+                "is_published": None,
+                "share_code": None,
+                "user_id": f"user-{rng.randrange(USERS)}",
+            }
+            for i in range(start, min(start + INSERT_BATCH, count + 1))
+        ]
+        with engine.begin() as conn:
+            conn.execute(logs.insert(), rows)
+    return time.perf_counter() - started
+
+
+def _timed(engine, query, reads):
+    Session = sessionmaker(bind=engine)
+    timings = []
+    for n in range(reads):
+        db = Session()
+        started = time.perf_counter()
+        query(db, n)
+        timings.append(time.perf_counter() - started)
+        db.close()
+    timings.sort()
+    return statistics.median(timings) * 1000, timings[int(len(timings) * 0.95)] * 1000
+
+
+def recent_for_user(db, n):
+    # Same query as the dashboard (stats_service.get_user_stats)
+    window_start = datetime.utcnow() - timedelta(days=ACTIVITY_RECENT_WINDOW_DAYS)
+    return db.query(models.ActivityLog).filter(
+        models.ActivityLog.user_id == f"user-{n % USERS}",
+        models.ActivityLog.timestamp >= window_start,
+    ).order_by(models.ActivityLog.timestamp.desc()).limit(10).all()
+
+
+def global_window(db, n):
+    return db.query(func.count(models.ActivityLog.id)).filter(
+        models.ActivityLog.timestamp >= datetime.utcnow() - timedelta(days=30)
+    ).scalar()
+
+
+def measure(label):
+    def report(engine):
+        for name, query, reads in (("recent per user", recent_for_user, 200), ("global 30 days", global_window, 10)):
+            p50, p95 = _timed(engine, query, reads)
+            print(f"   {label:>6} {name:>15}: p50 {p50:8.2f} ms, p95 {p95:8.2f} ms")
+    return report
+
+
+def run(label, engine, count):
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        v0010_partition_activity_logs.upgrade(conn)
+    elapsed = generate(engine, count)
+    print(f"🗂️  {label}: generated {count} logs over {MONTHS} months in {elapsed:.1f} s")
+    measure("before")(engine)
+
+    started = time.perf_counter()
+    archived = activity_archive.archive_expired(engine)
+    elapsed = time.perf_counter() - started
+    with engine.connect() as conn:
+        chunks, size = conn.execute(text("SELECT COUNT(*), SUM(LENGTH(payload)) FROM activity_log_archives")).one()
+        remaining = conn.execute(text("SELECT COUNT(*) FROM activity_logs")).scalar()
+    print(f"   archived {archived} logs in {elapsed:.1f} s ({archived / max(elapsed, 1e-9):,.0f} rows/s): "
+          f"{chunks} chunks, {(size or 0) / 1e6:.1f} MB compressed ({(size or 0) / max(archived, 1):.0f} B/row), "
+          f"{remaining} logs kept")
+    measure("after")(engine)
+    engine.dispose()
+
+
+def main(count=10_000_000):
+    path = os.path.join(tempfile.mkdtemp(), "activity.db")
+    run("SQLite", create_engine(f"sqlite:///{path}"), count)
+
+    pg_url = os.getenv("TEST_POSTGRES_URL")
+    if pg_url:
+        run("PostgreSQL partitioned", create_engine(pg_url), count)
+    else:
+        print("ℹ️ TEST_POSTGRES_URL not set, PostgreSQL skipped.")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
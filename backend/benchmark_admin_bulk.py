@@ -0,0 +1,92 @@
+"""
+Admin bulk user operations on N teachers (default 1 000), through the FastAPI app.
+
+Compares approving N pending teachers one by one (PATCH /api/admin/users/{id}/status, what
+the admin page did) with a single POST /api/admin/users/bulk/approve, then times a bulk
+reject by filter, a bulk delete and a CSV import of N new teachers. Approval emails go to the
+outbox in both cases; the sender thread is not started, so no SMTP is involved.
+
+    python benchmark_admin_bulk.py [users]
+
+Runs on a temporary SQLite database.
+"""
+import os
+import sys
+import time
+import tempfile
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'admin_bulk.db')}"
+os.environ.setdefault("SMTP_USER", "bot@lycee.fr")
+os.environ.setdefault("SMTP_PASSWORD", "benchmark")
+
+
+def _seed(db, models, prefix, count):
+    db.add_all([models.User(email=f"{prefix}{i}@lycee.fr", full_name=f"Prof {i}", status="pending",
+                            plan_selection="trial") for i in range(count)])
+    db.commit()
+    return [u.id for u in db.query(models.User).filter(models.User.email.like(f"{prefix}%"))]
+
+
+def main(count=1000):
+    from fastapi.testclient import TestClient
+    import main as app_main
+    from app import models, auth, database
+    from app.services.email_outbox import email_sender
+
+    email_sender._ensure_started = lambda: None  # Emails stay in the outbox
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    db.add(models.User(email="admin@lycee.fr", full_name="Admin", role="admin", status="active"))
+    db.commit()
+    client = TestClient(app_main.app)
+    client.headers["Authorization"] = f"Bearer {auth.create_access_token({'sub': 'admin@lycee.fr'})}"
+
+    one_by_one_ids = _seed(db, models, "seul", count)
+    bulk_ids = _seed(db, models, "lot", count)
+    db.close()
+
+    started = time.perf_counter()
+    for user_id in one_by_one_ids:
+        assert client.patch(f"/api/admin/users/{user_id}/status", json={"status": "active"}).status_code == 200
+    one_by_one = time.perf_counter() - started
+
+    started = time.perf_counter()
+    response = client.post("/api/admin/users/bulk/approve", json={"user_ids": bulk_ids})
+    bulk = time.perf_counter() - started
+    assert response.json()["updated"] == count and response.json()["emails_queued"] == count, response.json()
+
+    started = time.perf_counter()
+    response = client.post("/api/admin/users/bulk/reject", json={"filter": {"status": "active", "role": "teacher"}})
+    reject = time.perf_counter() - started
+    assert response.json()["updated"] == 2 * count, response.json()
+
+    started = time.perf_counter()
+    response = client.post("/api/admin/users/bulk/delete", json={"user_ids": bulk_ids})
+    delete = time.perf_counter() - started
+    assert response.json()["updated"] == count, response.json()
+
+    csv_data = "email;nom;etablissement\n" + "".join(
+        f"import{i}@lycee.fr;Prof Import {i};Lycée {i % 20}\n" for i in range(count)
+    )
+    started = time.perf_counter()
+    response = client.post("/api/admin/users/import", files={"file": ("profs.csv", csv_data.encode(), "text/csv")})
+    imported = time.perf_counter() - started
+    assert response.json()["created"] == count, response.json()
+
+    db = database.SessionLocal()
+    queued = db.query(models.EmailOutbox).count()
+    db.close()
+
+    print(f"👥 {count} teachers, SQLite, emails queued in the outbox ({queued} in total)")
+    print(f"   approve one by one (PATCH x{count}): {one_by_one * 1000:8.0f} ms")
+    print(f"   approve in bulk (1 request):      {bulk * 1000:8.0f} ms, {one_by_one / bulk:.0f}x faster")
+    print(f"   reject {2 * count} by filter:          {reject * 1000:8.0f} ms")
+    print(f"   delete {count} by id:               {delete * 1000:8.0f} ms")
+    print(f"   CSV import of {count} teachers:     {imported * 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,139 @@
+"""
+End-to-end latency of publishing one document to several Classroom courses.
+
+Runs a local stub of the Classroom API (course listing with pages, courseWork.create and the
+/batch endpoint) that answers each HTTP call after LATENCY seconds, like a remote Google
+call, and compares through the FastAPI app:
+  - before: one POST /api/classroom/coursework per course (one click per class)
+  - after:  one POST /api/classroom/coursework/bulk for all the courses
+
+    python benchmark_classroom_bulk.py [courses]
+"""
+import os
+import re
+import sys
+import json
+import time
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+LATENCY = float(os.getenv("STUB_GOOGLE_LATENCY", "0.15"))
+PAGE_SIZE = 4
+
+
+class FakeClassroomApi(BaseHTTPRequestHandler):
+    """Classroom API stub. `rate_limited` course ids answer 429 once inside a batch."""
+    courses = [{"id": str(100 + i), "name": f"BTS NDRC {i}", "section": f"Groupe {i % 3}"} for i in range(10)]
+    http_calls = []
+    rate_limited = set()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        self._record()
+        time.sleep(LATENCY)
+        match = re.search(r"pageToken=(\d+)", self.path)
+        start = int(match.group(1)) if match else 0
+        page = {"courses": self.courses[start:start + PAGE_SIZE]}
+        if start + PAGE_SIZE < len(self.courses):
+            page["nextPageToken"] = str(start + PAGE_SIZE)
+        self._reply(200, "application/json", json.dumps(page).encode())
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self._record()
+        time.sleep(LATENCY)
+        if self.path.startswith("/batch"):
+            return self._batch(body)
+        course_id = self.path.split("/")[3]
+        status, payload = self._create(course_id)
+        self._reply(status, "application/json", json.dumps(payload).encode())
+
+    def _record(self):
+        with self.lock:
+            self.http_calls.append(self.path.split("?")[0])
+
+    def _create(self, course_id):
+        with self.lock:
+            if course_id in self.rate_limited:
+                self.rate_limited.discard(course_id)
+                return 429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}}
+        return 200, {"id": f"cw-{course_id}", "alternateLink": f"https://classroom.example/c/{course_id}"}
+
+    def _batch(self, body):
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+        )
+        parts = []
+        for part in message.iter_parts():
+            # "POST /v1/courses/<id>/courseWork?alt=json HTTP/1.1"
+            course_id = part.get_payload(decode=True).split(None, 2)[1].decode().split("/")[3]
+            status, payload = self._create(course_id)
+            reason = "OK" if status == 200 else "Too Many Requests"
+            parts.append(
+                f"--batch_stub\r\nContent-Type: application/http\r\nContent-ID: <response-{part['Content-ID'].strip('<>')}>\r\n\r\n"
+                f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n\r\n{json.dumps(payload)}\r\n"
+            )
+        data = ("".join(parts) + "--batch_stub--\r\n").encode()
+        self._reply(200, "multipart/mixed; boundary=batch_stub", data)
+
+    def _reply(self, status, content_type, data):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeClassroomApi)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/"
+
+
+def main(count=8):
+    from fastapi.testclient import TestClient
+    import main as app_main
+    from app.services.google_api import google_api
+
+    server, url = start_stub()
+    google_api.endpoints["classroom"] = url
+    client = TestClient(app_main.app)
+    credentials = {"token": "ya29.stub", "refresh_token": "1//stub"}
+    course_ids = [course["id"] for course in FakeClassroomApi.courses[:count]]
+    document = {"title": "Séance négociation", "description": "Consignes..." * 50}
+    try:
+        started = time.perf_counter()
+        for course_id in course_ids:
+            assert client.post("/api/classroom/coursework", json={**credentials, **document, "courseId": course_id}).status_code == 200
+        before = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = client.post("/api/classroom/coursework/bulk", json={**credentials, **document, "courseIds": course_ids})
+        after = time.perf_counter() - started
+        assert response.status_code == 200 and all("url" in r for r in response.json())
+
+        timings = []
+        for refresh in (True, False):
+            started = time.perf_counter()
+            courses = client.post("/api/classroom/courses", json={**credentials, "refresh": refresh}).json()
+            timings.append(time.perf_counter() - started)
+    finally:
+        server.shutdown()
+
+    print(f"📚 {count} courses, {LATENCY * 1000:.0f} ms per Google HTTP call (stub)")
+    print(f"   one request per course: {before * 1000:7.0f} ms ({count} HTTP calls)")
+    print(f"   bulk batch request:     {after * 1000:7.0f} ms (1 HTTP call), {before / after:.1f}x faster")
+    print(f"   course list: {len(courses)} courses, {timings[0] * 1000:.0f} ms uncached "
+          f"({-(-len(FakeClassroomApi.courses) // PAGE_SIZE)} pages), {timings[1] * 1000:.1f} ms cached")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8)
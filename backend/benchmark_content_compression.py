@@ -0,0 +1,129 @@
+"""
+Storage and read-latency benchmark for compressed document bodies.
+
+Builds a corpus of generated-course-like Markdown (BTS header block, tables, paragraphs
+taken from the knowledge base), stores it once as legacy plain text and once compressed,
+then compares database size and the cost of loading + decoding one document.
+
+    python benchmark_content_compression.py [documents]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import statistics
+from pathlib import Path
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker, undefer
+
+from app import models
+from app.services.content_codec import CONTENT_COMPRESSION
+
+KNOWLEDGE_DIR = Path(__file__).parent / "knowledge"
+
+HEADER = """# {title}
+
+**BTS NDRC - {block}**
+**Durée :** {hours} heures
+**Public :** Étudiants de 1ère année
+**Compétences visées :** Cibler et prospecter la clientèle, négocier et accompagner la relation client
+
+---
+"""
+
+TABLE = """| Étape | Objectif | Outils | Durée |
+|---|---|---|---|
+""" + "\n".join(f"| Étape {i} | {{obj{i}}} | CRM, tableau de bord | {i * 10} min |" for i in range(1, 6))
+
+
+def load_paragraphs():
+    paragraphs = []
+    for path in KNOWLEDGE_DIR.rglob("*"):
+        if path.suffix in (".txt", ".md"):
+            try:
+                chunks = path.read_text(encoding="utf-8", errors="ignore").split("\n\n")
+            except OSError:
+                continue
+            paragraphs.extend(c.strip() for c in chunks if 80 < len(c.strip()) < 1500)
+    return paragraphs or ["La négociation commerciale repose sur la découverte des besoins du client. " * 5]
+
+
+def make_document(rng, paragraphs):
+    parts = [HEADER.format(title=f"Séance {rng.randint(1, 40)} : {rng.choice(paragraphs)[:50]}",
+                           block=rng.choice(["Bloc 1", "Bloc 2", "Bloc 3"]), hours=rng.randint(2, 8))]
+    for section in range(rng.randint(4, 9)):
+        parts.append(f"## {section + 1}. {rng.choice(paragraphs)[:60]}\n")
+        parts.extend(rng.sample(paragraphs, k=min(len(paragraphs), rng.randint(2, 5))))
+        if rng.random() < 0.5:
+            parts.append(TABLE.format(**{f"obj{i}": rng.choice(paragraphs)[:40] for i in range(1, 6)}))
+    return "\n\n".join(parts)
+
+
+def build_db(path, corpus, compressed):
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    for i, body in enumerate(corpus):
+        doc = models.SavedDocument(id=f"doc-{i}", title=f"Document {i}", document_type="cours")
+        if compressed:
+            doc.content = body
+        else:
+            doc.content_text = body  # legacy layout
+            doc.content_size = len(body)
+        db.add(doc)
+    db.commit()
+    db.close()
+    with engine.connect() as conn:
+        conn.execute(text("VACUUM"))
+    engine.dispose()
+    return os.path.getsize(path)
+
+
+def read_latency(path, count, reads=2000):
+    engine = create_engine(f"sqlite:///{path}")
+    Session = sessionmaker(bind=engine)
+    rng = random.Random(1)
+    timings = []
+    for _ in range(reads):
+        db = Session()
+        started = time.perf_counter()
+        doc = db.query(models.SavedDocument).options(
+            undefer(models.SavedDocument.content_text), undefer(models.SavedDocument.content_blob)
+        ).filter(models.SavedDocument.id == f"doc-{rng.randrange(count)}").first()
+        body = doc.content
+        timings.append(time.perf_counter() - started)
+        db.close()
+        assert body
+    engine.dispose()
+    timings.sort()
+    return statistics.median(timings) * 1000, timings[int(len(timings) * 0.95)] * 1000
+
+
+def main(count=1000):
+    rng = random.Random(42)
+    paragraphs = load_paragraphs()
+    corpus = [make_document(rng, paragraphs) for _ in range(count)]
+    raw = sum(len(body.encode("utf-8")) for body in corpus)
+    print(f"📚 Corpus: {count} documents, {raw / 1024 / 1024:.1f} MiB of Markdown (avg {raw // count // 1024} KiB)")
+
+    tmp = tempfile.mkdtemp()
+    results = {}
+    for label, compressed in (("plain", False), (CONTENT_COMPRESSION, True)):
+        path = os.path.join(tmp, f"{label}.db")
+        size = build_db(path, corpus, compressed)
+        p50, p95 = read_latency(path, count)
+        results[label] = size
+        print(f"   {label:>6}: db {size / 1024 / 1024:6.2f} MiB | read+decode p50 {p50:.3f} ms, p95 {p95:.3f} ms")
+
+    ratio = results[CONTENT_COMPRESSION] / results["plain"]
+    print(f"✅ Storage: {ratio:.0%} of plain ({1 - ratio:.0%} saved)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
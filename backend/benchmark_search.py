@@ -0,0 +1,96 @@
+"""
+Query-latency benchmark for the full-text search (search_service).
+
+Seeds N saved documents (default 100 000) spread over USERS teachers, plus one activity
+topic per 4 documents, indexes them, then times /api/documents/search-style queries for
+one teacher: common prefix, rare word, multi-word, and a word that matches nothing.
+
+    python benchmark_search.py [documents]
+
+Runs on a temporary SQLite database (FTS5); also on PostgreSQL (tsvector + GIN) when
+TEST_POSTGRES_URL is set - the tables are created there, so use a scratch database.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import statistics
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.services import search_service
+from benchmark_content_compression import load_paragraphs
+
+USERS = 200
+QUERIES = {
+    "common prefix": "client",
+    "rare word": "omnicanalité",
+    "multi-word prefix": "négo comm",
+    "no match": "zzyzx",
+}
+
+
+def seed(engine, count, paragraphs):
+    rng = random.Random(42)
+    models.Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for table in ("search_entries", "saved_documents", "users"):
+            conn.execute(text(f"DELETE FROM {table}"))
+        if conn.dialect.name == "sqlite":
+            conn.execute(text("DELETE FROM search_fts"))
+        for i in range(count):
+            user_id = f"user-{i % USERS}"
+            title = f"Séance {i} : {rng.choice(paragraphs)[:50]}"
+            body = "\n\n".join(rng.sample(paragraphs, k=min(len(paragraphs), 3)))
+            if i % 500 == 0:
+                body += "\n\nStratégie omnicanalité et parcours client."
+            search_service.index_entry(conn, search_service.KIND_DOCUMENT, f"doc-{i}", user_id, title, body)
+            if i % 4 == 0:
+                search_service.index_entry(conn, search_service.KIND_ACTIVITY, str(i), user_id, rng.choice(paragraphs)[:60])
+    return time.perf_counter() - started
+
+
+def query_latency(engine, query, reads=200):
+    Session = sessionmaker(bind=engine)
+    timings = []
+    hits = 0
+    for n in range(reads):
+        db = Session()
+        started = time.perf_counter()
+        hits = len(search_service.search(db, f"user-{n % USERS}", query, 20))
+        timings.append(time.perf_counter() - started)
+        db.close()
+    timings.sort()
+    return statistics.median(timings) * 1000, timings[int(len(timings) * 0.95)] * 1000, hits
+
+
+def run(label, engine, count, paragraphs):
+    elapsed = seed(engine, count, paragraphs)
+    print(f"🗂️  {label}: indexed {count} documents + {count // 4} topics in {elapsed:.1f} s")
+    for name, query in QUERIES.items():
+        p50, p95, hits = query_latency(engine, query)
+        print(f"   {name:>17} {query!r:>16}: p50 {p50:7.2f} ms, p95 {p95:7.2f} ms ({hits} hits)")
+    engine.dispose()
+
+
+def main(count=100000):
+    paragraphs = load_paragraphs()
+    path = os.path.join(tempfile.mkdtemp(), "search.db")
+    run("SQLite FTS5", create_engine(f"sqlite:///{path}"), count, paragraphs)
+
+    pg_url = os.getenv("TEST_POSTGRES_URL")
+    if pg_url:
+        run("PostgreSQL tsvector", create_engine(pg_url), count, paragraphs)
+    else:
+        print("ℹ️ TEST_POSTGRES_URL not set, PostgreSQL skipped.")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
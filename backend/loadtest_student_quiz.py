@@ -0,0 +1,128 @@
+"""
+Load test of GET /api/student/quiz/{code}: a class fetching a projected share code.
+
+Starts one uvicorn worker on a temporary SQLite database, publishes a quiz, then hammers
+the endpoint from CLIENTS processes (keep-alive connections) for DURATION seconds, once with
+full responses and once with If-None-Match revalidations (304), and prints requests/second.
+
+    python loadtest_student_quiz.py [clients] [duration]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import subprocess
+import http.client
+import statistics
+from multiprocessing import Pool
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+
+QUIZ = "\n".join(
+    f"## Question {i}\nQuelle est l'étape {i} de la négociation commerciale ?\n"
+    f"- A) Découverte des besoins\n- B) Argumentation\n- C) Traitement des objections\n- D) Conclusion\n"
+    for i in range(1, 21)
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/docs")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def client(args):
+    port, path, duration, etag = args
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    headers = {"If-None-Match": etag} if etag else {}
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        assert response.status in (200, 304), response.status
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+    return latencies
+
+
+def run(port, path, clients, duration, etag=None):
+    with Pool(clients) as pool:
+        results = pool.map(client, [(port, path, duration, etag)] * clients)
+    latencies = sorted(l for r in results for l in r)
+    rps = len(latencies) / duration
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    return rps, p50, p95
+
+
+def main(clients=8, duration=10.0):
+    tmp = tempfile.mkdtemp()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'load.db')}",
+               QUIZ_CACHE_DIR=os.path.join(tmp, "quizzes"))
+    os.environ.update(env)
+
+    from app import models, auth
+    from app.database import SessionLocal, engine
+    from app.migrations import run_migrations
+    run_migrations(engine, models.Base.metadata)
+    db = SessionLocal()
+    teacher = models.User(email="prof@lycee.fr", full_name="Prof", status="active")
+    db.add(teacher)
+    db.commit()
+    log = models.ActivityLog(user_id=teacher.id, document_type="qcm", topic="Négociation")
+    db.add(log)
+    db.commit()
+    log_id = log.id
+    db.close()
+    token = auth.create_access_token({"sub": "prof@lycee.fr"})
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", "1", "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(port)
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        conn.request("POST", "/api/student/publish", body=json.dumps(
+            {"log_id": log_id, "title": "QCM Négociation", "content": QUIZ}),
+            headers={"Content-Type": "application/json", "Authorization": f"Bearer {token}"})
+        code = json.loads(conn.getresponse().read())["share_code"]
+        path = f"/api/student/quiz/{code}"
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        etag = response.getheader("ETag")
+        print(f"📝 Quiz {code}: {len(QUIZ.encode('utf-8'))} bytes, ETag {etag}, {clients} clients, {duration:.0f} s each run")
+
+        rps, p50, p95 = run(port, path, clients, duration)
+        print(f"   200 full body : {rps:8.0f} req/s | p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+        if etag:
+            rps, p50, p95 = run(port, path, clients, duration, etag)
+            print(f"   304 revalidate: {rps:8.0f} req/s | p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8, float(sys.argv[2]) if len(sys.argv) > 2 else 10.0)
@@ -34,65 +34,21 @@ async def lifespan(app: FastAPI):
     # Startup: Create tables
     print("📦 Initializing database...")
     try:
-        # Create tables if they don't exist
-        models.Base.metadata.create_all(bind=engine)
-        print("✅ Database tables checked/created.")
-        
-        # Robust Migration using Inspector to avoid transaction errors
-        from sqlalchemy import inspect, text
-        
-        inspector = inspect(engine)
-        existing_tables = inspector.get_table_names()
-        
-        if "users" in existing_tables:
-            columns = [col["name"] for col in inspector.get_columns("users")]
-            
-            with engine.connect() as conn:
-                # helper to add column safely
-                def add_column_if_missing(col_name, col_type_sql):
-                    if col_name not in columns:
-                        print(f"⚠️ Column '{col_name}' missing. Adding it...")
-                        try:
-                            conn.execute(text(f"ALTER TABLE users ADD COLUMN {col_name} {col_type_sql}"))
-                            conn.commit()
-                        except Exception as e:
-                            print(f"Failed to add {col_name}: {e}")
-                            conn.rollback()
+        # Create tables and apply pending versioned migrations (single SELECT when current)
+        from app.migrations import run_migrations
+        run_migrations(engine, models.Base.metadata)
 
-                add_column_if_missing("is_active", "BOOLEAN DEFAULT true")
-                add_column_if_missing("last_login", "TIMESTAMP")
-                add_column_if_missing("status", "VARCHAR DEFAULT 'pending'")
-                add_column_if_missing("plan_selection", "VARCHAR DEFAULT 'trial'")
-                add_column_if_missing("stripe_customer_id", "VARCHAR")
-                add_column_if_missing("generation_count", "INTEGER DEFAULT 0")
-                add_column_if_missing("chat_message_count", "INTEGER DEFAULT 0")
-                add_column_if_missing("created_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-                
-                # Fix Uppercase values (Data cleanup)
-                try:
-                    conn.execute(text("UPDATE users SET status='pending' WHERE status='PENDING'"))
-                    conn.execute(text("UPDATE users SET status='active' WHERE status='ACTIVE'"))
-                    conn.execute(text("UPDATE users SET status='rejected' WHERE status='REJECTED'"))
-                    conn.execute(text("UPDATE users SET role='admin' WHERE role='ADMIN'"))
-                    conn.execute(text("UPDATE users SET role='teacher' WHERE role='TEACHER'"))
-                    conn.execute(text("UPDATE users SET role='student' WHERE role='STUDENT'"))
-                    conn.commit()
-                except Exception:
-                    conn.rollback()
+        # Compress legacy document bodies in the background (CONTENT_BACKFILL_ENABLED)
+        from app.services.content_backfill import content_backfill
+        content_backfill.start()
 
-        if "activity_logs" in existing_tables:
-            alog_columns = [col["name"] for col in inspector.get_columns("activity_logs")]
-            with engine.connect() as conn:
-                if "user_id" not in alog_columns:
-                     print("⚠️ Column 'user_id' missing in activity_logs. Adding it...")
-                     try:
-                        conn.execute(text("ALTER TABLE activity_logs ADD COLUMN user_id VARCHAR"))
-                        conn.commit()
-                     except:
-                        conn.rollback()
-                
-        print("✅ Schema migration checks complete.")
-        
+        # Monthly activity log partitions and archival of months past retention (opt-in: ACTIVITY_MAINTENANCE_ENABLED=true)
+        from app.services.activity_archive import activity_maintenance
+        activity_maintenance.start()
+
+        # Emails queued before a restart
+        from app.services.email_outbox import email_sender
+        email_sender.start()
     except Exception as e:
         print(f"⚠️ Database initialization failed (Non-fatal): {e}")
 
@@ -103,6 +59,20 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print("👋 Application shutting down...")
+    from app.services.export_service import export_service
+    export_service.shutdown()
+    from app.services.usage_service import usage_meter
+    usage_meter.stop()
+    from app.services.submission_service import submission_writer
+    submission_writer.stop()
+    from app.services.activity_service import activity_sink
+    activity_sink.stop()
+    from app.services.content_backfill import content_backfill
+    content_backfill.stop()
+    from app.services.activity_archive import activity_maintenance
+    activity_maintenance.stop()
+    from app.services.email_outbox import email_sender
+    email_sender.stop()
 
 app = FastAPI(title="Professeur Virtuel API", version="0.2.0", lifespan=lifespan)
 
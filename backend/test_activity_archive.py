@@ -0,0 +1,106 @@
+import os
+import sys
+import uuid
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.migrations import v0010_partition_activity_logs
+from app.services import activity_archive, search_service
+
+# Set TEST_POSTGRES_URL to also run the partitioning migration (in a throwaway schema, dropped afterwards)
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+def test_archive_expired_months():
+    print("🚀 Activity log archival test...")
+    db_path = os.path.join(tempfile.mkdtemp(), "archive.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    months = [datetime(2024, 1, 10), datetime(2024, 2, 20), datetime(2025, 6, 1)]
+    for month in months:
+        db.add_all([
+            models.ActivityLog(user_id="teacher-1", document_type="quiz", topic=f"Négociation {month:%m} {i}",
+                               timestamp=month, duration_hours=1.5)
+            for i in range(30)
+        ])
+    db.commit()
+    db.close()
+
+    original_chunk = activity_archive.ACTIVITY_ARCHIVE_CHUNK
+    activity_archive.ACTIVITY_ARCHIVE_CHUNK = 20
+    try:
+        # 12 months of retention from July 2025: January and February 2024 are archived
+        archived = activity_archive.archive_expired(engine, now=datetime(2025, 7, 15))
+    finally:
+        activity_archive.ACTIVITY_ARCHIVE_CHUNK = original_chunk
+    assert archived == 60
+
+    db = Session()
+    assert db.query(models.ActivityLog).count() == 30
+    assert db.query(models.ActivityLogArchive).count() == 4, "30 rows per month in chunks of 20"
+    logs = list(activity_archive.iter_archived_logs(db, "2024-02"))
+    assert len(logs) == 30
+    assert logs[0]["topic"] == "Négociation 02 0" and logs[0]["timestamp"].startswith("2024-02-20")
+    assert logs[0]["duration_hours"] == 1.5
+    hits = search_service.search(db, "teacher-1", "négociation", limit=100)
+    assert len(hits) == 30, "archived logs left the search index"
+    db.close()
+
+    assert activity_archive.archive_expired(engine, now=datetime(2025, 7, 15)) == 0
+    engine.dispose()
+    print("✅ 2 months archived, recent month untouched")
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+def test_partition_migration_postgres():
+    print("🚀 Activity log partitioning migration test (PostgreSQL)...")
+    schema = f"partition_test_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(POSTGRES_URL)
+    with admin.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(POSTGRES_URL, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        models.Base.metadata.create_all(bind=engine)  # plain activity_logs, as before migration 0010
+        now = datetime.utcnow()
+        stamps = [now - timedelta(days=30 * months) for months in (0, 1, 6, 11, 20, 30)] + [None]
+        with engine.begin() as conn:
+            conn.execute(models.ActivityLog.__table__.insert(), [
+                {"timestamp": stamp, "user_id": f"teacher-{i % 3}", "document_type": "quiz", "topic": f"Séance {i}"}
+                for i in range(700) for stamp in stamps[i % len(stamps):i % len(stamps) + 1]
+            ])
+            before = conn.execute(text("SELECT COUNT(*), SUM(id), MAX(id) FROM activity_logs")).one()
+
+        with engine.begin() as conn:
+            v0010_partition_activity_logs.upgrade(conn)
+
+        with engine.begin() as conn:
+            assert activity_archive.is_partitioned(conn)
+            assert conn.execute(text("SELECT COUNT(*), SUM(id), MAX(id) FROM activity_logs")).one() == before
+            # Past the retention window (20 and 30 months) and without timestamp: DEFAULT partition
+            assert conn.execute(text("SELECT COUNT(*) FROM activity_logs_default")).scalar() == 300
+            new_id = conn.execute(text("INSERT INTO activity_logs (user_id) VALUES ('teacher-0') RETURNING id")).scalar()
+            assert new_id > before[2], "the id sequence moved to the partitioned table"
+        assert activity_archive.archive_expired(engine) == 300
+    finally:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
+    print("✅ Every row kept by the partitioning, expired months archived")
+
+
+if __name__ == "__main__":
+    test_archive_expired_months()
+    if POSTGRES_URL:
+        test_partition_migration_postgres()
@@ -0,0 +1,146 @@
+import os
+import sys
+import sqlite3
+import tempfile
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app import models, database
+from app.services import activity_service, search_service
+
+
+def _setup():
+    db_path = os.path.join(tempfile.mkdtemp(), "activity.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.add_all([models.ActivityLog(user_id="legacy", document_type="cours", topic="Ancien") for _ in range(7)])
+    db.commit()
+    db.close()
+    return engine, Session
+
+
+def test_id_blocks_across_workers():
+    print("🚀 Activity id allocation test...")
+    engine, Session = _setup()
+    original_session = database.SessionLocal
+    database.SessionLocal = Session
+    try:
+        # Two workers, each with its own allocator, interleaving
+        worker_a = activity_service.IdAllocator("activity_logs", block_size=10)
+        worker_b = activity_service.IdAllocator("activity_logs", block_size=10)
+        ids = [allocator.next_id() for _ in range(25) for allocator in (worker_a, worker_b)]
+    finally:
+        database.SessionLocal = original_session
+        engine.dispose()
+    assert len(set(ids)) == 50
+    assert min(ids) == 8, "ids start after the existing rows"
+    print("✅ 50 unique ids from 2 allocators")
+
+
+def test_sink_batches_and_hooks():
+    print("🚀 Activity write-behind test...")
+    engine, Session = _setup()
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+    original_session = database.SessionLocal
+    database.SessionLocal = Session
+    sink = activity_service.ActivitySink(
+        interval=60, batch_size=50, ids=activity_service.IdAllocator("activity_logs", block_size=40)
+    )
+    sink._ensure_started = lambda: None  # flushed explicitly below, not by the background thread
+    try:
+        log_ids = [
+            sink.record(document_type="quiz", topic=f"Négociation {i}", target_block="Bloc 2", user_id="teacher-1")
+            for i in range(120)
+        ]
+        db = Session()
+        assert db.query(models.ActivityLog).count() == 7, "nothing written on the request path"
+        db.close()
+
+        assert sink.ensure_written(log_ids[:1]) == set()
+        assert sink.pending() == 0
+        block_commits = 3  # 120 ids reserved 40 at a time
+        assert len(commits) == block_commits + 3, f"expected 3 batched inserts, got {len(commits) - block_commits}"
+
+        db = Session()
+        assert db.query(models.ActivityLog).filter(models.ActivityLog.user_id == "teacher-1").count() == 120
+        stat = db.query(models.UserStat).filter_by(user_id="teacher-1", dimension="type", key="quiz").one()
+        assert stat.count == 120, "stats rollup hook ran for every row"
+        hits = search_service.search(db, "teacher-1", "négo", limit=200)
+        assert len(hits) == 120, "search index hook ran for every row"
+        db.close()
+
+        # Database refusing the batch: the id is reported, not silently left behind
+        original_write = sink._write
+        sink._write = lambda rows: False
+        failing = sink.record(document_type="quiz", topic="Panne", user_id="teacher-1")
+        assert sink.ensure_written([failing]) == {failing}
+        sink._write = original_write
+        assert sink.ensure_written([failing]) == set()
+    finally:
+        sink.stop()
+        database.SessionLocal = original_session
+        engine.dispose()
+    print("✅ 120 logs written in 3 inserts, rollup and search index maintained")
+
+
+def test_isolated_rows_requeued():
+    print("🚀 Activity batch isolation test...")
+    engine, Session = _setup()
+    original_session = database.SessionLocal
+    database.SessionLocal = Session
+    sink = activity_service.ActivitySink(
+        interval=60, batch_size=50, ids=activity_service.IdAllocator("activity_logs", block_size=40)
+    )
+    sink._ensure_started = lambda: None
+    try:
+        written = sink.record(document_type="quiz", topic="Écrit", user_id="teacher-1")
+        failing = sink.record(document_type="quiz", topic="Panne", user_id="teacher-1")
+        duplicate = sink.record(document_type="quiz", topic="Doublon", user_id="teacher-1")
+        db = Session()
+        db.add(models.ActivityLog(id=duplicate, user_id="other", topic="Déjà là"))
+        db.commit()
+        db.close()
+
+        # The batch hits the duplicate id; then the "Panne" row fails on its own (disk error)
+        seen = []
+
+        def disk_error(conn, cursor, statement, parameters, context, executemany):
+            if "Panne" in str(parameters):
+                seen.append(statement)
+                if len(seen) == 2:
+                    raise OperationalError(statement, parameters, sqlite3.OperationalError("disk I/O error"))
+
+        event.listen(engine, "before_cursor_execute", disk_error)
+        assert sink.ensure_written([written, failing, duplicate]) == {failing}
+        assert sink.pending() == 1, "the failed row waits for the next flush"
+        db = Session()
+        assert db.get(models.ActivityLog, written).topic == "Écrit"
+        assert db.get(models.ActivityLog, duplicate).topic == "Déjà là", "the duplicate is dropped"
+        assert db.get(models.ActivityLog, failing) is None
+        db.close()
+
+        assert sink.ensure_written([failing]) == set()
+        assert sink.pending() == 0
+        db = Session()
+        assert db.get(models.ActivityLog, failing).topic == "Panne"
+        assert db.query(models.ActivityLog).filter_by(topic="Écrit").count() == 1, "written rows are not retried"
+        db.close()
+    finally:
+        sink.stop()
+        database.SessionLocal = original_session
+        engine.dispose()
+    print("✅ Rows failing during isolation are requeued, not reported as written")
+
+
+if __name__ == "__main__":
+    test_id_blocks_across_workers()
+    test_sink_batches_and_hooks()
+    test_isolated_rows_requeued()
@@ -0,0 +1,85 @@
+import os
+import sys
+import tempfile
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.services import search_service, user_admin_service
+from app.services.email_outbox import email_sender
+from app.services.email_service import email_service
+
+CSV = """Email;Nom;Etablissement;Formule
+prof.a@lycee.fr;Alice Martin;Lycée Jean Moulin;trial
+PROF.B@lycee.fr;Bruno Petit;Lycée Jean Moulin;
+pas-un-email;Claire;;
+prof.a@lycee.fr;Alice bis;;
+admin@lycee.fr;Déjà là;;
+prof.c@lycee.fr;Claire Dupont;;
+prof.d@lycee.fr;Claire Dupont;;
+"""
+
+
+def test_bulk_actions_and_import():
+    print("🚀 Admin bulk operations test...")
+    db_path = os.path.join(tempfile.mkdtemp(), "admin.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    admin = models.User(email="admin@lycee.fr", full_name="Admin", role="admin", status="active")
+    db.add(admin)
+    db.add_all([models.User(email=f"prof{i}@lycee.fr", full_name=f"Prof {i}", status="pending") for i in range(30)])
+    db.commit()
+    prof29 = db.query(models.User).filter_by(email="prof29@lycee.fr").one().id
+    org = models.Organization(name="Org de Claire Dupont (prof.c@lycee.fr)")
+    db.add(org)
+    db.add(models.ChatSession(user_id=prof29, title="Chat"))
+    search_service.index_entry(db.connection(), search_service.KIND_DOCUMENT, "doc-29", prof29, "Négociation", "client")
+    db.commit()
+    admin_id, existing_org = admin.id, org.id
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql.split()[0]))
+    credentials = email_service.smtp_user, email_service.smtp_password
+    email_service.smtp_user, email_service.smtp_password = "bot@lycee.fr", "secret"
+    original_wake = email_sender.wake
+    email_sender.wake = lambda: None
+    try:
+        result = user_admin_service.bulk_update(db, "approve", user_admin_service.selection(admin_id, status="pending"))
+        assert result == {"action": "approve", "updated": 30, "emails_queued": 30}
+        assert statements == ["UPDATE", "INSERT"], statements
+        # Already active: nothing changes, no second email
+        again = user_admin_service.bulk_update(db, "approve", user_admin_service.selection(admin_id, status="active"))
+        assert again["updated"] == 0 and db.query(models.EmailOutbox).count() == 30
+
+        ids = [u.id for u in db.query(models.User).filter(models.User.email.in_(["prof28@lycee.fr", "prof29@lycee.fr"]))]
+        result = user_admin_service.bulk_delete(db, user_admin_service.selection(admin_id, user_ids=ids + [admin_id]))
+        assert result["updated"] == 2, "the acting admin is never selected"
+        assert db.query(models.ChatSession).one().user_id is None
+        assert db.query(models.SearchEntry).count() == 0, "search entries go with the account"
+        assert search_service.search(db, prof29, "négo") == []
+
+        rows, errors = user_admin_service.parse_teachers_csv(CSV.encode("utf-8"))
+        assert [e["line"] for e in errors] == [4, 5]
+        result = user_admin_service.import_teachers(db, rows)
+        assert result == {"created": 4, "existing": 1, "organizations_created": 3, "emails_queued": 4}
+        bruno = db.query(models.User).filter_by(email="prof.b@lycee.fr").one()
+        assert bruno.status == "active" and bruno.organization.name == "Lycée Jean Moulin"
+        claires = db.query(models.User).filter(models.User.email.in_(["prof.c@lycee.fr", "prof.d@lycee.fr"])).all()
+        assert len({c.organization_id for c in claires}) == 2, "no organization in the CSV: one each"
+        assert all(c.organization.name.startswith(f"Org de Claire Dupont ({c.email})") for c in claires)
+        assert existing_org not in {c.organization_id for c in claires}, "never matched by name"
+    finally:
+        email_service.smtp_user, email_service.smtp_password = credentials
+        email_sender.wake = original_wake
+        db.close()
+        engine.dispose()
+    print("✅ 30 approvals in one UPDATE, deletes and CSV import OK")
+
+
+if __name__ == "__main__":
+    test_bulk_actions_and_import()
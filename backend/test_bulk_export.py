@@ -0,0 +1,129 @@
+import os
+import sys
+import asyncio
+import zipfile
+import tempfile
+import threading
+from io import BytesIO
+from pathlib import Path
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.auth import get_current_user
+from app.database import get_db
+from app.routers import export
+from app.services.export_service import ArtifactStore, ExportService
+
+QUIZ = "# Quiz\n\n1. Capitale ?\nA) Paris\nB) Lyon\n\n## Corrigé et Explications\n1. A"
+
+
+def _setup():
+    db_path = os.path.join(tempfile.mkdtemp(), "bulk_export.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = models.User(email="prof@lycee.fr", full_name="Prof", status="active")
+    db.add(user)
+    db.commit()
+    docs = [
+        models.SavedDocument(user_id=user.id, title="Quiz géographie", document_type="quiz", content=QUIZ),
+        models.SavedDocument(user_id=user.id, title="Cours", document_type="cours", content="# Cours\n\nTexte."),
+    ]
+    db.add_all(docs)
+    db.commit()
+    service = ExportService(max_workers=2)
+    service.store = ArtifactStore(root=Path(tempfile.mkdtemp()))
+    return engine, db, user, docs, service
+
+
+def test_bulk_zip_entries():
+    print("🚀 Bulk export ZIP test...")
+    engine, db, user, docs, service = _setup()
+    app = FastAPI()
+    app.include_router(export.router, prefix="/api/export")
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_db] = lambda: db
+    # md_to_gift calls Gemini: a local conversion stands in for it here
+    original = export.export_service, dict(export.BULK_RENDERERS)
+    export.export_service = service
+    export.BULK_RENDERERS["gift"] = (lambda md_text, output=None: export._emit(md_text.upper().encode("utf-8"), output), "_moodle.txt")
+    try:
+        response = TestClient(app).post("/api/export/bulk", json={
+            "document_ids": [d.id for d in docs], "formats": ["pdf", "docx", "gift"], "filename": "lot",
+        })
+        assert response.status_code == 200 and response.headers["content-type"] == "application/zip"
+        assert response.headers["content-disposition"] == "attachment; filename=lot.zip"
+        with zipfile.ZipFile(BytesIO(response.content)) as archive:
+            assert archive.testzip() is None
+            names = sorted(archive.namelist())
+            quiz, course = (f"{export._safe_filename(d.title)}_{d.id[:8]}" for d in docs)
+            expected = [f"{quiz}.pdf", f"{quiz}.docx", f"{quiz}_moodle.txt", f"{course}.pdf", f"{course}.docx"]
+            assert names == sorted(expected), "GIFT only for quizzes, no erreurs.txt"
+            assert archive.read(f"{course}.pdf").startswith(b"%PDF")
+            with zipfile.ZipFile(BytesIO(archive.read(f"{quiz}.docx"))) as docx:
+                assert "Capitale ?" in docx.read("word/document.xml").decode("utf-8")
+            assert archive.read(f"{quiz}_moodle.txt").decode("utf-8") == QUIZ.upper()
+        assert service._interactive_inflight == 0
+    finally:
+        export.export_service = original[0]
+        export.BULK_RENDERERS.clear()
+        export.BULK_RENDERERS.update(original[1])
+        service.shutdown()
+        db.close()
+        engine.dispose()
+    print("✅ Every render is in the streamed ZIP")
+
+
+def test_disconnect_cancels_pending_renders():
+    print("🚀 Bulk export disconnect test...")
+    engine, db, user, docs, service = _setup()
+    service.executor.shutdown()
+    service.executor = service.executor.__class__(max_workers=1)
+    calls, start, release = [], threading.Event(), threading.Event()
+
+    def render(md_text, output=None):
+        calls.append(md_text)
+        (start if len(calls) == 1 else release).wait(5)
+        output.write(b"rendu")
+
+    request = export.BulkExportRequest(document_ids=[d.id for d in docs], formats=["pdf", "docx"])
+    original = export.export_service, dict(export.BULK_RENDERERS)
+    export.export_service = service
+    export.BULK_RENDERERS.update(pdf=(render, ".pdf"), docx=(render, ".docx"))
+
+    async def first_chunk_then_disconnect():
+        response = await export.export_bulk(request, current_user=user, db=db)
+        assert service._interactive_inflight == 4, "bulk renders count as interactive"
+        start.set()
+        body = response.body_iterator
+        await body.__anext__()
+        await body.aclose()
+
+    try:
+        asyncio.run(first_chunk_then_disconnect())
+        release.set()
+        service.executor.shutdown(wait=True)
+        assert len(calls) == 2, "the two renders still queued were cancelled"
+        assert service._interactive_inflight == 0
+    finally:
+        start.set()
+        release.set()
+        export.export_service = original[0]
+        export.BULK_RENDERERS.clear()
+        export.BULK_RENDERERS.update(original[1])
+        service.shutdown()
+        db.close()
+        engine.dispose()
+    print("✅ A client disconnect drops the renders that have not started")
+
+
+if __name__ == "__main__":
+    test_bulk_zip_entries()
+    test_disconnect_cancels_pending_renders()
@@ -0,0 +1,38 @@
+import os
+import sys
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services import classroom_service
+from app.services.google_api import Backoff, GoogleApiFactory
+from benchmark_classroom_bulk import FakeClassroomApi, start_stub
+
+
+def test_bulk_coursework_and_course_pages():
+    print("🚀 Classroom bulk publishing test...")
+    server, url = start_stub()
+    service = GoogleApiFactory(endpoints={"classroom": url}).classroom("token")
+    FakeClassroomApi.http_calls.clear()
+    FakeClassroomApi.rate_limited = {"103"}
+    try:
+        courses = classroom_service.list_courses(service)
+        assert [c["id"] for c in courses] == [c["id"] for c in FakeClassroomApi.courses], "every page listed"
+        assert FakeClassroomApi.http_calls.count("/v1/courses") == 3
+
+        course_ids = [c["id"] for c in courses[:8]]
+        results = classroom_service.create_coursework(
+            service, course_ids, {"title": "Séance", "workType": "ASSIGNMENT", "state": "DRAFT"},
+            backoff=Backoff(retries=2, base=0.01),
+        )
+    finally:
+        server.shutdown()
+    assert sorted(results) == sorted(course_ids)
+    assert all(results[c]["url"] == f"https://classroom.example/c/{c}" for c in course_ids), results
+    # One batch for the 8 courses, then one for the rate-limited course
+    assert FakeClassroomApi.http_calls.count("/batch") == 2
+    print("✅ 8 assignments in 2 batch calls, 3 course pages listed")
+
+
+if __name__ == "__main__":
+    test_bulk_coursework_and_course_pages()
@@ -0,0 +1,110 @@
+import os
+import sys
+import socket
+import tempfile
+from datetime import datetime
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from aiosmtpd.controller import Controller
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, database
+from app.services import email_outbox
+
+
+class RecordingHandler:
+    """Local SMTP stand-in: counts sessions, defers one recipient once, rejects another."""
+    def __init__(self):
+        self.sessions = 0
+        self.messages = []
+        self.deferred = set()
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("inconnu@"):
+            return "550 5.1.1 Unknown user"
+        if address.startswith("occupe@") and address not in self.deferred:
+            self.deferred.add(address)
+            return "451 4.3.0 Try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos[0], envelope.content))
+        return "250 Message accepted"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_outbox_batches_over_one_connection():
+    print("🚀 Email outbox test...")
+    db_path = os.path.join(tempfile.mkdtemp(), "outbox.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    original_session = database.SessionLocal
+    database.SessionLocal = Session
+
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    sender = email_outbox.EmailSender(host="127.0.0.1", port=controller.port, user="", password="",
+                                      starttls=False, batch_size=20)
+    original_sender = email_outbox.email_sender
+    email_outbox.email_sender = sender
+    wakes = []
+    sender.wake = lambda: wakes.append(1)  # flushed explicitly below, not by the background thread
+    try:
+        db = Session()
+        for i in range(48):
+            email_outbox.enqueue(db, f"prof{i}@lycee.fr", f"Compte validé {i}", "<p>Bienvenue</p>")
+        email_outbox.enqueue(db, "occupe@lycee.fr", "Compte validé", "<p>Bienvenue</p>")
+        email_outbox.enqueue(db, "inconnu@lycee.fr", "Compte validé", "<p>Bienvenue</p>")
+        assert not wakes and sender.flush() == 0, "nothing is sent before the caller commits"
+        db.commit()
+        db.close()
+        assert wakes, "the sender is woken once the caller has committed"
+
+        assert sender.flush() == 48
+        assert handler.sessions == 1, f"one SMTP session for 3 batches, got {handler.sessions}"
+
+        db = Session()
+        statuses = {row.to_email: row for row in db.query(models.EmailOutbox)}
+        assert statuses["inconnu@lycee.fr"].status == "failed", "5xx is not retried"
+        deferred = statuses["occupe@lycee.fr"]
+        assert deferred.status == "pending" and deferred.next_attempt_at > datetime.utcnow(), "4xx is retried later"
+        db.close()
+
+        # Backoff elapsed
+        with engine.begin() as conn:
+            conn.execute(models.EmailOutbox.__table__.update().values(next_attempt_at=datetime.utcnow()).where(
+                models.EmailOutbox.__table__.c.status == "pending"))
+        assert sender.flush() == 1
+        db = Session()
+        assert db.query(models.EmailOutbox).filter_by(status="sent").count() == 49
+        assert db.query(models.EmailOutbox).filter_by(to_email="occupe@lycee.fr").one().attempts == 2
+        db.close()
+        assert handler.sessions == 1 and len(handler.messages) == 49
+        assert handler.messages[0][0] == "prof0@lycee.fr" and b"To: prof0@lycee.fr" in handler.messages[0][1]
+    finally:
+        sender._close()
+        controller.stop()
+        email_outbox.email_sender = original_sender
+        database.SessionLocal = original_session
+        engine.dispose()
+    print("✅ 49 emails over one SMTP session, 4xx retried, 5xx given up")
+
+
+if __name__ == "__main__":
+    test_outbox_batches_over_one_connection()
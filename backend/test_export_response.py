@@ -0,0 +1,76 @@
+import os
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.auth import get_current_user
+from app.routers import export
+from app.services.export_service import ArtifactStore, ExportService
+
+SAMPLE = "# Progression\n\n| Séance | Objectif | Note |\n|-|-|-:|\n" + "\n".join(
+    f"| {i} | Négociation {i * 7919 % 10007} : **découverte** et bilan | {i * 31 % 20}/20 |" for i in range(2000)
+)
+
+
+def test_pdf_export_streamed_whole():
+    print("🚀 Streamed PDF export test...")
+    service = ExportService(max_workers=1)
+    service.store = ArtifactStore(root=Path(tempfile.mkdtemp()))
+    artifacts = []
+    render = service.render
+
+    async def recording_render(fmt, fn, content):
+        artifacts.append(await render(fmt, fn, content))
+        return artifacts[-1]
+
+    service.render = recording_render
+    app = FastAPI()
+    app.include_router(export.router, prefix="/api/export")
+    app.dependency_overrides[get_current_user] = lambda: None
+    original = export.export_service
+    export.export_service = service
+    try:
+        client = TestClient(app)
+        for attempt in ("rendu", "cache"):
+            response = client.post("/api/export/pdf", json={"content": SAMPLE, "filename": "Progression"})
+            assert response.status_code == 200 and response.headers["content-type"] == "application/pdf"
+            assert response.headers["content-disposition"] == "attachment; filename=Progression.pdf"
+            stored = service.store.path("pdf", SAMPLE, export.md_to_pdf.cache_variant()).read_bytes()
+            assert len(stored) > 64 * 1024, "several chunks"
+            assert int(response.headers["content-length"]) == len(response.content)
+            assert response.content == stored, attempt
+            assert response.content.rstrip().endswith(b"%%EOF")
+            assert artifacts[-1].closed, f"handle closed after the response ({attempt})"
+    finally:
+        export.export_service = original
+        service.shutdown()
+    print("✅ The whole artifact is sent and its handle closed")
+
+
+def test_disconnect_closes_artifact():
+    print("🚀 Export disconnect test...")
+    artifact = tempfile.TemporaryFile()
+    artifact.write(os.urandom(300 * 1024))
+
+    async def first_chunk_then_disconnect():
+        response = export._export_response(artifact, "application/pdf", "x.pdf")
+        assert response.headers["content-length"] == str(300 * 1024)
+        body = response.body_iterator
+        assert len(await body.__anext__()) == 64 * 1024
+        await body.aclose()
+
+    asyncio.run(first_chunk_then_disconnect())
+    assert artifact.closed
+    print("✅ A client disconnect closes the artifact")
+
+
+if __name__ == "__main__":
+    test_pdf_export_streamed_whole()
+    test_disconnect_closes_artifact()
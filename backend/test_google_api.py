@@ -0,0 +1,38 @@
+import os
+import sys
+import threading
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.google_api import GoogleApiFactory
+
+
+def test_factory_reuses_documents_and_transport():
+    print("🚀 Google API factory test...")
+    factory = GoogleApiFactory()
+    teacher_a = factory.classroom("token-a")
+    teacher_b = factory.classroom("token-b", refresh_token="refresh-b")
+
+    # One parsed discovery document, one transport per thread, credentials per user
+    assert factory.document("classroom", "v1") is factory.document("classroom", "v1")
+    assert teacher_a._http.http is teacher_b._http.http is factory.http()
+    assert teacher_a._http.credentials.token == "token-a"
+    assert teacher_b._http.credentials.refresh_token == "refresh-b"
+
+    other_thread = []
+    thread = threading.Thread(target=lambda: other_thread.append(factory.http()))
+    thread.start()
+    thread.join()
+    assert other_thread[0] is not factory.http(), "httplib2.Http is not shared across threads"
+
+    # Requests are built offline from the bundled documents
+    request = teacher_a.courses().courseWork().create(courseId="42", body={"title": "Quiz"})
+    assert request.uri.startswith("https://classroom.googleapis.com/v1/courses/42/courseWork")
+    form = factory.forms("token-a").forms().create(body={"info": {"title": "Quiz"}})
+    assert form.uri.startswith("https://forms.googleapis.com/v1/forms")
+    print("✅ Discovery document parsed once, transport reused, credentials per user")
+
+
+if __name__ == "__main__":
+    test_factory_reuses_documents_and_transport()
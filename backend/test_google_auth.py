@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import datetime
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from google.auth import crypt, jwt
+
+from app.services.google_auth_service import GoogleTokenVerifier
+
+CLIENT_ID = "test-client.apps.googleusercontent.com"
+
+
+def make_key(kid):
+    """Generates a local RSA key and the matching self-signed x509 cert, like Google's v1/certs."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "test")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    pem_key = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    signer = crypt.RSASigner.from_string(pem_key, key_id=kid)
+    return signer, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def make_token(signer, email="prof@ecole.fr", aud=CLIENT_ID):
+    now = int(time.time())
+    payload = {"iss": "https://accounts.google.com", "aud": aud, "sub": "123", "email": email,
+               "email_verified": True, "iat": now, "exp": now + 600}
+    return jwt.encode(signer, payload).decode()
+
+
+class FakeResponse:
+    def __init__(self, certs, max_age):
+        self.status_code = 200
+        self.headers = {"Cache-Control": f"public, max-age={max_age}, must-revalidate, no-transform"}
+        self._certs = certs
+
+    def json(self):
+        return dict(self._certs)
+
+
+class FakeSession:
+    """Stands in for requests.Session: serves local certs and counts outbound calls."""
+    def __init__(self, certs, max_age=3600):
+        self.certs = certs
+        self.max_age = max_age
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        return FakeResponse(self.certs, self.max_age)
+
+
+def test_certs_fetched_once_for_many_logins():
+    print("🚀 Google token verification test...")
+    signer, cert = make_key("k1")
+    session = FakeSession({"k1": cert})
+    verifier = GoogleTokenVerifier(session=session)
+
+    for i in range(50):
+        idinfo = verifier.verify_oauth2_token(make_token(signer, email=f"prof{i}@ecole.fr"), CLIENT_ID)
+        assert idinfo["email"] == f"prof{i}@ecole.fr"
+    assert session.calls == 1
+    print("   ✅ 50 logins, 1 certificate fetch")
+
+
+def test_rejects_bad_audience_and_foreign_key():
+    signer, cert = make_key("k1")
+    verifier = GoogleTokenVerifier(session=FakeSession({"k1": cert}))
+
+    try:
+        verifier.verify_oauth2_token(make_token(signer, aud="other-client"), CLIENT_ID)
+        assert False, "audience mismatch accepted"
+    except ValueError:
+        pass
+
+    # Same kid, different key: signature must not verify
+    forged_signer, _ = make_key("k1")
+    try:
+        verifier.verify_oauth2_token(make_token(forged_signer), CLIENT_ID)
+        assert False, "forged token accepted"
+    except ValueError:
+        pass
+    print("   ✅ Bad audience and forged signature rejected")
+
+
+def test_expired_certs_and_key_rotation_refresh():
+    signer, cert = make_key("k1")
+    session = FakeSession({"k1": cert}, max_age=0)
+    verifier = GoogleTokenVerifier(session=session)
+    verifier.verify_oauth2_token(make_token(signer), CLIENT_ID)
+    verifier.verify_oauth2_token(make_token(signer), CLIENT_ID)
+    assert session.calls == 2  # max-age=0: refreshed every time
+
+    # Google rotates to a new key id: an unknown kid forces one refresh
+    session.max_age = 3600
+    verifier._refresh()
+    new_signer, new_cert = make_key("k2")
+    session.certs = {"k1": cert, "k2": new_cert}
+    verifier._fetched_at -= 3600
+    calls = session.calls
+    assert verifier.verify_oauth2_token(make_token(new_signer), CLIENT_ID)["email"] == "prof@ecole.fr"
+    assert session.calls == calls + 1
+    print("   ✅ Certificates refreshed on expiry and on key rotation")
+
+
+if __name__ == "__main__":
+    test_certs_fetched_once_for_many_logins()
+    test_rejects_bad_audience_and_foreign_key()
+    test_expired_certs_and_key_rotation_refresh()
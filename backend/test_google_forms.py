@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services import google_forms
+from app.services.google_api import Backoff, GoogleApiFactory
+
+QUIZ = """## Quiz : la négociation
+
+1. Quelle est la première étape de la vente ?
+A) La conclusion
+B) La découverte des besoins
+C) L'argumentation
+
+2. Que signifie CAP ?
+A) Caractéristiques, Avantages, Preuves
+B) Client, Achat, Produit
+
+## Corrigé
+1. B
+2. A
+"""
+
+
+class FakeFormsApi(BaseHTTPRequestHandler):
+    """Minimal Forms API: forms.create and forms.batchUpdate, with the first calls rate limited."""
+    calls = []
+    rate_limited = 2
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+        cls = FakeFormsApi
+        with cls.lock:
+            cls.calls.append((self.path.split("?")[0], body))
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            limited = cls.rate_limited > 0
+            cls.rate_limited -= int(limited)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.in_flight -= 1
+        if limited:
+            return self._reply(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}}, {"Retry-After": "0"})
+        if self.path.startswith("/v1/forms?"):
+            form_id = f"form-{len(cls.calls)}"
+            return self._reply(200, {"formId": form_id, "responderUri": f"https://forms.example/{form_id}"})
+        return self._reply(200, {"replies": []})
+
+    def _reply(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_forms_against_fake_api():
+    print("🚀 Google Forms publishing test...")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeFormsApi)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    factory = GoogleApiFactory(endpoints={"forms": f"http://127.0.0.1:{server.server_port}/"})
+    try:
+        questions = google_forms.local_questions(QUIZ)
+        assert questions[0]["correct_solution"] == "La découverte des besoins", "no Gemini call for a plain quiz"
+
+        quizzes = [{"title": f"Quiz {i}", "content": QUIZ} for i in range(6)]
+        results = google_forms.create_forms("token", None, quizzes, factory=factory, concurrency=3,
+                                            backoff=Backoff(retries=3, base=0.01))
+    finally:
+        server.shutdown()
+
+    assert [r["title"] for r in results] == [q["title"] for q in quizzes]
+    assert all("error" not in r and r["url"].startswith("https://forms.example/") for r in results), results
+    creates = [body for path, body in FakeFormsApi.calls if path == "/v1/forms"]
+    updates = [body for path, body in FakeFormsApi.calls if path.endswith(":batchUpdate")]
+    assert len(creates) + len(updates) == 6 * 2 + 2, "2 round trips per form, plus the 2 rate-limited calls"
+    requests = updates[-1]["requests"]
+    assert "updateSettings" in requests[0] and len(requests) == 3, "quiz mode and questions in one batchUpdate"
+    assert FakeFormsApi.max_in_flight > 1, "forms are created concurrently"
+    print(f"✅ 6 forms, 12 API calls, up to {FakeFormsApi.max_in_flight} in flight, rate limit retried")
+
+
+if __name__ == "__main__":
+    test_forms_against_fake_api()
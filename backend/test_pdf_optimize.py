@@ -0,0 +1,61 @@
+import os
+import re
+import sys
+
+import pytest
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.routers.export import _optimize_pdf_bytes, md_to_pdf
+
+SAMPLE = """# Fiche de négociation
+
+Un **client** hésite entre deux offres : *argumentez* avec des éléments chiffrés.
+
+| Étape | Objectif | Durée |
+|:-|:-:|--:|
+| Découverte | Identifier les **besoins** | 5 min |
+| Argumentation | Répondre aux *objections* | 10 min |
+
+---
+
+## GRILLE D'AIDE
+
+| Critère | Oui | Non |
+|---|---|---|
+| Reformulation | | |
+""" + "\n".join(f"- Point {i} : prix, délai, garantie" for i in range(80))
+
+
+def _read(pymupdf, data):
+    doc = pymupdf.open(stream=data, filetype="pdf")
+    assert not doc.is_repaired, "the reader had to repair the xref"
+    return doc.page_count, [page.get_text() for page in doc]
+
+
+def test_optimized_pdf_reads_the_same():
+    print("🚀 PDF optimizer round trip...")
+    pymupdf = pytest.importorskip("pymupdf")
+    raw = md_to_pdf(SAMPLE, optimize=False)
+    optimized = _optimize_pdf_bytes(raw)
+    assert len(optimized) < len(raw)
+    pages, text = _read(pymupdf, raw)
+    assert pages > 1 and "Argumentation" in text[0]
+    assert _read(pymupdf, optimized) == (pages, text)
+    # Shared font styles + optimizer, as PDF_OPTIMIZE=true renders it
+    assert _read(pymupdf, md_to_pdf(SAMPLE, optimize=True)) == (pages, text)
+    print(f"✅ Same pages and text after optimization ({len(raw)} -> {len(optimized)} bytes)")
+
+
+def test_unparseable_input_is_returned_unchanged():
+    print("🚀 PDF optimizer fallback...")
+    raw = md_to_pdf(SAMPLE, optimize=False)
+    for data in [b"pas un PDF", raw[:len(raw) // 2], re.sub(rb"/Root \d+ 0 R", b"/Root 999 0 R", raw)]:
+        assert _optimize_pdf_bytes(data) is data
+    print("✅ Anything the optimizer cannot parse is kept as rendered")
+
+
+if __name__ == "__main__":
+    test_optimized_pdf_reads_the_same()
+    test_unparseable_input_is_returned_unchanged()
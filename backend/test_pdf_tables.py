@@ -0,0 +1,99 @@
+import os
+import sys
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fpdf import FPDF
+
+from app.routers.export import _TABLE_SEPARATOR_RE, _cell_to_words, _parse_md_table, _render_pdf_table, _wrap_cell
+
+
+class RecordingPDF(FPDF):
+    """Keeps every word drawn, with its page and baseline."""
+    def __init__(self):
+        super().__init__()
+        self.drawn = []
+        self.add_page()
+        self.set_font("helvetica", "", 10)
+
+    def text(self, x, y, text=""):
+        self.drawn.append((self.page, x, y, text))
+        return super().text(x, y, text)
+
+
+def _words_on_pages(pdf):
+    pages = {}
+    for page, _, _, word in pdf.drawn:
+        pages.setdefault(page, []).append(word)
+    return pages
+
+
+def test_separator_variants():
+    print("🚀 Table delimiter rows...")
+    for line in ["|---|---|", "|:-|--|", "| :-: | -: |", "-|-", ":---:|:--", "|-|"]:
+        assert _TABLE_SEPARATOR_RE.match(line), line
+    for line in ["| a | b |", "|--a|", "||", "| - x |"]:
+        assert not _TABLE_SEPARATOR_RE.match(line), line
+
+    rows, aligns = _parse_md_table(["| Gauche | Centre | Droite |", "|:-|:-:|-:|", "| 1 | 2 | 3 |", "| - | - | - |"])
+    assert aligns == ["L", "C", "R"]
+    assert len(rows) == 3, "a body row of dashes is content, not a delimiter"
+    assert rows[2] == [[[("", "-")]]] * 3
+    rows, aligns = _parse_md_table(["Nom | Note", "-|-", "Alice | 12"])
+    assert aligns == ["L", "L"] and len(rows) == 2
+    print("✅ Short GFM delimiters are recognised")
+
+
+def test_wrapped_cells():
+    print("🚀 Cell wrapping...")
+    pdf = RecordingPDF()
+    cell = _cell_to_words("Une **phrase assez longue** pour tenir sur plusieurs lignes<br>et une seconde ligne")
+    wrapped = _wrap_cell(pdf, cell, 40)
+    assert len(wrapped) > 2
+    for words, width in wrapped:
+        assert width <= 40 or len(words) == 1
+    assert [w for line, _ in wrapped for _, w, _ in line] == [w for line in cell for _, w in line]
+    assert ("B", "phrase") in [(s, w) for line, _ in wrapped for s, w, _ in line]
+
+    _render_pdf_table(pdf, ["| Question | Réponse |", "|-|-|", "| Courte | " + "mot " * 60 + "|"], "helvetica")
+    baselines = sorted({y for _, _, y, word in pdf.drawn if word == "mot"})
+    assert len(baselines) > 1, "the long cell wraps over several lines"
+    print("✅ Cells wrap on word boundaries")
+
+
+def test_page_break_repeats_header():
+    print("🚀 Table across pages...")
+    pdf = RecordingPDF()
+    lines = ["| Entête A | Entête B |", "|---|---|"] + [f"| ligne{i} | valeur{i} |" for i in range(120)]
+    _render_pdf_table(pdf, lines, "helvetica")
+    pages = _words_on_pages(pdf)
+    assert len(pages) > 1
+    for words in pages.values():
+        assert words[:2] == ["Entête", "A"], "the header opens every page"
+    body = [w for words in pages.values() for w in words if w.startswith("ligne")]
+    assert body == [f"ligne{i}" for i in range(120)], "every row once, in order"
+    assert all(y <= pdf.page_break_trigger for _, _, y, _ in pdf.drawn)
+    print("✅ The header is repeated after each page break")
+
+
+def test_row_taller_than_page():
+    print("🚀 Row taller than a page...")
+    pdf = RecordingPDF()
+    words = [f"w{i}" for i in range(4000)]
+    _render_pdf_table(pdf, ["| Sujet | Détail |", "|:-|--|", f"| Long | {' '.join(words)} |", "| Après | fin |"], "helvetica")
+    pages = _words_on_pages(pdf)
+    assert len(pages) >= 3, "the row is continued over several pages"
+    assert [w for page in pages.values() for w in page if w.startswith("w")] == words
+    for words_on_page in pages.values():
+        assert words_on_page[0] == "Sujet"
+    assert "Après" in pages[max(pages)]
+    assert all(y <= pdf.page_break_trigger for _, _, y, _ in pdf.drawn), "nothing drawn in the bottom margin"
+    print("✅ A row taller than a page is split across pages")
+
+
+if __name__ == "__main__":
+    test_separator_variants()
+    test_wrapped_cells()
+    test_page_break_repeats_header()
+    test_row_taller_than_page()
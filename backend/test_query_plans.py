@@ -0,0 +1,178 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import tempfile
+
+import pytest
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, select, func, text
+
+from app import models
+from app.models import ActivityLog, SavedDocument, PublishedQuiz
+from app.migrations import run_migrations
+
+# Small by default so a normal run stays fast; QUERY_PLAN_ROWS=1000000 for a production-sized check
+LOG_ROWS = int(os.getenv("QUERY_PLAN_ROWS", "20000"))
+DOC_ROWS = LOG_ROWS // 10
+USERS = 1000
+USER_ID = "user-42"
+
+# Set TEST_POSTGRES_URL (e.g. postgresql://postgres@localhost/plans_test) to also check PostgreSQL plans.
+# The test works in a throwaway schema that it drops afterwards; nothing else in the database is touched.
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+USER_ACTIVITY_INDEXES = ("ix_activity_logs_user_timestamp", "ix_activity_logs_user_type", "ix_activity_logs_user_block")
+
+# Hot query -> index it must use
+HOT_QUERIES = {
+    "dashboard_count": (
+        select(func.count(ActivityLog.id)).where(ActivityLog.user_id == USER_ID),
+        USER_ACTIVITY_INDEXES,
+    ),
+    "dashboard_by_type": (
+        select(ActivityLog.document_type, func.count(ActivityLog.id))
+        .where(ActivityLog.user_id == USER_ID).group_by(ActivityLog.document_type),
+        ("ix_activity_logs_user_type",),
+    ),
+    "dashboard_by_block": (
+        select(ActivityLog.target_block, func.count(ActivityLog.id))
+        .where(ActivityLog.user_id == USER_ID).group_by(ActivityLog.target_block),
+        ("ix_activity_logs_user_block",),
+    ),
+    "dashboard_recent": (
+        select(ActivityLog).where(ActivityLog.user_id == USER_ID)
+        .order_by(ActivityLog.timestamp.desc()).limit(10),
+        ("ix_activity_logs_user_timestamp",),
+    ),
+    "dashboard_published": (
+        select(PublishedQuiz.share_code, PublishedQuiz.title, PublishedQuiz.created_at)
+        .where(PublishedQuiz.user_id == USER_ID).order_by(PublishedQuiz.created_at.desc()).limit(50),
+        ("ix_published_quizzes_user_created",),
+    ),
+    "documents_list": (
+        select(SavedDocument).where(SavedDocument.user_id == USER_ID)
+        .order_by(SavedDocument.created_at.desc()),
+        ("ix_saved_documents_user_created",),
+    ),
+}
+
+
+# On SQLite id is the rowid, so (user_id, document_type) covers count(id) ... GROUP BY document_type.
+# PostgreSQL has to read the heap for id whichever index it walks, and picks any user_id-leading one.
+POSTGRES_EXPECTED = {
+    "dashboard_by_type": USER_ACTIVITY_INDEXES,
+    "dashboard_by_block": USER_ACTIVITY_INDEXES,
+}
+
+
+def seed(engine):
+    """Bulk-seeds LOG_ROWS activity logs, DOC_ROWS documents and DOC_ROWS quizzes over USERS users, server-side."""
+    if engine.dialect.name == "sqlite":
+        series = "WITH RECURSIVE s(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM s WHERE n < {count}) SELECT n FROM s"
+        ts = "datetime('2024-01-01', '+' || (n % 100000) || ' minutes')"
+    else:
+        series = "SELECT n FROM generate_series(1, {count}) AS n"
+        ts = "TIMESTAMP '2024-01-01' + (n % 100000) * INTERVAL '1 minute'"
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"""INSERT INTO users (id, email, full_name)
+            SELECT 'user-' || (n - 1), 'user' || n || '@ecole.fr', 'Prof ' || n
+            FROM ({series.format(count=USERS)}) AS seq"""
+        ))
+        conn.execute(text(
+            f"""INSERT INTO activity_logs (timestamp, document_type, topic, target_block, user_id)
+            SELECT {ts}, 'type_' || (n % 8), 'Sujet ' || n, 'Bloc ' || (n % 3), 'user-' || (n % {USERS})
+            FROM ({series.format(count=LOG_ROWS)}) AS seq"""
+        ))
+        conn.execute(text(
+            f"""INSERT INTO saved_documents (id, user_id, title, content, document_type, created_at)
+            SELECT 'doc-' || n, 'user-' || (n % {USERS}), 'Document ' || n, 'contenu', 'cours', {ts}
+            FROM ({series.format(count=DOC_ROWS)}) AS seq"""
+        ))
+        conn.execute(text(
+            f"""INSERT INTO published_quizzes (share_code, title, user_id, created_at)
+            SELECT 'Q' || n, 'Quiz ' || n, 'user-' || (n % {USERS}), {ts}
+            FROM ({series.format(count=DOC_ROWS)}) AS seq"""
+        ))
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+    if engine.dialect.name == "postgresql":
+        # As autovacuum would have: sets the visibility map, which index-only scans depend on
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM ANALYZE"))
+
+
+def explain(conn, stmt) -> str:
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+        return "\n".join(row[-1] for row in rows)
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    plan = json.dumps(plan if not isinstance(plan, str) else json.loads(plan))
+    # activity_logs is partitioned (migration 0010): scans use each partition's own copy of
+    # an index, so name the parent indexes they belong to as well
+    for index in set(re.findall(r'"Index Name": "([^"]+)"', plan)):
+        ancestors = conn.execute(
+            text("SELECT relid::regclass::text FROM pg_partition_ancestors(CAST(:index AS regclass))"),
+            {"index": index},
+        ).scalars().all()
+        plan += "\n" + " ".join(ancestors)
+    return plan
+
+
+def check_plans(engine):
+    run_migrations(engine, models.Base.metadata)
+
+    started = time.time()
+    seed(engine)
+    print(f"   seeded {LOG_ROWS} logs / {DOC_ROWS} documents in {time.time() - started:.1f}s ({engine.dialect.name})")
+
+    with engine.connect() as conn:
+        for name, (stmt, expected) in HOT_QUERIES.items():
+            if engine.dialect.name == "postgresql":
+                expected = POSTGRES_EXPECTED.get(name, expected)
+            plan = explain(conn, stmt)
+            assert any(index in plan for index in expected), f"{name} does not use {expected}:\n{plan}"
+            if engine.dialect.name == "sqlite":
+                assert "TEMP B-TREE FOR ORDER BY" not in plan, f"{name} sorts instead of walking the index:\n{plan}"
+            print(f"   ✅ {name}")
+
+
+def test_query_plans_sqlite():
+    print("🚀 Query plan test (SQLite)...")
+    db_path = os.path.join(tempfile.mkdtemp(), "plans.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    try:
+        check_plans(engine)
+    finally:
+        engine.dispose()
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+def test_query_plans_postgres():
+    print("🚀 Query plan test (PostgreSQL)...")
+    schema = f"plans_test_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(POSTGRES_URL)
+    with admin.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(POSTGRES_URL, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        check_plans(engine)
+    finally:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
+
+
+if __name__ == "__main__":
+    test_query_plans_sqlite()
+    if POSTGRES_URL:
+        test_query_plans_postgres()
@@ -0,0 +1,56 @@
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.routers import student
+from app.services.quiz_cache import QuizCache
+
+
+def test_republish_seen_by_other_hosts():
+    print("🚀 Quiz cache version test...")
+    db_path = os.path.join(tempfile.mkdtemp(), "quiz_cache.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    log = models.ActivityLog(user_id="teacher-1", document_type="quiz", topic="Négociation")
+    db.add(log)
+    db.commit()
+    log_id = log.id
+
+    # Two hosts: each has its own disk cache, they share the database
+    host_a, host_b = (QuizCache(root=Path(tempfile.mkdtemp())) for _ in range(2))
+    original = student.quiz_cache, student.engine, student.SessionLocal
+    student.engine, student.SessionLocal = engine, session_factory
+    try:
+        student.quiz_cache = host_a
+        [(_, _, code, _)] = student._publish(db, [(log_id, "Quiz", "1. Question ?\nA) Oui\nB) Non")], "teacher-1")
+        student.quiz_cache = host_b
+        first = student._load_quiz(code)
+        assert student._load_quiz(code) is first, "served from memory while the version is unchanged"
+
+        student.quiz_cache = host_a
+        student._publish(db, [(log_id, "Quiz v2", "1. Question ?\nA) Oui\nB) Non\nC) Peut-être")], "teacher-1")
+        assert len(list(host_a.root.glob(f"{code}.*.json"))) == 1, "the previous version is removed"
+        student.quiz_cache = host_b
+        second = student._load_quiz(code)
+        assert second.etag != first.etag
+        assert json.loads(second.body)["title"] == "Quiz v2"
+    finally:
+        student.quiz_cache, student.engine, student.SessionLocal = original
+        db.close()
+        engine.dispose()
+    print("✅ A re-publish on one host is served by the others")
+
+
+if __name__ == "__main__":
+    test_republish_seen_by_other_hosts()
@@ -0,0 +1,162 @@
+import os
+import sys
+import tempfile
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import models, database
+from app.routers import student
+from app.services.quiz_cache import QuizCache
+from app.services.quiz_parser import parse_quiz, grade, student_content
+from app.services import submission_service
+
+QUIZ = """# Quiz de Révision : La prospection
+
+## Questions
+
+**1. Quel est l'objectif principal de la prospection ?**
+a) Fidéliser les clients existants
+b) Trouver de nouveaux clients
+c) Augmenter les prix
+
+**Question 2 :** Le CRM sert à :
+- A. Gérer la relation client
+- B. Calculer la TVA
+
+3. Citez deux outils de prospection.
+
+## Corrigé et Explications
+
+**1. Réponse : b)** La prospection vise à conquérir de nouveaux clients.
+1. première étape de l'explication
+**Question 2** : **A** - le CRM centralise l'historique client.
+**3.** Fichier clients, réseaux sociaux.
+"""
+
+
+def test_parse_and_grade():
+    print("🚀 Quiz parsing and grading test...")
+    parsed = parse_quiz(QUIZ)
+    questions = {q["number"]: q for q in parsed["questions"]}
+    assert sorted(questions) == [1, 2, 3]
+    assert questions[1]["options"] == {"A": "Fidéliser les clients existants", "B": "Trouver de nouveaux clients", "C": "Augmenter les prix"}
+    assert questions[1]["answer"] == "B"
+    assert questions[2]["answer"] == "A"
+    assert questions[3]["options"] == {} and questions[3]["answer"] is None
+
+    details, score, total = grade(parsed, {1: "b", 2: "B", 3: "Le phoning"})
+    assert (score, total) == (1, 2)
+    assert [d["correct"] for d in details] == [True, False, None]
+    assert all("expected" not in d for d in details), "the answer key is never sent to students"
+
+    for bad in ({4: "A"}, {1: "D"}):
+        try:
+            grade(parsed, bad)
+            assert False, f"{bad} should be rejected"
+        except ValueError:
+            pass
+    print("✅ Parsing and grading OK")
+
+
+def test_writer_batches_and_rollup():
+    print("🚀 Submission write-behind test...")
+    db_path = os.path.join(tempfile.mkdtemp(), "submissions.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+
+    original_session = database.SessionLocal
+    database.SessionLocal = Session
+    writer = submission_service.SubmissionWriter(batch_size=50, interval=60)
+    writer._ensure_started = lambda: None  # flushed explicitly below, not by the background thread
+    original_writer = submission_service.submission_writer
+    submission_service.submission_writer = writer
+    try:
+        parsed = parse_quiz(QUIZ)
+        for i in range(120):
+            answers = {1: "B" if i % 4 else "A", 2: "A", 3: "Le phoning"}
+            _, score, total = grade(parsed, answers)
+            submission_service.record_submission("QUIZTEST", f"Élève {i}", parsed, answers, score, total)
+        assert writer.pending() == 120
+        assert writer.flush() == 120
+        assert len(commits) == 3, f"expected 3 batched transactions, got {len(commits)}"
+
+        db = Session()
+        assert db.query(models.QuizSubmission).count() == 120
+        results = submission_service.get_quiz_results(db, "QUIZTEST", parsed)
+        db.close()
+        q1, q2, q3 = results["questions"]
+        assert results["submissions"] == 120
+        assert q1["choices"] == {"A": 30, "B": 90, "C": 0} and q1["correct_rate"] == 0.75
+        assert q2["correct_rate"] == 1.0
+        assert q3["answered"] == 120 and q3["correct_rate"] is None
+    finally:
+        writer.stop()
+        submission_service.submission_writer = original_writer
+        database.SessionLocal = original_session
+        submission_service.quiz_results_cache.invalidate("QUIZTEST")
+        engine.dispose()
+    print("✅ 120 submissions written in 3 transactions, rollup OK")
+
+
+def test_served_quiz_has_no_answer_key():
+    print("🚀 Student quiz payload test...")
+    inline = "1. Capitale ?\nA) Paris\nB) Lyon\nRéponse : A\n2. Quelle réponse A choisir ?\nA) Oui\nB) Non"
+    assert student_content(inline) == "1. Capitale ?\nA) Paris\nB) Lyon\n2. Quelle réponse A choisir ?\nA) Oui\nB) Non"
+    assert parse_quiz(inline)["questions"][0]["answer"] == "A"
+
+    db_path = os.path.join(tempfile.mkdtemp(), "student_quiz.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    log = models.ActivityLog(user_id="teacher-1", document_type="quiz", topic="Prospection")
+    db.add(log)
+    db.commit()
+
+    original = student.quiz_cache, student.engine, student.SessionLocal, submission_service.submission_writer
+    student.quiz_cache = QuizCache(root=Path(tempfile.mkdtemp()))
+    student.engine, student.SessionLocal = engine, Session
+    writer = submission_service.SubmissionWriter(batch_size=50, interval=60)
+    writer._ensure_started = lambda: None
+    submission_service.submission_writer = writer
+    app = FastAPI()
+    app.include_router(student.router, prefix="/api/student")
+    try:
+        [(_, _, code, _)] = student._publish(db, [(log.id, "Prospection", QUIZ)], "teacher-1")
+        client = TestClient(app)
+        for cache in ("publication", "disque"):
+            response = client.get(f"/api/student/quiz/{code}")
+            assert response.status_code == 200
+            for secret in ("Corrigé", "Réponse : b", "nouveaux clients.", "historique client"):
+                assert secret not in response.text, f"{secret} served ({cache})"
+            payload = response.json()
+            assert payload["content"].rstrip().endswith("3. Citez deux outils de prospection.")
+            assert [q["number"] for q in payload["questions"]] == [1, 2, 3]
+            student.quiz_cache = QuizCache(root=student.quiz_cache.root)  # next read: another worker
+
+        # Grading still uses the key kept in the database
+        result = client.post(f"/api/student/quiz/{code}/submit", json={"student_name": "Léa", "answers": {"1": "b", "2": "A"}})
+        assert result.status_code == 200 and (result.json()["score"], result.json()["total"]) == (2, 2)
+    finally:
+        writer.stop()
+        student.quiz_cache, student.engine, student.SessionLocal, submission_service.submission_writer = original
+        db.close()
+        engine.dispose()
+    print("✅ Students get the questions without the answer key")
+
+
+if __name__ == "__main__":
+    test_parse_and_grade()
+    test_writer_batches_and_rollup()
+    test_served_quiz_has_no_answer_key()
@@ -0,0 +1,163 @@
+import os
+import sys
+import tempfile
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import models, auth
+from app.database import get_db
+from app.routers import student
+from app.services import publish_service
+from app.services.quiz_cache import QuizCache
+
+
+def _setup(logs=1):
+    db_path = os.path.join(tempfile.mkdtemp(), "publish.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    entries = [models.ActivityLog(user_id="teacher-1", document_type="quiz", topic=f"Quiz {i}") for i in range(logs)]
+    db.add_all(entries)
+    db.commit()
+    return engine, db, [entry.id for entry in entries]
+
+
+def test_publish_statements_and_republish():
+    print("🚀 Share code publish test...")
+    engine, db, (log_id,) = _setup()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql.split()[0]))
+
+    [(_, user_id, code, created)] = publish_service.publish_quizzes(db, [(log_id, "Quiz", "## Questions")])
+    # No code lookup: read the log, insert the quiz, update the log, in one transaction
+    assert sorted(statements) == ["INSERT", "SELECT", "UPDATE"], statements
+    assert created and user_id == "teacher-1" and len(code) == publish_service.SHARE_CODE_LENGTH
+
+    [(_, _, same_code, created)] = publish_service.publish_quizzes(db, [(log_id, "Quiz v2", "## Questions v2")], owner_id="teacher-1")
+    assert same_code == code and not created
+    assert db.query(models.PublishedQuiz).count() == 1
+    assert db.query(models.PublishedQuiz).one().content == "## Questions v2"
+    db.close()
+    engine.dispose()
+    print("✅ Single transaction, republish keeps the code")
+
+
+def test_collision_retry_and_bulk():
+    print("🚀 Share code collision test...")
+    engine, db, log_ids = _setup(logs=51)
+    db.add(models.PublishedQuiz(share_code="TAKEN222", title="Existing", content="x"))
+    db.commit()
+
+    original = publish_service.new_share_code
+    generated = iter(["TAKEN222"])
+    publish_service.new_share_code = lambda: next(generated, None) or original()
+    try:
+        [(_, _, code, _)] = publish_service.publish_quizzes(db, [(log_ids[0], "Quiz", "content")])
+    finally:
+        publish_service.new_share_code = original
+    assert code != "TAKEN222"
+
+    published = publish_service.publish_quizzes(db, [(log_id, f"Quiz {log_id}", "content") for log_id in log_ids[1:]])
+    codes = {code for _, _, code, _ in published}
+    assert len(codes) == 50
+    assert db.query(models.PublishedQuiz).count() == 52
+    try:
+        publish_service.publish_quizzes(db, [(999999, "Quiz", "content")])
+        assert False, "unknown log must be rejected"
+    except LookupError:
+        pass
+    try:
+        publish_service.publish_quizzes(db, [(log_ids[1], "Quiz", "content")], owner_id="teacher-2")
+        assert False, "another teacher's log must be rejected"
+    except LookupError as e:
+        assert e.args[0] == log_ids[1]
+    db.close()
+    engine.dispose()
+    print("✅ Collision retried, 50 quizzes published at once")
+
+
+def test_republish_only_by_author():
+    print("🚀 Republish ownership test...")
+    engine, db, (log_id, legacy_id) = _setup(logs=2)
+    [(_, _, code, _)] = publish_service.publish_quizzes(db, [(log_id, "Quiz", "## Questions")], owner_id="teacher-1")
+    for owner_id, error in [(None, PermissionError), ("teacher-2", LookupError)]:
+        try:
+            publish_service.publish_quizzes(db, [(log_id, "Piraté", "## Corrigé")], owner_id=owner_id)
+            assert False, f"overwrite by {owner_id} must be rejected"
+        except error as e:
+            assert e.args[0] == log_id
+    # The quiz's recorded author wins over its log's
+    db.query(models.PublishedQuiz).filter_by(share_code=code).update({"user_id": "teacher-3"})
+    db.commit()
+    try:
+        publish_service.publish_quizzes(db, [(log_id, "Piraté", "## Corrigé")], owner_id="teacher-1")
+        assert False, "only the quiz's author may overwrite it"
+    except PermissionError:
+        pass
+    assert db.query(models.PublishedQuiz).one().title == "Quiz"
+
+    [(_, _, same_code, created)] = publish_service.publish_quizzes(db, [(log_id, "Quiz v2", "x")], admin=True)
+    assert same_code == code and not created
+    # Published before quizzes recorded their author: the log's author may update it
+    publish_service.publish_quizzes(db, [(legacy_id, "Ancien", "x")], owner_id="teacher-1")
+    db.query(models.PublishedQuiz).filter_by(title="Ancien").update({"user_id": None})
+    db.commit()
+    [(_, _, _, created)] = publish_service.publish_quizzes(db, [(legacy_id, "Ancien v2", "y")], owner_id="teacher-1")
+    assert not created
+    db.close()
+    engine.dispose()
+    print("✅ Only the author (or an admin) can overwrite a published quiz")
+
+
+def test_publish_route_requires_owner():
+    print("🚀 Publish endpoint auth test...")
+    engine, db, (log_id,) = _setup()
+    db.add_all([models.User(id="teacher-1", email="prof1@lycee.fr", full_name="Prof 1", status="active"),
+                models.User(id="teacher-2", email="prof2@lycee.fr", full_name="Prof 2", status="active")])
+    db.commit()
+    app = FastAPI()
+    app.include_router(student.router, prefix="/api/student")
+    app.dependency_overrides[get_db] = lambda: db
+    original_cache = student.quiz_cache
+    student.quiz_cache = QuizCache(root=Path(tempfile.mkdtemp()))
+    client = TestClient(app)
+    body = {"log_id": log_id, "title": "Quiz", "content": "1. Question ?\nA) Oui\nB) Non"}
+
+    def bearer(email):
+        return {"Authorization": f"Bearer {auth.create_access_token({'sub': email})}"}
+
+    try:
+        assert client.post("/api/student/publish", json=body).status_code == 401
+        response = client.post("/api/student/publish", json=body, headers=bearer("prof2@lycee.fr"))
+        assert response.status_code == 404, "another teacher's document is not found"
+        assert db.query(models.PublishedQuiz).count() == 0
+
+        response = client.post("/api/student/publish", json=body, headers=bearer("prof1@lycee.fr"))
+        assert response.status_code == 200
+        code = response.json()["share_code"]
+        hijack = dict(body, content="1. Question ?\nA) Oui\nB) Non\n\n## Corrigé\n1. A")
+        assert client.post("/api/student/publish", json=hijack).status_code == 401
+        assert client.post("/api/student/publish", json=hijack, headers=bearer("prof2@lycee.fr")).status_code == 404
+        db.expire_all()
+        quiz = db.query(models.PublishedQuiz).one()
+        assert quiz.share_code == code and quiz.content == body["content"], "the live quiz is untouched"
+    finally:
+        student.quiz_cache = original_cache
+        db.close()
+        engine.dispose()
+    print("✅ Only the author can publish or overwrite a quiz")
+
+
+if __name__ == "__main__":
+    test_publish_statements_and_republish()
+    test_collision_retry_and_bulk()
+    test_republish_only_by_author()
+    test_publish_route_requires_owner()
@@ -0,0 +1,74 @@
+import os
+import sys
+import tempfile
+import threading
+
+# Add backend directory to path so imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from fastapi import HTTPException
+
+from app import models
+from app.services import usage_service
+
+THREADS = 24
+LIMIT = 5
+
+def test_concurrent_quota_no_over_admission():
+    """24 concurrent requests from one user against a limit of 5: exactly 5 must be admitted."""
+    print("🚀 Quota concurrency test...")
+    db_path = os.path.join(tempfile.mkdtemp(), "quota.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False, "timeout": 30}, pool_size=THREADS)
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    db = Session()
+    user = models.User(email="quota.test@ecole.fr", full_name="Quota Test", plan_selection="trial", generation_count=0)
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    original_limit = usage_service.QUOTA_ACTIONS['generate_course']
+    usage_service.QUOTA_ACTIONS['generate_course'] = ("generation_count", LIMIT, "générations")
+
+    admitted, refused = [], []
+    barrier = threading.Barrier(THREADS)
+
+    def worker():
+        session = Session()
+        try:
+            current = session.get(models.User, user_id)
+            session.commit()  # end the read transaction, like get_current_user does before the endpoint runs
+            barrier.wait()
+            usage_service.check_and_increment_usage(session, current, 'generate_course')
+            admitted.append(1)
+        except HTTPException:
+            refused.append(1)
+        finally:
+            session.close()
+
+    try:
+        threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        usage_service.QUOTA_ACTIONS['generate_course'] = original_limit
+
+    db = Session()
+    final_count = db.get(models.User, user_id).generation_count
+    db.close()
+    engine.dispose()
+
+    print(f"   admitted={len(admitted)} refused={len(refused)} generation_count={final_count}")
+    assert len(admitted) == LIMIT
+    assert len(refused) == THREADS - LIMIT
+    assert final_count == LIMIT
+    print("   ✅ No over-admission")
+
+if __name__ == "__main__":
+    test_concurrent_quota_no_over_admission()
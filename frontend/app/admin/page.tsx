@@ -2,7 +2,7 @@
 
 import { useSession } from "next-auth/react";
 import { useRouter } from "next/navigation";
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { Navbar } from "@/components/Navbar";
 import {
     Table,
@@ -14,7 +14,7 @@ import {
 } from "@/components/ui/table";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
-import { Loader2, Trash2, Ban, CheckCircle, Search, ShieldAlert, XCircle, CheckCheck, RefreshCw } from "lucide-react";
+import { Loader2, Trash2, Ban, CheckCircle, Search, ShieldAlert, XCircle, CheckCheck, RefreshCw, Upload } from "lucide-react";
 import { API_BASE_URL } from "@/lib/api";
 
 interface User {
@@ -35,6 +35,8 @@ export default function AdminPage() {
     const [searchQuery, setSearchQuery] = useState("");
     const [isLoading, setIsLoading] = useState(true);
     const [activeTab, setActiveTab] = useState<'users' | 'requests'>('users');
+    const [selectedIds, setSelectedIds] = useState<string[]>([]);
+    const csvInputRef = useRef<HTMLInputElement>(null);
 
     useEffect(() => {
         if (status === "unauthenticated") {
@@ -141,6 +143,62 @@ export default function AdminPage() {
         }
     };
 
+    const handleBulkAction = async (action: 'approve' | 'reject' | 'deactivate' | 'delete') => {
+        if (selectedIds.length === 0) return;
+        if (action === 'delete' && !confirm(`Attention: Cette action est irréversible (RGPD: Droit à l'oubli).\nVoulez-vous vraiment supprimer ${selectedIds.length} utilisateur(s) ?`)) return;
+
+        const token = (session as any)?.accessToken || (session as any)?.user?.accessToken;
+        try {
+            const response = await fetch(`${API_BASE_URL}/api/admin/users/bulk/${action}`, {
+                method: 'POST',
+                headers: {
+                    'Authorization': `Bearer ${token}`,
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ user_ids: selectedIds })
+            });
+
+            if (response.ok) {
+                setSelectedIds([]);
+                fetchUsers();
+            } else {
+                alert("Erreur lors de la mise à jour");
+            }
+        } catch (error) {
+            console.error("Bulk action error:", error);
+        }
+    };
+
+    const handleImportCsv = async (file: File) => {
+        const token = (session as any)?.accessToken || (session as any)?.user?.accessToken;
+        const formData = new FormData();
+        formData.append('file', file);
+        try {
+            const response = await fetch(`${API_BASE_URL}/api/admin/users/import`, {
+                method: 'POST',
+                headers: {
+                    'Authorization': `Bearer ${token}`
+                },
+                body: formData
+            });
+
+            if (response.ok) {
+                const data = await response.json();
+                const errors = data.errors.map((e: any) => `Ligne ${e.line}: ${e.error}`).join('\n');
+                alert(`✅ ${data.created} enseignant(s) importé(s), ${data.existing} déjà inscrit(s).${errors ? '\n\n' + errors : ''}`);
+                fetchUsers();
+            } else {
+                const err = await response.json();
+                alert(`Erreur: ${err.detail}`);
+            }
+        } catch (error) {
+            console.error("Import error:", error);
+            alert("Erreur de connexion au serveur.");
+        } finally {
+            if (csvInputRef.current) csvInputRef.current.value = '';
+        }
+    };
+
     // Filter users
     const filteredUsers = users.filter((user) =>
     (user.full_name?.toLowerCase().includes(searchQuery.toLowerCase()) ||
@@ -149,6 +207,8 @@ export default function AdminPage() {
 
     const activeUsers = filteredUsers.filter((u) => u.status !== 'pending' && u.status !== 'rejected');
     const pendingUsers = filteredUsers.filter((u) => u.status === 'pending');
+    const visibleUsers = activeTab === 'users' ? activeUsers : pendingUsers;
+    const allSelected = visibleUsers.length > 0 && visibleUsers.every((u) => selectedIds.includes(u.id));
 
     if (status === "loading" || isLoading) {
         return <div className="min-h-screen flex items-center justify-center text-slate-500">
@@ -182,27 +242,44 @@ export default function AdminPage() {
                         <h1 className="text-3xl font-bold text-slate-800">Console d'Administration</h1>
                         <p className="text-slate-500">Gestion des utilisateurs, validation des inscriptions et conformité RGPD.</p>
                     </div>
-                    <Button
-                        onClick={handleScan}
-                        className="bg-purple-600 hover:bg-purple-700 text-white shadow-sm"
-                        disabled={isLoading}
-                    >
-                        <RefreshCw className={`w-4 h-4 mr-2 ${isLoading ? 'animate-spin' : ''}`} />
-                        Vectoriser Nouveaux Fichiers
-                    </Button>
+                    <div className="flex gap-2">
+                        <input
+                            ref={csvInputRef}
+                            type="file"
+                            accept=".csv,text/csv"
+                            className="hidden"
+                            onChange={(e) => e.target.files?.[0] && handleImportCsv(e.target.files[0])}
+                        />
+                        <Button
+                            variant="outline"
+                            onClick={() => csvInputRef.current?.click()}
+                            title="CSV : email, nom, etablissement, formule"
+                        >
+                            <Upload className="w-4 h-4 mr-2" />
+                            Importer des enseignants (CSV)
+                        </Button>
+                        <Button
+                            onClick={handleScan}
+                            className="bg-purple-600 hover:bg-purple-700 text-white shadow-sm"
+                            disabled={isLoading}
+                        >
+                            <RefreshCw className={`w-4 h-4 mr-2 ${isLoading ? 'animate-spin' : ''}`} />
+                            Vectoriser Nouveaux Fichiers
+                        </Button>
+                    </div>
                 </div>
 
                 {/* Tabs */}
                 <div className="flex gap-4 mb-6 border-b border-slate-200">
                     <button
-                        onClick={() => setActiveTab('users')}
+                        onClick={() => { setActiveTab('users'); setSelectedIds([]); }}
                         className={`pb-3 px-4 font-medium text-sm transition-colors border-b-2 ${activeTab === 'users' ? 'text-purple-600 border-purple-600' : 'text-slate-500 border-transparent hover:text-slate-700'
                             }`}
                     >
                         Utilisateurs Actifs
                     </button>
                     <button
-                        onClick={() => setActiveTab('requests')}
+                        onClick={() => { setActiveTab('requests'); setSelectedIds([]); }}
                         className={`pb-3 px-4 font-medium text-sm transition-colors border-b-2 relative ${activeTab === 'requests' ? 'text-purple-600 border-purple-600' : 'text-slate-500 border-transparent hover:text-slate-700'
                             }`}
                     >
@@ -226,11 +303,48 @@ export default function AdminPage() {
                     />
                 </div>
 
+                {/* Bulk Actions */}
+                {selectedIds.length > 0 && (
+                    <div className="bg-purple-50 p-3 rounded-xl border border-purple-100 mb-6 flex gap-3 items-center">
+                        <span className="text-sm font-medium text-purple-700 mr-auto">{selectedIds.length} sélectionné(s)</span>
+                        {activeTab === 'requests' ? (
+                            <>
+                                <Button size="sm" variant="outline" className="text-emerald-600 border-emerald-200 hover:bg-emerald-50 h-8" onClick={() => handleBulkAction('approve')}>
+                                    <CheckCheck className="w-4 h-4 mr-1.5" />
+                                    Valider la sélection
+                                </Button>
+                                <Button size="sm" variant="ghost" className="text-red-600 hover:bg-red-50 h-8" onClick={() => handleBulkAction('reject')}>
+                                    <XCircle className="w-4 h-4 mr-1.5" />
+                                    Refuser
+                                </Button>
+                            </>
+                        ) : (
+                            <>
+                                <Button size="sm" variant="ghost" className="text-amber-600 hover:bg-amber-50 h-8" onClick={() => handleBulkAction('deactivate')}>
+                                    <Ban className="w-4 h-4 mr-1.5" />
+                                    Désactiver
+                                </Button>
+                                <Button size="sm" variant="ghost" className="text-red-600 hover:bg-red-50 h-8" onClick={() => handleBulkAction('delete')}>
+                                    <Trash2 className="w-4 h-4 mr-1.5" />
+                                    Supprimer
+                                </Button>
+                            </>
+                        )}
+                    </div>
+                )}
+
                 {/* Content Table */}
                 <div className="bg-white rounded-xl shadow-sm border border-slate-200 overflow-hidden">
                     <Table>
                         <TableHeader>
                             <TableRow className="bg-slate-50/50 hover:bg-slate-50/50">
+                                <TableHead className="py-4 w-10">
+                                    <input
+                                        type="checkbox"
+                                        checked={allSelected}
+                                        onChange={(e) => setSelectedIds(e.target.checked ? visibleUsers.map((u) => u.id) : [])}
+                                    />
+                                </TableHead>
                                 <TableHead className="py-4">Utilisateur</TableHead>
                                 <TableHead className="py-4">Rôle</TableHead>
                                 <TableHead className="py-4">Formule</TableHead>
@@ -240,15 +354,24 @@ export default function AdminPage() {
                             </TableRow>
                         </TableHeader>
                         <TableBody>
-                            {(activeTab === 'users' ? activeUsers : pendingUsers).length === 0 ? (
+                            {visibleUsers.length === 0 ? (
                                 <TableRow>
-                                    <TableCell colSpan={6} className="text-center py-12 text-slate-500">
+                                    <TableCell colSpan={7} className="text-center py-12 text-slate-500">
                                         {activeTab === 'users' ? "Aucun utilisateur actif trouvé." : "Aucune demande en attente."}
                                     </TableCell>
                                 </TableRow>
                             ) : (
-                                (activeTab === 'users' ? activeUsers : pendingUsers).map((user) => (
+                                visibleUsers.map((user) => (
                                     <TableRow key={user.id} className="group">
+                                        <TableCell>
+                                            <input
+                                                type="checkbox"
+                                                checked={selectedIds.includes(user.id)}
+                                                onChange={(e) => setSelectedIds(e.target.checked
+                                                    ? [...selectedIds, user.id]
+                                                    : selectedIds.filter(id => id !== user.id))}
+                                            />
+                                        </TableCell>
                                         <TableCell>
                                             <div>
                                                 <p className="font-medium text-slate-900">{user.full_name}</p>
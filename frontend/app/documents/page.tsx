@@ -17,7 +17,7 @@ export default function DocumentsPage() {
     // Classroom State
     const [courses, setCourses] = useState<any[]>([]);
     const [isClassroomModalOpen, setIsClassroomModalOpen] = useState(false);
-    const [selectedCourseId, setSelectedCourseId] = useState<string>("");
+    const [selectedCourseIds, setSelectedCourseIds] = useState<string[]>([]);
     const [exportLoading, setExportLoading] = useState(false);
 
     useEffect(() => {
@@ -26,22 +26,51 @@ export default function DocumentsPage() {
         }
     }, [session]);
 
-    const fetchDocs = async () => {
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    const fetchDocs = async (cursor?: string) => {
         const token = (session as any)?.accessToken;
         if (!token) return;
+        if (cursor) setLoadingMore(true);
         try {
-            const res = await fetch(`${API_BASE_URL}/api/documents/list`, {
+            const url = cursor
+                ? `${API_BASE_URL}/api/documents/list?cursor=${encodeURIComponent(cursor)}`
+                : `${API_BASE_URL}/api/documents/list`;
+            const res = await fetch(url, {
                 headers: { Authorization: `Bearer ${token}` }
             });
             if (res.ok) {
                 const data = await res.json();
-                setDocs(data);
+                // The list only carries metadata; bodies are loaded by openDoc
+                setDocs(prev => cursor ? [...prev, ...data.items] : data.items);
+                setNextCursor(data.next_cursor);
             }
         } catch (e) {
             console.error(e);
         } finally {
             setLoading(false);
+            setLoadingMore(false);
+        }
+    };
+
+    const openDoc = async (doc: any) => {
+        const token = (session as any)?.accessToken;
+        // Until the body arrives, content is empty: exports stay disabled (contentLoaded)
+        setSelectedDoc({ ...doc, content: "", contentLoaded: false });
+        try {
+            const res = await fetch(`${API_BASE_URL}/api/documents/${doc.id}`, {
+                headers: { Authorization: `Bearer ${token}` }
+            });
+            if (res.ok) {
+                const full = await res.json();
+                setSelectedDoc((current: any) => current?.id === full.id ? { ...full, contentLoaded: true } : current);
+                return;
+            }
+        } catch (e) {
+            console.error(e);
         }
+        setSelectedDoc((current: any) => current?.id === doc.id ? { ...current, loadError: true } : current);
     };
 
     const handleDelete = async (id: string) => {
@@ -58,7 +87,7 @@ export default function DocumentsPage() {
     const [isExporting, setIsExporting] = useState<string | null>(null);
 
     const handleExport = async (format: string) => {
-        if (!selectedDoc) return;
+        if (!selectedDoc?.contentLoaded) return;
         setIsExporting(format);
         try {
             const token = (session as any).accessToken;
@@ -115,7 +144,7 @@ export default function DocumentsPage() {
     };
 
     const handleCreateAutoForm = async () => {
-        if (!selectedDoc) return;
+        if (!selectedDoc?.contentLoaded) return;
         if (!confirm("Créer un Google Formulaire (Quiz) sur votre Drive ?")) return;
 
         setIsExporting("auto_form");
@@ -183,7 +212,7 @@ export default function DocumentsPage() {
             if (res.ok) {
                 const data = await res.json();
                 setCourses(data);
-                if (data.length > 0) setSelectedCourseId(data[0].id);
+                if (data.length > 0) setSelectedCourseIds([data[0].id]);
                 setIsClassroomModalOpen(true);
             } else {
                 const err = await res.text();
@@ -202,23 +231,31 @@ export default function DocumentsPage() {
     };
 
     const handleExportToClassroom = async () => {
-        if (!selectedCourseId || !selectedDoc) return;
+        if (selectedCourseIds.length === 0 || !selectedDoc?.contentLoaded) return;
         setExportLoading(true);
         try {
-            const res = await fetch(`${API_BASE_URL}/api/classroom/coursework`, {
+            // One call for all the selected courses (Google batch request on the server)
+            const res = await fetch(`${API_BASE_URL}/api/classroom/coursework/bulk`, {
                 method: "POST",
                 headers: { "Content-Type": "application/json" },
                 body: JSON.stringify({
                     token: (session as any)?.googleAccessToken,
                     refresh_token: (session as any)?.googleRefreshToken,
-                    courseId: selectedCourseId,
+                    courseIds: selectedCourseIds,
                     title: selectedDoc.title,
                     description: selectedDoc.content
                 })
             });
             if (res.ok) {
                 const data = await res.json();
-                alert(`Devoir créé avec succès ! Lien : ${data.url}`);
+                const failed = data.filter((r: any) => r.error);
+                if (failed.length === 0) {
+                    alert(data.length === 1
+                        ? `Devoir créé avec succès ! Lien : ${data[0].url}`
+                        : `Devoir créé avec succès dans ${data.length} cours !`);
+                } else {
+                    alert(`Devoir créé dans ${data.length - failed.length} cours sur ${data.length}. Échec : ${failed.map((r: any) => courses.find(c => c.id === r.courseId)?.name || r.courseId).join(", ")}`);
+                }
                 setIsClassroomModalOpen(false);
             } else {
                 const err = await res.text();
@@ -256,7 +293,7 @@ export default function DocumentsPage() {
                         ) : docs.map(doc => (
                             <Card
                                 key={doc.id}
-                                onClick={() => setSelectedDoc(doc)}
+                                onClick={() => openDoc(doc)}
                                 className={`p-3 cursor-pointer hover:bg-slate-50 transition-colors border-l-4 ${selectedDoc?.id === doc.id ? 'border-l-indigo-500 bg-indigo-50 border-t-slate-200 border-r-slate-200 border-b-slate-200' : 'border-l-transparent'}`}
                             >
                                 <div className="flex justify-between items-start">
@@ -276,6 +313,11 @@ export default function DocumentsPage() {
                                 </div>
                             </Card>
                         ))}
+                        {nextCursor && (
+                            <Button variant="ghost" size="sm" className="w-full text-slate-500" onClick={() => fetchDocs(nextCursor)} disabled={loadingMore}>
+                                {loadingMore ? <Loader2 className="w-4 h-4 animate-spin" /> : "Charger plus"}
+                            </Button>
+                        )}
                     </div>
                 </div>
 
@@ -288,11 +330,11 @@ export default function DocumentsPage() {
 
                                 <div className="flex flex-wrap gap-2">
                                     {/* Standard Exports */}
-                                    <Button variant="outline" size="sm" onClick={() => handleExport("pdf")} disabled={!!isExporting} title="Télécharger en PDF">
+                                    <Button variant="outline" size="sm" onClick={() => handleExport("pdf")} disabled={!!isExporting || !selectedDoc.contentLoaded} title="Télécharger en PDF">
                                         {isExporting === 'pdf' ? <div className="w-4 h-4 border-2 border-slate-600 border-t-transparent rounded-full animate-spin" /> : <FileDown className="w-4 h-4 mr-2 text-red-600" />}
                                         PDF
                                     </Button>
-                                    <Button variant="outline" size="sm" onClick={() => handleExport("docx")} disabled={!!isExporting} title="Télécharger en Word">
+                                    <Button variant="outline" size="sm" onClick={() => handleExport("docx")} disabled={!!isExporting || !selectedDoc.contentLoaded} title="Télécharger en Word">
                                         {isExporting === 'docx' ? <div className="w-4 h-4 border-2 border-slate-600 border-t-transparent rounded-full animate-spin" /> : <Download className="w-4 h-4 mr-2 text-blue-600" />}
                                         Word
                                     </Button>
@@ -302,11 +344,11 @@ export default function DocumentsPage() {
                                     {/* Quiz Specific Exports */}
                                     {selectedDoc.document_type === 'quiz' && (
                                         <>
-                                            <Button variant="outline" size="sm" onClick={() => handleExport("gift")} disabled={!!isExporting} title="Export Moodle">
+                                            <Button variant="outline" size="sm" onClick={() => handleExport("gift")} disabled={!!isExporting || !selectedDoc.contentLoaded} title="Export Moodle">
                                                 {isExporting === 'gift' ? <div className="w-4 h-4 border-2 border-slate-600 border-t-transparent rounded-full animate-spin" /> : <span className="mr-2 text-orange-600 font-bold">M</span>}
                                                 Moodle
                                             </Button>
-                                            <Button variant="outline" size="sm" onClick={() => handleExport("wooclap")} disabled={!!isExporting} title="Export Wooclap">
+                                            <Button variant="outline" size="sm" onClick={() => handleExport("wooclap")} disabled={!!isExporting || !selectedDoc.contentLoaded} title="Export Wooclap">
                                                 {isExporting === 'wooclap' ? <div className="w-4 h-4 border-2 border-slate-600 border-t-transparent rounded-full animate-spin" /> : <span className="mr-2 text-green-600 font-bold">W</span>}
                                                 Wooclap
                                             </Button>
@@ -314,13 +356,19 @@ export default function DocumentsPage() {
                                         </>
                                     )}
 
-                                    <Button variant="ghost" size="sm" onClick={() => navigator.clipboard.writeText(selectedDoc.content)}>
+                                    <Button variant="ghost" size="sm" onClick={() => navigator.clipboard.writeText(selectedDoc.content)} disabled={!selectedDoc.contentLoaded}>
                                         Copier
                                     </Button>
                                 </div>
                             </div>
                             <div className="prose prose-slate max-w-none">
-                                <ReactMarkdown>{selectedDoc.content}</ReactMarkdown>
+                                {selectedDoc.contentLoaded ? (
+                                    <ReactMarkdown>{selectedDoc.content}</ReactMarkdown>
+                                ) : selectedDoc.loadError ? (
+                                    <p className="text-red-600">Impossible de charger le document.</p>
+                                ) : (
+                                    <Loader2 className="w-6 h-6 animate-spin text-slate-400" />
+                                )}
                             </div>
                         </Card>
                     ) : (
@@ -344,24 +392,29 @@ export default function DocumentsPage() {
                                 Exporter
                             </h2>
                             <p className="text-sm text-gray-500 mb-4">
-                                Sélectionnez le cours dans lequel créer un devoir brouillon.
+                                Sélectionnez les cours dans lesquels créer un devoir brouillon.
                             </p>
                             <div className="space-y-4">
                                 <div>
                                     <label className="text-xs font-semibold uppercase text-gray-400 block mb-1">Cours</label>
-                                    <select
-                                        className="w-full border rounded p-2 text-sm"
-                                        value={selectedCourseId}
-                                        onChange={(e) => setSelectedCourseId(e.target.value)}
-                                    >
+                                    <div className="w-full border rounded p-2 text-sm max-h-60 overflow-y-auto space-y-1">
                                         {courses.map(c => (
-                                            <option key={c.id} value={c.id}>{c.name} {c.section ? `(${c.section})` : ''}</option>
+                                            <label key={c.id} className="flex items-center gap-2 cursor-pointer">
+                                                <input
+                                                    type="checkbox"
+                                                    checked={selectedCourseIds.includes(c.id)}
+                                                    onChange={(e) => setSelectedCourseIds(e.target.checked
+                                                        ? [...selectedCourseIds, c.id]
+                                                        : selectedCourseIds.filter(id => id !== c.id))}
+                                                />
+                                                {c.name} {c.section ? `(${c.section})` : ''}
+                                            </label>
                                         ))}
-                                    </select>
+                                    </div>
                                 </div>
                                 <div className="flex justify-end gap-2 pt-2">
                                     <Button variant="ghost" onClick={() => setIsClassroomModalOpen(false)}>Annuler</Button>
-                                    <Button onClick={handleExportToClassroom} disabled={exportLoading} className="bg-green-600 hover:bg-green-700 text-white">
+                                    <Button onClick={handleExportToClassroom} disabled={exportLoading || selectedCourseIds.length === 0} className="bg-green-600 hover:bg-green-700 text-white">
                                         {exportLoading ? <Loader2 className="w-4 h-4 mr-2 animate-spin" /> : "Créer le devoir"}
                                     </Button>
                                 </div>
@@ -20,9 +20,22 @@ import ReactMarkdown from "react-markdown";
 import { API_BASE_URL } from "@/lib/api";
 import Link from "next/link";
 
+interface QuizQuestion {
+    number: number;
+    text: string;
+    options: Record<string, string>;
+}
+
 interface QuizData {
     title: string;
     content: string;
+    questions?: QuizQuestion[];
+}
+
+interface SubmissionResult {
+    score: number;
+    total: number;
+    results: { question: number; answer: string | null; correct: boolean | null }[];
 }
 
 export default function StudentPage() {
@@ -32,6 +45,12 @@ export default function StudentPage() {
     const [error, setError] = useState<string | null>(null);
     const [mounted, setMounted] = useState(false);
 
+    // Answers State
+    const [studentName, setStudentName] = useState("");
+    const [answers, setAnswers] = useState<Record<number, string>>({});
+    const [result, setResult] = useState<SubmissionResult | null>(null);
+    const [isSubmitting, setIsSubmitting] = useState(false);
+
     // Tutor State
     const [showTutor, setShowTutor] = useState(false);
     const [tutorInput, setTutorInput] = useState("");
@@ -51,6 +70,8 @@ export default function StudentPage() {
             if (!res.ok) throw new Error("Code invalide ou quiz expiré");
             const data = await res.json();
             setQuiz(data);
+            setAnswers({});
+            setResult(null);
             setTutorMessages([
                 { role: 'bot', content: "Bonjour ! Je suis ton tuteur IA. Je peux t'aider à comprendre les questions de ce quiz si tu bloques. N'hésite pas à me poser tes questions !" }
             ]);
@@ -87,6 +108,27 @@ export default function StudentPage() {
         }
     };
 
+    const choiceQuestions = (quiz?.questions || []).filter(q => Object.keys(q.options).length > 0);
+
+    const handleSubmitAnswers = async () => {
+        if (!quiz || !studentName.trim() || isSubmitting) return;
+        setIsSubmitting(true);
+        try {
+            const res = await fetch(`${API_BASE_URL}/api/student/quiz/${code.toUpperCase()}/submit`, {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ student_name: studentName.trim(), answers }),
+            });
+            const data = await res.json();
+            if (!res.ok) throw new Error(data.detail || "Envoi impossible");
+            setResult(data);
+        } catch (err: any) {
+            alert(err.message);
+        } finally {
+            setIsSubmitting(false);
+        }
+    };
+
     if (!mounted) return null;
 
     if (!quiz) {
@@ -162,6 +204,54 @@ export default function StudentPage() {
                     <ReactMarkdown>{quiz.content}</ReactMarkdown>
                 </div>
 
+                {choiceQuestions.length > 0 && (
+                    <div className="mt-12 p-6 bg-white rounded-3xl border border-slate-200 space-y-6">
+                        <h3 className="text-lg font-bold text-slate-800">Mes réponses</h3>
+                        <Input
+                            placeholder="Ton prénom et ton nom"
+                            value={studentName}
+                            onChange={(e) => setStudentName(e.target.value)}
+                            disabled={!!result}
+                        />
+                        {choiceQuestions.map(q => {
+                            const correction = result?.results.find(r => r.question === q.number);
+                            return (
+                                <div key={q.number} className="space-y-2">
+                                    <p className="font-medium text-slate-700">{q.number}. {q.text}</p>
+                                    <div className="flex flex-wrap gap-2">
+                                        {Object.entries(q.options).map(([letter, label]) => (
+                                            <button
+                                                key={letter}
+                                                disabled={!!result}
+                                                onClick={() => setAnswers(prev => ({ ...prev, [q.number]: letter }))}
+                                                className={`px-3 py-2 rounded-lg border text-sm text-left ${answers[q.number] === letter ? "bg-indigo-600 text-white border-indigo-600" : "bg-slate-50 text-slate-700 border-slate-200 hover:bg-indigo-50"} ${correction?.correct !== null && correction?.answer === letter ? (correction.correct ? "ring-2 ring-green-500" : "ring-2 ring-red-400") : ""}`}
+                                            >
+                                                <span className="font-bold mr-1">{letter})</span> {label}
+                                            </button>
+                                        ))}
+                                    </div>
+                                    {correction && correction.correct !== null && (
+                                        <p className={`text-xs font-medium ${correction.correct ? "text-green-600" : "text-red-500"}`}>
+                                            {correction.correct ? "✅ Bonne réponse" : "❌ Mauvaise réponse"}
+                                        </p>
+                                    )}
+                                </div>
+                            );
+                        })}
+                        {result ? (
+                            <p className="text-center text-xl font-bold text-indigo-700">Score : {result.score} / {result.total}</p>
+                        ) : (
+                            <Button
+                                onClick={handleSubmitAnswers}
+                                disabled={isSubmitting || !studentName.trim()}
+                                className="w-full bg-indigo-600"
+                            >
+                                {isSubmitting ? "Envoi..." : "Envoyer mes réponses"}
+                            </Button>
+                        )}
+                    </div>
+                )}
+
                 <div className="mt-12 p-8 bg-slate-50 rounded-3xl border-2 border-dashed border-slate-200 flex flex-col items-center text-center gap-4">
                     <CheckCircle2 className="w-12 h-12 text-green-500" />
                     <div className="space-y-1">
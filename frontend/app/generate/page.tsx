@@ -13,6 +13,7 @@ import Link from "next/link";
 import { API_BASE_URL } from "@/lib/api";
 import { Navbar } from "@/components/Navbar";
 import { useSearchParams } from "next/navigation";
+import { computeLineDelta } from "@/lib/textDelta";
 
 const DOCUMENT_TYPES = [
     { id: "dossier_prof", label: "Dossier Professeur", icon: FileText, color: "text-blue-600 bg-blue-50 border-blue-200" },
@@ -97,6 +98,8 @@ function GenerateContent() {
     const [showRefineInput, setShowRefineInput] = useState(false);
     const [isSaving, setIsSaving] = useState(false);
     const [isSaved, setIsSaved] = useState(false);
+    // Last saved revision of the current result: later saves send a delta against it
+    const [savedDoc, setSavedDoc] = useState<{ id: string; version: number; content: string } | null>(null);
     const [currentTrack, setCurrentTrack] = useState("NDRC"); // Default track
     const [activeTab, setActiveTab] = useState<'setup' | 'result'>('setup'); // Mobile tab state
     const [savedDocs, setSavedDocs] = useState<any[]>([]); // Documents for dropdown
@@ -123,10 +126,10 @@ function GenerateContent() {
             })
                 .then(res => res.json())
                 .then(data => {
-                    if (Array.isArray(data)) {
+                    if (Array.isArray(data?.items)) {
                         // Filter or use all? User says "old fiches are memorized".
                         // Maybe filter by type if needed, but let's show all relevant ones.
-                        setSavedDocs(data);
+                        setSavedDocs(data.items);
                     }
                 })
                 .catch(err => console.error("Failed to fetch docs:", err));
@@ -178,23 +181,42 @@ function GenerateContent() {
                 return;
             }
 
-            const response = await fetch(`${API_BASE_URL}/api/documents/save`, {
-                method: "POST",
-                headers: {
-                    "Content-Type": "application/json",
-                    "Authorization": `Bearer ${token}`
-                },
-                body: JSON.stringify({
-                    title: `${topic} (${selectedType.label})`,
-                    content: generatedContent,
-                    document_type: docType
+            // Already saved (e.g. after a refine): send only the changed lines as a new version
+            const response = savedDoc
+                ? await fetch(`${API_BASE_URL}/api/documents/${savedDoc.id}`, {
+                    method: "PATCH",
+                    headers: {
+                        "Content-Type": "application/json",
+                        "Authorization": `Bearer ${token}`
+                    },
+                    body: JSON.stringify({
+                        base_version: savedDoc.version,
+                        delta: computeLineDelta(savedDoc.content, generatedContent)
+                    })
                 })
-            });
+                : await fetch(`${API_BASE_URL}/api/documents/save`, {
+                    method: "POST",
+                    headers: {
+                        "Content-Type": "application/json",
+                        "Authorization": `Bearer ${token}`
+                    },
+                    body: JSON.stringify({
+                        title: `${topic} (${selectedType.label})`,
+                        content: generatedContent,
+                        document_type: docType
+                    })
+                });
 
             if (response.ok) {
+                const data = await response.json();
+                setSavedDoc({ id: data.id, version: data.version, content: generatedContent });
                 setIsSaved(true);
                 // Reset "saved" status after 3 seconds
                 setTimeout(() => setIsSaved(false), 3000);
+            } else if (response.status === 409) {
+                // Saved from elsewhere in the meantime: the next save creates a new document
+                setSavedDoc(null);
+                alert("Ce document a été modifié ailleurs. Sauvegardez à nouveau pour créer une copie.");
             } else {
                 const err = await response.text();
                 console.error(err);
@@ -331,6 +353,7 @@ function GenerateContent() {
         if (!topic.trim() && !selectedFile) return;
         setIsLoading(true);
         setGeneratedContent("");
+        setSavedDoc(null);
 
         try {
             let fileId = null;
@@ -390,9 +413,13 @@ function GenerateContent() {
         if (!logId || !generatedContent) return;
         setIsPublishing(true);
         try {
+            const token = (session as any)?.accessToken;
             const response = await fetch(`${API_BASE_URL}/api/student/publish`, {
                 method: "POST",
-                headers: { "Content-Type": "application/json" },
+                headers: {
+                    "Content-Type": "application/json",
+                    "Authorization": `Bearer ${token}`
+                },
                 body: JSON.stringify({
                     log_id: logId,
                     content: generatedContent,
@@ -475,6 +502,7 @@ function GenerateContent() {
             if (confirm("Voulez-vous effacer le formulaire et le résultat ?")) {
                 setTopic("");
                 setGeneratedContent("");
+                setSavedDoc(null);
                 setSuggestedFilename(null);
                 setLogId(null);
             }
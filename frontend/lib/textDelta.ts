@@ -0,0 +1,31 @@
+// Line delta understood by PATCH /api/documents/{id} (see backend versioning_service):
+//   n > 0 keeps n lines, n < 0 drops -n lines, string[] inserts lines (each keeps its "\n").
+// Lines after the last operation are kept.
+export type LineDelta = (number | string[])[];
+
+const splitLines = (text: string): string[] => text.match(/[^\n]*\n|[^\n]+$/g) || [];
+
+// Trims the common prefix and suffix: edits from autosave and refine are local,
+// so the delta carries only the changed block instead of the whole document.
+export function computeLineDelta(oldText: string, newText: string): LineDelta {
+    const a = splitLines(oldText);
+    const b = splitLines(newText);
+
+    let prefix = 0;
+    while (prefix < a.length && prefix < b.length && a[prefix] === b[prefix]) prefix++;
+
+    let suffix = 0;
+    while (
+        suffix < a.length - prefix &&
+        suffix < b.length - prefix &&
+        a[a.length - 1 - suffix] === b[b.length - 1 - suffix]
+    ) suffix++;
+
+    const delta: LineDelta = [];
+    if (prefix > 0) delta.push(prefix);
+    const removed = a.length - prefix - suffix;
+    if (removed > 0) delta.push(-removed);
+    const inserted = b.slice(prefix, b.length - suffix);
+    if (inserted.length > 0) delta.push(inserted);
+    return delta;
+}